@@ -1,26 +1,80 @@
 import os
-from typing import List, Dict
-# Placeholder for Fireworks AI client
-# from fireworks.client import Fireworks
+import re
+from collections import OrderedDict
+from typing import List, Dict, Optional
+from backend.app.intent_classifier import IntentClassifier, INTENT_TRAINING_PATH
+from backend.app.nemo_agent import NeMoAgent, fireworks_client
+from backend.app.rate_limiter import upstream_guard, UpstreamLimited
+
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.7"))
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "1024"))
 
 class AgentRouter:
     """
-    Routes user queries to the appropriate specialized agent using Fireworks AI.
+    Routes user queries to the appropriate specialized agent.
+    Tiered: decision cache -> local intent classifier -> Fireworks AI (only for
+    low-confidence queries). Without an LLM the classifier's best guess stands;
+    keyword rules are the last resort when no training data is available.
     """
-    def __init__(self):
+    def __init__(self, classifier: Optional[IntentClassifier] = None,
+                 confidence_threshold: float = ROUTER_CONFIDENCE_THRESHOLD,
+                 cache_size: int = ROUTER_CACHE_SIZE):
         self.api_key = os.getenv("FIREWORKS_API_KEY")
-        # self.client = Fireworks(api_key=self.api_key)
         self.agents = {
             "ingestion": "Responsible for fetching data from external API sources like Wikipedia or Fanart.tv",
             "reasoning": "Responsible for complex relationship analysis using the Knowledge Graph",
             "commerce": "Responsible for handling transactions, ticket buying, and gift cards (x402)",
             "chitchat": "Handles general conversation and greetings"
         }
+        self.classifier = classifier
+        if self.classifier is None:
+            try:
+                self.classifier = IntentClassifier().fit_file(INTENT_TRAINING_PATH)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Router: intent classifier unavailable ({e}), using keyword rules")
+        self.confidence_threshold = confidence_threshold
+        self.cache_size = cache_size
+        self.decisions: OrderedDict = OrderedDict()
+        self.stats = {"cache": 0, "classifier": 0, "llm": 0, "low_confidence": 0, "keywords": 0}
+
+    @staticmethod
+    def normalize(user_query: str) -> str:
+        return re.sub(r"\s+", " ", re.sub(r"[^\w\s$@.]", " ", user_query.lower())).strip(" .")
 
-    async def route_query(self, user_query: str) -> str:
+    async def route_query(self, user_query: str, allow_llm: bool = True) -> str:
         """
         Determines the intent of the user query and returns the agent key.
+        allow_llm=False keeps routing local (cache, classifier, keywords), e.g. for rate-limited chats.
         """
+        key = self.normalize(user_query)
+        intent = self.decisions.get(key)
+        if intent is not None:
+            self.decisions.move_to_end(key)
+            self.stats["cache"] += 1
+            return intent
+
+        if self.classifier is None:
+            intent = self._route_with_keywords(key)
+            self.stats["keywords"] += 1
+        else:
+            intent, confidence = self.classifier.predict(key)
+            if confidence >= self.confidence_threshold:
+                self.stats["classifier"] += 1
+            elif not allow_llm:
+                # Best local guess, not remembered: a later full request may still ask the LLM
+                self.stats["low_confidence"] += 1
+                return intent
+            else:
+                llm_intent = await self._route_with_llm(user_query) if self.api_key else None
+                self.stats["llm" if llm_intent else "low_confidence"] += 1
+                intent = llm_intent or intent
+
+        self.decisions[key] = intent
+        if len(self.decisions) > self.cache_size:
+            self.decisions.popitem(last=False)
+        return intent
+
+    async def _route_with_llm(self, user_query: str) -> Optional[str]:
         prompt = f"""
         You are an intelligent router for a movie dashboard.
         Available Agents:
@@ -30,17 +84,34 @@ class AgentRouter:
         
         Which agent should handle this? Return strictly the key (e.g. 'ingestion', 'reasoning', etc.).
         """
-        
-        # simulated response
-        # response = await self.client.generate(prompt)
-        # return response.text.strip()
-        
-        q = user_query.lower()
-        if "buy" in q or "gift card" in q:
+        try:
+            # Same bulkhead and quota as the chat completions: routing must not bypass them
+            async with upstream_guard.guard("fireworks"):
+                completion = await fireworks_client(self.api_key).chat.completions.create(
+                    model=NeMoAgent.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=5,
+                    temperature=0.0
+                )
+            answer = completion.choices[0].message.content.strip().lower()
+            return next((agent for agent in self.agents if agent in answer), None)
+        except UpstreamLimited as e:
+            print(f"🚦 Router: LLM tier skipped ({e}), using the classifier's guess")
+            return None
+        except Exception as e:
+            print(f"⚠️ Router LLM Error: {e}")
+            return None
+
+    @staticmethod
+    def _route_with_keywords(q: str) -> str:
+        if any(w in q for w in ("buy", "gift card", "ticket", "purchase", "pay")):
             return "commerce"
-        if "matrix" in q or "find" in q:
+        # "find" alone is not enough: "find out why..." is a reasoning question
+        if re.match(r"(load|fetch|download|pull up|open|play|show me the poster|find (the movie|me|the film))\b", q) \
+                or "subtitles" in q or "matrix" in q:
             return "ingestion"
-        
+        if q in ("hi", "hello", "hey", "thanks", "thank you", "bye"):
+            return "chitchat"
         return "reasoning"
 
 class BaseAgent:
@@ -1,14 +1,99 @@
+import os
+import zlib
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+import bson
+from bson.binary import Binary
 from backend.app.database import db
+from backend.app.write_behind import write_queue
+
+# Stored document layout:
+#   v1 (legacy): {"data": {...}, "timestamp"}
+#   v2:          {"v": 2, "ns", "timestamp", "size", and either "data": {...} (small payloads)
+#                 or "blob": <BSON-encoded data, compressed>, "codec": "zlib" | "zstd", "stored_size"}
+PAYLOAD_VERSION = 2
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "auto") # auto (zstd if installed, else zlib) | zstd | zlib | none
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+def _zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+def pick_codec(setting: str = CACHE_COMPRESSION) -> Optional[str]:
+    """
+    Codec new entries are written with; zstd falls back to zlib when `zstandard` is missing.
+    """
+    setting = (setting or "none").lower()
+    if setting in ("none", "off", ""):
+        return None
+    if setting in ("auto", "zstd"):
+        return "zstd" if _zstd() else "zlib"
+    return "zlib"
+
+def compress(raw: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return zlib.compress(raw, ZLIB_LEVEL)
+
+def decompress(blob: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("entry is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    raise ValueError(f"unknown codec '{codec}'")
+
+def namespace_of(key: str) -> str:
+    """
+    Agent namespace of a cache key: "wiki_search_tmdb_603" -> "wiki_search".
+    """
+    return "_".join(key.split("_", 2)[:2])
 
 class CacheManager:
     """
     Manages caching of external API responses to MongoDB.
     Uses a separate 'api_cache' collection.
+    Payloads above `compress_min_bytes` are stored BSON-encoded and compressed
+    (see PAYLOAD_VERSION); smaller ones stay plain documents. Reads accept both,
+    as well as legacy v1 entries.
     """
-    def __init__(self, collection_name: str = "api_cache"):
+    def __init__(self, collection_name: str = "api_cache", codec: Optional[str] = None,
+                 compress_min_bytes: int = CACHE_COMPRESS_MIN_BYTES):
         self.collection_name = collection_name
+        self.codec = codec if codec is not None else pick_codec()
+        self.compress_min_bytes = compress_min_bytes
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+            "writes": 0, "compressed_writes": 0, "raw_bytes": 0, "stored_bytes": 0,
+            "hits": 0, "misses": 0, "read_bytes": 0, "decode_errors": 0
+        })
+
+    def encode(self, key: str, data: Dict[str, Any], namespace: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Document fields for an entry (without _id).
+        """
+        raw = bson.encode(data)
+        payload = {"v": PAYLOAD_VERSION, "ns": namespace or namespace_of(key), "size": len(raw), "timestamp": datetime.utcnow()}
+        if self.codec and len(raw) >= self.compress_min_bytes:
+            blob = compress(raw, self.codec)
+            if len(blob) < len(raw):
+                payload.update({"blob": Binary(blob), "codec": self.codec, "stored_size": len(blob)})
+                return payload
+        payload.update({"data": data, "stored_size": len(raw)})
+        return payload
+
+    @staticmethod
+    def decode(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if doc.get("blob") is not None:
+            return bson.decode(decompress(bytes(doc["blob"]), doc.get("codec")))
+        return doc.get("data") # v2 uncompressed, or v1
 
     async def get(self, key: str) -> Optional[Dict[str, Any]]:
         """
@@ -16,30 +101,80 @@ class CacheManager:
         """
         if db.db is None:
             return None
-            
+        stats = self._stats[namespace_of(key)]
+
+        # Read-your-writes for entries still waiting in the write-behind queue
+        pending = write_queue.peek(self.collection_name, {"_id": key})
+        if pending and (pending.get("data") is not None or pending.get("blob") is not None):
+            stats["hits"] += 1
+            return self.decode(pending)
+
         doc = await db.db[self.collection_name].find_one({"_id": key})
         if doc:
             # We could add TTL logic here if needed
             # if (datetime.utcnow() - doc['timestamp']).days > 7: return None
-            return doc.get("data")
+            try:
+                data = self.decode(doc)
+            except Exception as e:
+                print(f"⚠️ CacheManager: undecodable entry '{key}' ({e}), treating as a miss")
+                stats["decode_errors"] += 1
+                data = None
+            if data is not None:
+                stats["hits"] += 1
+                stats["read_bytes"] += doc.get("stored_size") or len(bson.encode(doc))
+                return data
+        stats["misses"] += 1
         return None
 
-    async def set(self, key: str, data: Dict[str, Any]):
+    async def set(self, key: str, data: Dict[str, Any], defer: bool = False, namespace: Optional[str] = None):
         """
-        Save data to cache.
+        Save data to cache. With defer=True the write goes through the
+        write-behind queue instead of being awaited on the request path.
         """
         if db.db is None:
             return
 
-        payload = {
-            "data": data,
-            "timestamp": datetime.utcnow()
-        }
+        payload = self.encode(key, data, namespace)
+        stats = self._stats[payload["ns"]]
+        stats["writes"] += 1
+        stats["compressed_writes"] += payload.get("blob") is not None
+        stats["raw_bytes"] += payload["size"]
+        stats["stored_bytes"] += payload["stored_size"]
+
+        # Null out the other representation left by an earlier write of this key
+        # (a plain $set keeps deferred writes coalescable in the write-behind queue)
+        update = {"$set": {"data": None, "blob": None, "codec": None, **payload}}
+        if defer:
+            write_queue.enqueue(self.collection_name, {"_id": key}, update)
+            return
+
         await db.db[self.collection_name].update_one(
             {"_id": key},
-            {"$set": payload},
+            update,
             upsert=True
         )
 
+    def stats(self) -> Dict[str, Any]:
+        """
+        Per-namespace counters since startup, with the compression ratio of writes.
+        """
+        return {
+            ns: {**s, "ratio": round(s["stored_bytes"] / s["raw_bytes"], 3) if s["raw_bytes"] else None}
+            for ns, s in self._stats.items()
+        }
+
+    async def namespace_sizes(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Stored entries per namespace in MongoDB: count, raw and stored bytes (v2 entries).
+        """
+        if db.db is None:
+            return {}
+        sizes = {}
+        pipeline = [{"$group": {"_id": {"$ifNull": ["$ns", "legacy"]}, "entries": {"$sum": 1},
+                                "raw_bytes": {"$sum": "$size"}, "stored_bytes": {"$sum": "$stored_size"}}}]
+        async for row in db.db[self.collection_name].aggregate(pipeline):
+            sizes[row["_id"]] = {k: v for k, v in row.items() if k != "_id"}
+        return sizes
+
 # Global instance
 cache = CacheManager()
@@ -0,0 +1,80 @@
+import os
+import hashlib
+from typing import Any, Dict, Iterable, List
+from backend.app.helpers.cleaner import DataCleanerAgent
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for English subtitles).
+    """
+    return max(1, (len(text) + 3) // 4)
+
+class SubtitleChunker:
+    """
+    Packs cleaned cues into embedding chunks.
+    A chunk closes when adding the next cue would exceed `max_tokens` or when
+    the silence before the next cue is longer than `max_gap_seconds` (a scene
+    break). The last `overlap_cues` cues of a chunk are repeated at the start
+    of the next one, unless the break was a silence gap.
+    Chunk ids are derived from movie + time span, so re-ingesting a film
+    produces the same ids.
+    """
+    def __init__(self, max_tokens: int = None, max_gap_seconds: float = None, overlap_cues: int = None):
+        self.max_tokens = max_tokens or int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+        self.max_gap_seconds = max_gap_seconds if max_gap_seconds is not None else float(os.getenv("CHUNK_MAX_GAP_SECONDS", "4.0"))
+        self.overlap_cues = overlap_cues if overlap_cues is not None else int(os.getenv("CHUNK_OVERLAP_CUES", "1"))
+        self.cleaner = DataCleanerAgent()
+
+    @staticmethod
+    def chunk_id(movie: str, start: float, end: float) -> str:
+        digest = hashlib.sha1(f"{movie}|{int(round(start * 1000))}|{int(round(end * 1000))}".encode("utf-8"))
+        return f"chunk_{digest.hexdigest()[:16]}"
+
+    def _emit(self, movie: str, cues: List[Dict[str, Any]]) -> Dict[str, Any]:
+        start = cues[0]["start"]
+        end = cues[-1]["end"]
+        return {
+            "_id": self.chunk_id(movie, start, end),
+            "movie": movie,
+            "text": " ".join(c["text"] for c in cues),
+            "start": start,
+            "end": end,
+            "cue_start": cues[0]["position"],
+            "cue_end": cues[-1]["position"],
+            "tokens": sum(c["tokens"] for c in cues)
+        }
+
+    def chunk(self, movie: str, cues: Iterable[Any]) -> List[Dict[str, Any]]:
+        """
+        Chunks a track of pysrt items or {"text", "start", "end"} dicts.
+        """
+        transcript, spans = self.cleaner.clean_track(cues)
+        chunks = []
+        current: List[Dict[str, Any]] = []
+        current_tokens = 0
+        fresh = 0 # Cues in `current` that are not overlap carried from the previous chunk
+
+        for span in spans:
+            text = transcript[span.char_start:span.char_end]
+            cue = {"text": text, "start": span.start, "end": span.end,
+                   "position": span.cue_position, "tokens": estimate_tokens(text)}
+
+            if current:
+                silence = cue["start"] - current[-1]["end"] > self.max_gap_seconds
+                if silence or current_tokens + cue["tokens"] > self.max_tokens:
+                    if fresh:
+                        chunks.append(self._emit(movie, current))
+                    carry = current[-self.overlap_cues:] if self.overlap_cues and fresh and not silence else []
+                    if sum(c["tokens"] for c in carry) + cue["tokens"] > self.max_tokens:
+                        carry = []
+                    current = carry
+                    current_tokens = sum(c["tokens"] for c in carry)
+                    fresh = 0
+
+            current.append(cue)
+            current_tokens += cue["tokens"]
+            fresh += 1
+
+        if current and fresh:
+            chunks.append(self._emit(movie, current))
+        return chunks
@@ -0,0 +1,249 @@
+import os
+import re
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+from backend.app.database import db
+from backend.app.chunker import estimate_tokens
+from backend.app.shared_state import shared_state
+
+CONVERSATION_WINDOW_TOKENS = int(os.getenv("CONVERSATION_WINDOW_TOKENS", "800"))
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "200"))
+CONVERSATION_FACTS_TOKENS = int(os.getenv("CONVERSATION_FACTS_TOKENS", "300"))
+CONVERSATION_MAX_USERS = int(os.getenv("CONVERSATION_MAX_USERS", "10000"))
+CONVERSATION_SESSION_TTL_HOURS = float(os.getenv("CONVERSATION_SESSION_TTL_HOURS", "168"))
+SESSION_KEY_PREFIX = "session:"
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """
+    Cuts text to roughly `budget` tokens, on a word boundary.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    cut = text[:budget * 4].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:") + "…"
+
+class _Session:
+    def __init__(self):
+        self.turns: deque = deque() # {"role", "content", "tokens"} inside the window
+        self.window_tokens = 0
+        self.overflow: List[Dict[str, Any]] = [] # Evicted turns not yet folded into the summary
+        self.summary = ""
+        self.summarizing: Optional[asyncio.Task] = None
+        self.persisting: Optional[asyncio.Task] = None
+        self.dirty = False # Changed since last written to shared state
+        self.written = time.monotonic() # Last change here or from another worker (the shared copy's TTL restarts then)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"turns": list(self.turns), "overflow": self.overflow, "summary": self.summary}
+
+    def restore(self, state: Dict[str, Any]):
+        self.turns = deque(state.get("turns", []))
+        self.window_tokens = sum(t["tokens"] for t in self.turns)
+        self.overflow = list(state.get("overflow", []))
+        self.summary = state.get("summary", "")
+        self.written = time.monotonic()
+
+class ConversationMemory:
+    """
+    Per-user chat state for NeMo prompts, bounded in tokens:
+    - the most recent turns, up to `window_tokens`;
+    - older turns folded into a rolling summary (capped at `summary_tokens`),
+      recomputed in the background so the request path never waits for it;
+    - facts from the `facts` collection matching the question, up to `facts_tokens`.
+    Prompt size is therefore constant however long a session runs.
+    With several workers, sessions are written to shared state after each
+    change, loaded from it on a user's first request to this worker, and kept
+    in sync when another worker updates them.
+    """
+    def __init__(self, window_tokens: int = CONVERSATION_WINDOW_TOKENS,
+                 summary_tokens: int = CONVERSATION_SUMMARY_TOKENS,
+                 facts_tokens: int = CONVERSATION_FACTS_TOKENS,
+                 max_users: int = CONVERSATION_MAX_USERS, summarizer=None, state=None):
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.facts_tokens = facts_tokens
+        self.max_users = max_users
+        self._summarizer = summarizer
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self.state = state or shared_state
+        # Only sessions this worker holds are followed; other users' turns are never fetched here
+        self.state.subscribe(SESSION_KEY_PREFIX, self._on_shared_change, prefix=True,
+                             holds=lambda key: key[len(SESSION_KEY_PREFIX):] in self._sessions)
+        self.stats = {"turns": 0, "summaries": 0, "summary_failures": 0, "context_tokens_max": 0, "contexts": 0,
+                      "shared_loads": 0, "shared_writes": 0, "shared_updates": 0}
+
+    @property
+    def summarizer(self):
+        if self._summarizer is None:
+            from backend.app.nemo_agent import NeMoAgent
+            self._summarizer = NeMoAgent()
+        return self._summarizer
+
+    def _drop_expired(self, user_id: str):
+        # The shared copy of an idle session is deleted by its TTL; a recreated one starts over at version 1
+        session = self._sessions.get(user_id)
+        if session is not None and time.monotonic() - session.written > CONVERSATION_SESSION_TTL_HOURS * 3600:
+            del self._sessions[user_id]
+            self.state.forget(SESSION_KEY_PREFIX + user_id)
+
+    def _session(self, user_id: str) -> _Session:
+        self._drop_expired(user_id)
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = self._sessions[user_id] = _Session()
+            while len(self._sessions) > self.max_users:
+                evicted, _ = self._sessions.popitem(last=False)
+                self.state.forget(SESSION_KEY_PREFIX + evicted)
+        self._sessions.move_to_end(user_id)
+        return session
+
+    # --- Shared state (multiple workers) ---
+
+    async def load(self, user_id: str):
+        """
+        Brings in the user's session from shared state when this worker doesn't hold it yet.
+        """
+        self._drop_expired(user_id)
+        if not self.state.shared or user_id in self._sessions:
+            return
+        try:
+            state = await self.state.fetch(SESSION_KEY_PREFIX + user_id)
+        except Exception as e:
+            print(f"⚠️ ConversationMemory: could not load session '{user_id}': {e}")
+            return
+        if user_id not in self._sessions and state:
+            self._session(user_id).restore(state)
+            self.stats["shared_loads"] += 1
+
+    def _on_shared_change(self, key: str, state: Dict[str, Any]):
+        # Another worker answered this user: adopt its session, unless ours is being written
+        session = self._sessions.get(key[len(SESSION_KEY_PREFIX):])
+        if session is None or (session.persisting and not session.persisting.done()) or not state:
+            return
+        session.restore(state)
+        self.stats["shared_updates"] += 1
+
+    def _persist(self, user_id: str, session: _Session):
+        if not self.state.shared:
+            return
+        session.dirty = True
+        session.written = time.monotonic()
+        if session.persisting is None or session.persisting.done():
+            try:
+                session.persisting = asyncio.get_running_loop().create_task(self._write(user_id, session))
+            except RuntimeError:
+                pass # No event loop (scripts)
+
+    async def _write(self, user_id: str, session: _Session):
+        # One writer per session: snapshots are written in order, the latest one last
+        while session.dirty:
+            session.dirty = False
+            try:
+                await self.state.set(SESSION_KEY_PREFIX + user_id, session.to_state(),
+                                     ttl_seconds=CONVERSATION_SESSION_TTL_HOURS * 3600)
+                self.stats["shared_writes"] += 1
+            except Exception as e:
+                print(f"⚠️ ConversationMemory: could not share session '{user_id}': {e}")
+
+    def add_turn(self, user_id: str, role: str, content: str):
+        """
+        Records a message. Turns pushed out of the window are summarized in the background.
+        """
+        if not content:
+            return
+        session = self._session(user_id)
+        tokens = estimate_tokens(content)
+        session.turns.append({"role": role, "content": content, "tokens": tokens})
+        session.window_tokens += tokens
+        self.stats["turns"] += 1
+
+        while session.window_tokens > self.window_tokens and len(session.turns) > 1:
+            turn = session.turns.popleft()
+            session.window_tokens -= turn["tokens"]
+            session.overflow.append(turn)
+
+        if session.overflow and (session.summarizing is None or session.summarizing.done()):
+            try:
+                session.summarizing = asyncio.get_running_loop().create_task(self._summarize(user_id, session))
+            except RuntimeError:
+                pass # No event loop (scripts): folded in on the next turn made from async code
+        self._persist(user_id, session)
+
+    @staticmethod
+    def _extractive_summary(previous: str, turns: List[Dict[str, Any]]) -> str:
+        # Offline fallback: keep the user's questions, newest last
+        asked = [re.sub(r"\s+", " ", t["content"]).strip() for t in turns if t["role"] == "user"]
+        return " ".join(filter(None, [previous, *(f"User asked: {q}" for q in asked)]))
+
+    async def _summarize(self, user_id: str, session: _Session):
+        while session.overflow:
+            turns, session.overflow = session.overflow, []
+            transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+            summary = None
+            try:
+                summary = await self.summarizer.summarize(session.summary, transcript, self.summary_tokens)
+            except Exception as e:
+                print(f"⚠️ ConversationMemory: summary failed ({e}), using extractive fallback")
+                self.stats["summary_failures"] += 1
+            if not summary:
+                summary = self._extractive_summary(session.summary, turns)
+            # Keep the most recent part when the summary outgrows its budget
+            if estimate_tokens(summary) > self.summary_tokens:
+                summary = "…" + summary[-self.summary_tokens * 4:].split(" ", 1)[-1]
+            session.summary = summary
+            self.stats["summaries"] += 1
+            self._persist(user_id, session)
+
+    async def retrieve_facts(self, query: str, movie: Optional[str] = None, limit: int = 8) -> List[str]:
+        """
+        Best-matching facts (MongoDB text index), trimmed to the facts budget.
+        """
+        if db.db is None:
+            return []
+        terms = f"{query} {movie or ''}".strip()
+        facts, used = [], 0
+        try:
+            cursor = db.reader("facts").find(
+                {"$text": {"$search": terms}},
+                {"content": 1, "score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+            async for doc in cursor:
+                remaining = self.facts_tokens - used
+                if remaining < 16:
+                    break
+                content = truncate_to_tokens(doc.get("content", ""), remaining)
+                facts.append(content)
+                used += estimate_tokens(content)
+        except Exception as e:
+            print(f"⚠️ ConversationMemory: fact retrieval failed: {e}")
+        return facts
+
+    async def build_context(self, user_id: str, query: str, movie: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Context for NeMoAgent: {"summary", "history", "facts", "movie", "tokens"}.
+        """
+        await self.load(user_id)
+        session = self._session(user_id)
+        facts = await self.retrieve_facts(query, movie)
+        history = [{"role": t["role"], "content": t["content"]} for t in session.turns]
+        summary_tokens = estimate_tokens(session.summary) if session.summary else 0
+        tokens = session.window_tokens + summary_tokens + sum(estimate_tokens(f) for f in facts)
+        self.stats["contexts"] += 1
+        self.stats["context_tokens_max"] = max(self.stats["context_tokens_max"], tokens)
+        return {"summary": session.summary, "history": history, "facts": facts, "movie": movie, "tokens": tokens}
+
+    async def stop(self):
+        tasks = [s.summarizing for s in self._sessions.values() if s.summarizing and not s.summarizing.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Pending session writes are finished, not dropped
+        await asyncio.gather(*[s.persisting for s in self._sessions.values() if s.persisting], return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "sessions": len(self._sessions)}
+
+# Global instance
+conversation_memory = ConversationMemory()
@@ -1,43 +1,183 @@
 import os
+from typing import Any, Dict, List
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel, ASCENDING, TEXT
+from pymongo import ReadPreference
+from pymongo.monitoring import ConnectionPoolListener
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "movie_fan_db")
 
+# Read-heavy collections that tolerate slightly stale data
+SECONDARY_READ_COLLECTIONS = ("movies", "facts", "subtitles")
+WIRE_COMPRESSORS = ("zstd", "snappy", "zlib")
+
+def available_compressors(requested: str) -> List[str]:
+    """
+    Keeps the requested wire compressors whose libraries are installed
+    (zstd needs `zstandard`, snappy needs `python-snappy`; zlib is built in).
+    """
+    usable = []
+    for name in [c.strip() for c in requested.split(",") if c.strip()]:
+        if name not in WIRE_COMPRESSORS:
+            print(f"WARNING: Unknown MongoDB compressor '{name}' ignored.")
+            continue
+        try:
+            if name == "zstd":
+                import zstandard # noqa: F401
+            elif name == "snappy":
+                import snappy # noqa: F401
+        except ImportError:
+            print(f"WARNING: MongoDB compressor '{name}' requested but its library is not installed.")
+            continue
+        usable.append(name)
+    return usable
+
+def _env_int(name: str, default: int) -> int:
+    # Empty values (e.g. `MONGO_WAIT_QUEUE_TIMEOUT_MS=`) mean "use the default"
+    return int(os.getenv(name) or default)
+
+class PoolMetrics(ConnectionPoolListener):
+    """
+    Connection pool counters from pymongo's CMAP events, for /api/metrics.
+    Checkout wait time is how long an operation queued for a free connection.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pools = 0
+        self.open = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        self.pools = max(0, self.pools - 1)
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open = max(0, self.open - 1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures[str(event.reason)] = self.checkout_failures.get(str(event.reason), 0) + 1
+
+    def connection_checked_out(self, event):
+        self.checkouts += 1
+        self.checked_out += 1
+        self.max_checked_out = max(self.max_checked_out, self.checked_out)
+        wait_ms = getattr(event, "duration", 0.0) * 1000
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def connection_checked_in(self, event):
+        self.checked_out = max(0, self.checked_out - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pools": self.pools,
+            "open_connections": self.open,
+            "checked_out": self.checked_out,
+            "max_checked_out": self.max_checked_out,
+            "checkouts": self.checkouts,
+            "checkout_failures": dict(self.checkout_failures),
+            "avg_wait_ms": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.wait_ms_max, 3),
+            "pool_clears": self.pool_clears,
+        }
+
 class Database:
     client: AsyncIOMotorClient = None
     db = None
 
-    async def connect(self):
+    def __init__(self):
+        self.pool_metrics = PoolMetrics()
+        self.options: Dict[str, Any] = {}
+        self.secondary_reads = False
+
+    def client_options(self) -> Dict[str, Any]:
+        """
+        Pool, timeout and compression settings from the environment
+        (read at connect time so scripts can override them).
+        """
+        options = {
+            "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+            "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 100),
+            "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 0),
+            "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", 0) or None,
+            "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 0) or None,
+            "maxConnecting": _env_int("MONGO_MAX_CONNECTING", 2),
+        }
+        compressors = available_compressors(os.getenv("MONGO_COMPRESSORS", ""))
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+        return {k: v for k, v in options.items() if v is not None}
+
+    async def connect(self, init_indexes: bool = True):
         try:
-            self.client = AsyncIOMotorClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+            self.options = self.client_options()
+            self.secondary_reads = os.getenv("MONGO_SECONDARY_READS", "false").lower() == "true"
+            self.client = AsyncIOMotorClient(MONGO_URI, event_listeners=[self.pool_metrics], **self.options)
             # Trigger a connection check
             await self.client.admin.command('ping')
             self.db = self.client[DB_NAME]
-            print(f"Connected to MongoDB: {DB_NAME}")
-            await self.init_indexes()
+            print(f"Connected to MongoDB: {DB_NAME} (pool {self.options['minPoolSize']}-{self.options['maxPoolSize']}"
+                  f"{', compressors ' + self.options['compressors'] if 'compressors' in self.options else ''}"
+                  f"{', secondary-preferred reads' if self.secondary_reads else ''})")
+            if init_indexes:
+                await self.init_indexes()
         except Exception as e:
             print(f"WARNING: Could not connect to MongoDB. Running in 'No-Persistence' mode. Error: {e}")
             self.client = None
             self.db = None
 
+    def reader(self, name: str):
+        """
+        Collection handle for read-only queries. Read-heavy collections are routed
+        to secondaries (falling back to the primary) when MONGO_SECONDARY_READS=true.
+        Writes and read-modify-write paths should keep using `db.db[name]`.
+        """
+        collection = self.db[name]
+        if self.secondary_reads and name in SECONDARY_READ_COLLECTIONS:
+            return collection.with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
+        return collection
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {
+            **self.pool_metrics.stats(),
+            "max_pool_size": self.options.get("maxPoolSize"),
+            "wait_queue_timeout_ms": self.options.get("waitQueueTimeoutMS"),
+            "compressors": self.options.get("compressors", ""),
+            "secondary_reads": self.secondary_reads,
+        }
+
     async def close(self):
         if self.client:
             self.client.close()
 
     async def init_indexes(self):
-        # Create indexes for efficient querying
-        await self.db.movies.create_indexes([
-            IndexModel([("title", TEXT)], name="title_text_index"),
-            IndexModel([("release_date", ASCENDING)], name="release_date_index")
-        ])
-        await self.db.people.create_indexes([
-            IndexModel([("name", TEXT)], name="name_text_index")
-        ])
-        await self.db.facts.create_indexes([
-            IndexModel([("related_entities", ASCENDING)], name="related_entities_index"),
-            IndexModel([("content", TEXT)], name="content_text_index")
-        ])
+        # Indexes are declared from the agents' query shapes in index_manager
+        from backend.app.index_manager import index_manager
+        await index_manager.reconcile()
 
 db = Database()
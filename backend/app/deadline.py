@@ -0,0 +1,206 @@
+import os
+import time
+import asyncio
+import itertools
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, NamedTuple, Optional, Set
+from backend.app.rate_limiter import UpstreamLimited
+
+CHAT_DEADLINE_MS = int(os.getenv("CHAT_DEADLINE_MS", "2500"))
+STRAGGLER_GRACE_MS = int(os.getenv("STRAGGLER_GRACE_MS", "15000"))
+MAX_STRAGGLERS = int(os.getenv("MAX_STRAGGLERS", "32"))
+DISCONNECT_POLL_MS = int(os.getenv("DISCONNECT_POLL_MS", "200"))
+# On disconnect, a source that has run this fraction of its usual latency is left to finish (and fill the cache)
+NEARLY_DONE_FRACTION = float(os.getenv("NEARLY_DONE_FRACTION", "0.7"))
+
+class Deadline:
+    """
+    Request-level time budget handed down to agents.
+    The response is due after `budget_ms`; upstream calls may run `grace_ms`
+    longer so a late result can still land in the cache for the next request.
+    """
+    def __init__(self, budget_ms: Optional[int] = None, grace_ms: Optional[int] = None):
+        self.budget_ms = CHAT_DEADLINE_MS if budget_ms is None else budget_ms
+        self.grace_ms = STRAGGLER_GRACE_MS if grace_ms is None else grace_ms
+        self.started = time.monotonic()
+        self.expires_at = self.started + self.budget_ms / 1000
+
+    def remaining(self) -> float:
+        """
+        Seconds left until the response is due (never negative).
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def upstream_timeout(self, cap: Optional[float] = None) -> float:
+        """
+        Timeout (seconds) for an upstream HTTP call: the remaining budget plus the grace period.
+        """
+        timeout = self.remaining() + self.grace_ms / 1000
+        return min(timeout, cap) if cap else timeout
+
+class SourceResult(NamedTuple):
+    name: str
+    status: str # "ok" | "error" | "timeout" | "cancelled" (client gone) | "limited" (upstream bulkhead full)
+    value: Any
+    ms: float
+
+# Stragglers detached from their request; referenced here so they are not garbage collected
+_stragglers: Set[asyncio.Task] = set()
+# Usual latency per source (EWMA of successful calls, ms)
+_latency_ms: Dict[str, float] = {}
+stats = {"abandoned": 0, "cancelled": 0, "detached": 0, "over_budget": 0, "wasted_upstream_calls": 0,
+         "threads_left_running": 0}
+
+async def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Runs a blocking client call in a worker thread. Cancelling the awaiting task
+    cannot stop the thread: the call runs to completion and holds a default
+    executor thread meanwhile. Such calls are counted in threads_left_running.
+    Prefer async clients (aiohttp) for upstreams that can be cancelled.
+    """
+    started = []
+    def call():
+        started.append(True)
+        return func(*args)
+    try:
+        return await asyncio.to_thread(call)
+    except asyncio.CancelledError:
+        # Already running in a thread: cancelling cannot stop it (one still queued never starts)
+        if started:
+            stats["threads_left_running"] += 1
+        raise
+
+def detach(task: asyncio.Task, name: str) -> bool:
+    """
+    Lets a task finish in the background. Returns False (task untouched) when
+    MAX_STRAGGLERS are already running.
+    """
+    if len(_stragglers) >= MAX_STRAGGLERS:
+        stats["over_budget"] += 1
+        return False
+    def _done(t: asyncio.Task):
+        _stragglers.discard(t)
+        if t.cancelled() or t.exception() is not None:
+            stats["wasted_upstream_calls"] += 1
+        if not t.cancelled() and t.exception() is not None:
+            print(f"⚠️ Straggler '{name}' failed: {t.exception()}")
+    _stragglers.add(task)
+    task.add_done_callback(_done)
+    stats["detached"] += 1
+    return True
+
+def _cancel(task: asyncio.Task):
+    task.cancel()
+    stats["cancelled"] += 1
+    stats["wasted_upstream_calls"] += 1
+
+def _record_latency(name: str, ms: float, alpha: float = 0.2):
+    previous = _latency_ms.get(name)
+    _latency_ms[name] = ms if previous is None else previous + alpha * (ms - previous)
+
+def _release(task: asyncio.Task, name: str, elapsed_ms: float):
+    """
+    Disposes of a source whose requester is gone: detached when nearly done
+    (its result is worth caching), cancelled otherwise.
+    """
+    usual = _latency_ms.get(name)
+    nearly_done = usual is not None and elapsed_ms >= NEARLY_DONE_FRACTION * usual
+    if not (nearly_done and detach(task, name)):
+        _cancel(task)
+
+def straggler_count() -> int:
+    return len(_stragglers)
+
+def fan_out_stats() -> Dict[str, Any]:
+    return {**stats, "stragglers": straggler_count(), "latency_ms": {k: round(v, 1) for k, v in _latency_ms.items()}}
+
+async def fan_out(coros: Dict[str, Awaitable], deadline: Deadline,
+                  abandoned: Optional[Callable[[], Awaitable[bool]]] = None) -> AsyncIterator[SourceResult]:
+    """
+    Runs the named coroutines concurrently and yields each result as it completes.
+    Sources refused by their upstream's bulkhead are reported as "limited".
+    When the deadline expires, the sources still running are reported as
+    "timeout" and keep running detached (their agents cache what they fetch).
+    `abandoned` is polled while waiting; once it returns True (client gone),
+    the remaining sources are reported as "cancelled" and released. Closing the
+    generator early releases them too, so no task outlives its request unaccounted.
+    Cancelling only stops async I/O: a source blocked in run_blocking (the
+    wikipedia client) finishes its thread anyway, see threads_left_running.
+    """
+    tasks = {asyncio.ensure_future(coro): name for name, coro in coros.items()}
+    pending = set(tasks)
+    try:
+        while pending:
+            timeout = deadline.remaining()
+            if abandoned is not None:
+                timeout = min(timeout, DISCONNECT_POLL_MS / 1000)
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                ms = round(deadline.elapsed_ms(), 1)
+                if isinstance(task.exception(), UpstreamLimited):
+                    yield SourceResult(tasks[task], "limited", task.exception(), ms)
+                elif task.exception() is not None:
+                    yield SourceResult(tasks[task], "error", task.exception(), ms)
+                else:
+                    _record_latency(tasks[task], ms)
+                    yield SourceResult(tasks[task], "ok", task.result(), ms)
+
+            if pending and deadline.expired:
+                break
+            if pending and abandoned is not None and await abandoned():
+                stats["abandoned"] += 1
+                for task in list(pending):
+                    pending.discard(task)
+                    _release(task, tasks[task], deadline.elapsed_ms())
+                    yield SourceResult(tasks[task], "cancelled", None, round(deadline.elapsed_ms(), 1))
+                return
+
+        for task in list(pending):
+            pending.discard(task)
+            if not detach(task, tasks[task]):
+                _cancel(task)
+            yield SourceResult(tasks[task], "timeout", None, round(deadline.elapsed_ms(), 1))
+    finally:
+        # Generator closed early (e.g. the streaming response was cancelled on disconnect)
+        for task in pending:
+            _release(task, tasks[task], deadline.elapsed_ms())
+
+class ChatSupervisor:
+    """
+    Tracks the in-flight chat of each user. A chat is abandoned once its
+    client disconnects or the same user sends a newer query.
+    """
+    def __init__(self):
+        self._latest: Dict[str, int] = {}
+        self._ids = itertools.count()
+
+    @contextmanager
+    def track(self, user_id: str, http_request=None) -> Iterator[Callable[[], Awaitable[bool]]]:
+        """
+        Registers a chat for the duration of the block and yields its `abandoned` check for fan_out.
+        """
+        chat_id = next(self._ids)
+        self._latest[user_id] = chat_id
+
+        async def abandoned() -> bool:
+            if self._latest.get(user_id) != chat_id:
+                return True
+            return http_request is not None and await http_request.is_disconnected()
+        try:
+            yield abandoned
+        finally:
+            if self._latest.get(user_id) == chat_id:
+                del self._latest[user_id]
+
+    def active(self) -> int:
+        return len(self._latest)
+
+# Global instance
+supervisor = ChatSupervisor()
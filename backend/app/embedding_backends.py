@@ -0,0 +1,158 @@
+import os
+import asyncio
+import numpy as np
+from typing import List, Optional, Sequence
+
+class EmbeddingBackend:
+    """
+    Interface for anything that turns a batch of texts into vectors.
+    `model` doubles as the embedding-cache namespace, so vectors from
+    different backends never mix.
+    """
+    model: str = "base"
+    dimensions: int = 768
+    cacheable: bool = True # Local backends are cheaper to recompute than to look up
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        raise NotImplementedError
+
+class FireworksEmbeddingBackend(EmbeddingBackend):
+    """
+    Remote backend: Fireworks AI embeddings REST API.
+    """
+    model = "nomic-ai/nomic-embed-text-v1.5"
+    url = "https://api.fireworks.ai/inference/v1/embeddings"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        try:
+             # Direct REST API call to avoid client version issues
+            import requests
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+            payload = {
+                "model": self.model,
+                "input": texts
+            }
+
+            # Run the blocking HTTP call off the event loop
+            response = await asyncio.to_thread(requests.post, self.url, headers=headers, json=payload)
+            if response.status_code == 200:
+                data = sorted(response.json()["data"], key=lambda item: item.get("index", 0))
+                return [item["embedding"] for item in data]
+            else:
+                print(f"❌ Vector API Error: {response.text}")
+                return [None] * len(texts)
+
+        except Exception as e:
+            print(f"❌ Vector Generation Failed: {e}")
+            return [None] * len(texts)
+
+# Multipliers for the rolling n-gram hash (odd 64-bit constants)
+_HASH_PRIME = np.uint64(0x100000001B3)
+_SIGN_SALT = np.uint64(0x9E3779B97F4A7C15)
+
+def hashed_ngram_counts(texts: Sequence[str], n_features: int, ngram_range=(3, 5)) -> np.ndarray:
+    """
+    Signed feature hashing of character n-grams, vectorized over the whole batch.
+    All texts are lowercased, padded with spaces and concatenated into one byte
+    array; each n-gram hash is a polynomial over a sliding window, and windows
+    that straddle two texts are masked out. Returns a (len(texts), n_features)
+    float32 count matrix. Deterministic across processes (no Python hash()).
+    """
+    counts = np.zeros((len(texts), n_features), dtype=np.float32)
+    if not texts:
+        return counts
+
+    encoded = [f" {t.lower()} ".encode("utf-8") for t in texts]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    doc_of_byte = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        if len(data) < n:
+            continue
+        windows = np.lib.stride_tricks.sliding_window_view(data, n)
+        valid = doc_of_byte[:len(windows)] == doc_of_byte[n - 1:]
+        if not valid.any():
+            continue
+
+        h = np.full(len(windows), np.uint64(n), dtype=np.uint64)
+        for k in range(n):
+            h = h * _HASH_PRIME + windows[:, k]
+        h = h[valid]
+        docs = doc_of_byte[:len(windows)][valid]
+
+        buckets = (h % np.uint64(n_features)).astype(np.int64)
+        signs = np.where(((h * _SIGN_SALT) >> np.uint64(63)) == 0, 1.0, -1.0).astype(np.float32)
+        flat = np.bincount(docs * n_features + buckets, weights=signs, minlength=counts.size)
+        counts += flat.reshape(counts.shape).astype(np.float32)
+
+    return counts
+
+class LocalHashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Offline CPU backend: hashed character n-gram TF(-IDF) features followed by a
+    fixed Gaussian random projection to `dimensions`, L2-normalized.
+    Cosine similarity between outputs approximates n-gram overlap, which is
+    good enough for quote/scene lookup without any network access.
+    """
+    cacheable = False
+
+    def __init__(self, dimensions: int = 768, n_features: int = 4096, seed: int = 1337):
+        self.dimensions = dimensions
+        self.n_features = n_features
+        self.model = f"local-hash-ngram-{n_features}x{dimensions}-s{seed}"
+        rng = np.random.default_rng(seed)
+        self.projection = (rng.standard_normal((n_features, dimensions)) / np.sqrt(dimensions)).astype(np.float32)
+        self.idf = np.ones(n_features, dtype=np.float32)
+
+    def fit_idf(self, corpus: Sequence[str]):
+        """
+        Optional: learn IDF weights per hash bucket from a representative corpus.
+        Changes the vectors, so the cache namespace changes with it.
+        """
+        present = (hashed_ngram_counts(corpus, self.n_features) != 0).sum(axis=0)
+        self.idf = (np.log((1 + len(corpus)) / (1 + present)) + 1).astype(np.float32)
+        self.model = f"{self.model}-idf{len(corpus)}"
+
+    def embed_array(self, texts: Sequence[str]) -> np.ndarray:
+        counts = hashed_ngram_counts(texts, self.n_features)
+        # Only project the hash buckets this batch actually touches
+        active = np.flatnonzero(counts.any(axis=0))
+        tf = np.sign(counts[:, active]) * np.log1p(np.abs(counts[:, active]))
+        vectors = (tf * self.idf[active]) @ self.projection[active]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        return self.embed_array(texts).tolist()
+
+_backends = {}
+
+def get_embedding_backend(name: str = None) -> EmbeddingBackend:
+    """
+    Selects the backend for this deployment via EMBEDDING_BACKEND:
+    'fireworks', 'local', or 'auto' (default: Fireworks when a key exists).
+    Instances are shared per process so the projection matrix is built once.
+    """
+    name = (name or os.getenv("EMBEDDING_BACKEND", "auto")).lower()
+    api_key = os.getenv("FIREWORKS_API_KEY")
+
+    if name == "fireworks" or (name == "auto" and api_key):
+        if api_key:
+            if "fireworks" not in _backends:
+                _backends["fireworks"] = FireworksEmbeddingBackend(api_key)
+            return _backends["fireworks"]
+        print("⚠️ EmbeddingBackend: 'fireworks' selected but no FIREWORKS_API_KEY. Falling back to local.")
+    elif name not in ("local", "auto"):
+        print(f"⚠️ EmbeddingBackend: Unknown backend '{name}'. Using local.")
+
+    if "local" not in _backends:
+        _backends["local"] = LocalHashingEmbeddingBackend(dimensions=int(os.getenv("EMBEDDING_DIMENSIONS", "768")))
+    return _backends["local"]
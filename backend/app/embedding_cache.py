@@ -0,0 +1,97 @@
+import os
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from backend.app.database import db
+
+class EmbeddingCache:
+    """
+    Content-addressed cache for text embeddings.
+    Entries are keyed by (model, sha256 of normalized text), so repeated lines
+    ("No!", "What?") and re-ingested films never hit the embedding API twice.
+    Tier 1 is an in-process LRU, tier 2 is the 'embedding_cache' collection.
+    """
+    def __init__(self, max_entries: int = None, collection_name: str = "embedding_cache"):
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_SIZE", "50000"))
+        self.collection_name = collection_name
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Canonical form used for hashing: NFC unicode and collapsed whitespace.
+        """
+        return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+    def make_key(self, model: str, text: str) -> str:
+        digest = hashlib.sha256(self.normalize(text).encode("utf-8")).hexdigest()
+        return f"{model}:{digest}"
+
+    def _remember(self, key: str, vector: List[float]):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Looks up several texts at once. Returns {key: vector} for the hits only;
+        the memory tier is checked first and a single $in query covers the rest.
+        """
+        found = {}
+        missing = {}
+        for text in texts:
+            key = self.make_key(model, text)
+            if key in found or key in missing:
+                continue
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                found[key] = vector
+            else:
+                missing[key] = True
+
+        if missing and db.db is not None:
+            cursor = db.db[self.collection_name].find({"_id": {"$in": list(missing)}}, {"embedding": 1})
+            async for doc in cursor:
+                self._remember(doc["_id"], doc["embedding"])
+                found[doc["_id"]] = doc["embedding"]
+                self.stats["db_hits"] += 1
+
+        self.stats["misses"] += len([k for k in missing if k not in found])
+        return found
+
+    async def get(self, model: str, text: str) -> Optional[List[float]]:
+        hits = await self.get_many(model, [text])
+        return hits.get(self.make_key(model, text))
+
+    async def set_many(self, model: str, items: Dict[str, List[float]]):
+        """
+        Stores {text: vector} pairs in both tiers.
+        """
+        if not items:
+            return
+        from pymongo import UpdateOne
+
+        ops = []
+        for text, vector in items.items():
+            key = self.make_key(model, text)
+            self._remember(key, vector)
+            ops.append(UpdateOne(
+                {"_id": key},
+                {"$set": {"model": model, "embedding": vector, "timestamp": datetime.utcnow()}},
+                upsert=True
+            ))
+
+        if db.db is not None:
+            await db.db[self.collection_name].bulk_write(ops, ordered=False)
+
+    async def set(self, model: str, text: str, vector: List[float]):
+        await self.set_many(model, {text: vector})
+
+# Global instance
+embedding_cache = EmbeddingCache()
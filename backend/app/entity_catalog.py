@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional
+
+# Entities the live view knows about, in match priority order.
+# `match` is the (case-sensitive) text that triggers the entity in a subtitle line;
+# `context_type` picks the UI: a standard card ("ingestion") or a knowledge graph ("mindmap").
+ENTITIES: List[Dict[str, Any]] = [
+    {
+        "name": "Neo",
+        "match": "Neo",
+        "context_type": "ingestion", # Standard Card, but we'll try to find an image
+        "summary": "Thomas A. Anderson, also known as Neo, is the protagonist.",
+        "image_url": "https://images.fanart.tv/fanart/the-matrix-523ce51b89944.jpg"
+    },
+    {
+        "name": "Thanos",
+        "match": "Thanos",
+        "context_type": "mindmap",
+        "summary": "The Mad Titan.",
+        "relations": [
+            {"relation": "Wields", "label": "Infinity Gauntlet"},
+            {"relation": "Seeks", "label": "Balance"},
+            {"relation": "Enemy of", "label": "Avengers"},
+            {"relation": "Daughter", "label": "Gamora"}
+        ]
+    },
+    {
+        "name": "Thor",
+        "match": "Thor",
+        "context_type": "ingestion",
+        "summary": "God of Thunder.",
+        "image_url": "https://images.fanart.tv/fanart/avengers-infinity-war-5ac5e1657803e.jpg"
+    },
+    {
+        "name": "The Matrix",
+        "match": "Matrix",
+        "context_type": "ingestion",
+        "summary": "A simulated reality created by sentient machines to subdue the human population.",
+        "image_url": "https://images.fanart.tv/fanart/the-matrix-5979c6d66e762.jpg"
+    },
+    {
+        "name": "Blue Pill",
+        "match": "blue pill",
+        "context_type": "ingestion",
+        "summary": "Choosing the Blue Pill means returning to the simulated reality of the Matrix."
+    },
+    {
+        "name": "Red Pill",
+        "match": "red pill",
+        "context_type": "ingestion",
+        "summary": "Choosing the Red Pill reveals the truth about the Matrix."
+    },
+    {
+        # SHOWCASE: MINDMAP GENERATION
+        "name": "Morpheus",
+        "match": "Morpheus",
+        "context_type": "mindmap",
+        "summary": "Captain of the Nebuchadnezzar.",
+        "relations": [
+            {"relation": "Captain of", "label": "Nebuchadnezzar"},
+            {"relation": "Mentor to", "label": "Neo"},
+            {"relation": "Enemy of", "label": "Agents"},
+            {"relation": "Believes in", "label": "The One"}
+        ]
+    },
+]
+
+def entities_in(text: str) -> List[Dict[str, Any]]:
+    """
+    All catalog entities mentioned in a subtitle line, in priority order.
+    """
+    return [entity for entity in ENTITIES if entity["match"] in text]
+
+def detect_entity(text: str) -> Optional[Dict[str, Any]]:
+    """
+    The entity a subtitle line is about (naive keyword extraction for the demo).
+    """
+    found = entities_in(text)
+    return found[0] if found else None
@@ -0,0 +1,51 @@
+import re
+import hashlib
+from typing import Optional, Union
+from backend.app.title_resolver import strip_query
+
+# Deterministic ids for knowledge-graph entities.
+# The same source record always maps to the same _id, so re-ingesting is an
+# idempotent update instead of a new document.
+
+def normalize_name(name: str) -> str:
+    return re.sub(r"\s+", " ", (name or "").strip().lower())
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def movie_id_for(tmdb_id: Union[str, int, None] = None,
+                 wikipedia_pageid: Union[str, int, None] = None,
+                 name: Optional[str] = None) -> str:
+    """
+    Canonical movie id, from the strongest identifier available:
+    TMDB id > Wikipedia page id > normalized name.
+    """
+    if tmdb_id:
+        return f"movie_tmdb_{tmdb_id}"
+    if wikipedia_pageid:
+        return f"movie_wiki_{wikipedia_pageid}"
+    if name:
+        return f"movie_{_digest(normalize_name(name))}"
+    raise ValueError("movie_id_for needs a tmdb_id, wikipedia_pageid or name")
+
+def movie_id_for_query(query: str, tmdb_id: Union[str, int, None] = None) -> str:
+    """
+    Movie id the agents of one chat fan-out agree on, from the chat query alone:
+    the TMDB id when the title resolves, else the query without its chat
+    phrasing ("load Primer" and "Primer" -> the same id).
+    """
+    if tmdb_id:
+        return f"movie_tmdb_{tmdb_id}"
+    key = strip_query(query or "")
+    if not key:
+        raise ValueError("movie_id_for_query needs a query with a title in it")
+    return f"movie_q_{_digest(key)}"
+
+def fact_id_for(entity_id: str, source: str, kind: str) -> str:
+    """
+    One fact per (entity, source, kind), e.g. the Wikipedia summary of a movie.
+    """
+    return f"fact_{_digest(entity_id, source.lower(), kind)}"
+
+def is_canonical_movie_id(movie_id: str) -> bool:
+    return movie_id.startswith(("movie_tmdb_", "movie_wiki_", "movie_q_"))
@@ -1,4 +1,18 @@
 import re
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+class CueSpan(NamedTuple):
+    """
+    Where a cue's cleaned text lives inside a cleaned track transcript.
+    """
+    cue_position: int  # Position of the cue in the input sequence
+    index: Optional[int]  # SRT cue number, when known
+    start: float  # Cue start (seconds)
+    end: float  # Cue end (seconds)
+    char_start: int
+    char_end: int
 
 class DataCleanerAgent:
     """
@@ -9,18 +23,80 @@ class DataCleanerAgent:
         self.html_cleaner = re.compile('<.*?>')
         # Regex for bracketed sound effects like [Explosion], (Music plays)
         self.bracket_cleaner = re.compile('\[.*?\]|\(.*?\)')
+        # Both of the above in one pass, never crossing a line break (used for batches)
+        self.noise_cleaner = re.compile(r'<[^>\n]*>|\[[^\]\n]*\]|\([^)\n]*\)')
+        self.space_cleaner = re.compile(r'[^\S\n]+')
 
     def clean_text(self, text: str) -> str:
         if not text:
             return ""
-            
+
         # 1. Remove HTML tags
         clean = re.sub(self.html_cleaner, '', text)
-        
+
         # 2. Remove Sound Effects (optional, but good for pure dialogue search)
         clean = re.sub(self.bracket_cleaner, '', clean)
-        
+
         # 3. Normalize whitespace
         clean = " ".join(clean.split())
-        
+
         return clean
+
+    def clean_batch(self, texts: Sequence[str]) -> List[str]:
+        """
+        Cleans many texts with one regex pass over a newline-joined buffer.
+        Line breaks inside a text are treated as spaces (as ingestion already does),
+        so markup never spans two texts. Output is aligned with the input.
+        """
+        if not texts:
+            return []
+        buffer = "\n".join((t or "").replace("\r", " ").replace("\n", " ") for t in texts)
+        buffer = self.noise_cleaner.sub("", buffer)
+        buffer = self.space_cleaner.sub(" ", buffer)
+        return [line.strip() for line in buffer.split("\n")]
+
+    def clean_track(self, cues: Iterable[Any]) -> Tuple[str, List[CueSpan]]:
+        """
+        Cleans a whole track (pysrt items or {"text", "start", "end", "index"} dicts)
+        into one transcript, returning the spans that map text back to cues.
+        Cues that clean to nothing are dropped from the transcript.
+        """
+        cues = list(cues)
+        if not cues:
+            return "", []
+        if isinstance(cues[0], dict):
+            fields = [(c["text"], c.get("index"), c["start"], c["end"]) for c in cues]
+        else:
+            fields = [(c.text, c.index, c.start.ordinal / 1000.0, c.end.ordinal / 1000.0) for c in cues]
+
+        cleaned = self.clean_batch([f[0] for f in fields])
+        parts = []
+        spans = []
+        offset = 0
+        for position, (text, (_, index, start, end)) in enumerate(zip(cleaned, fields)):
+            if not text:
+                continue
+            if parts:
+                offset += 1 # joining space
+            spans.append(CueSpan(position, index, start, end, offset, offset + len(text)))
+            parts.append(text)
+            offset += len(text)
+        return " ".join(parts), spans
+
+    def clean_corpus(self, paths: Sequence[str], workers: int = None) -> List[Tuple[str, str, List[CueSpan]]]:
+        """
+        Cleans many SRT files. workers=1 runs in-process; otherwise files are
+        fanned out over a process pool (default: one worker per CPU).
+        Returns (path, transcript, spans) per file, in input order.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(paths) < 2:
+            return [_clean_srt_file(p) for p in paths]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_clean_srt_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+def _clean_srt_file(path: str) -> Tuple[str, str, List[CueSpan]]:
+    # Module-level so it can be pickled into worker processes
+    import pysrt
+    transcript, spans = DataCleanerAgent().clean_track(pysrt.open(path, error_handling=pysrt.ERROR_LOG))
+    return path, transcript, spans
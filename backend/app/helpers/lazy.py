@@ -0,0 +1,27 @@
+import threading
+from typing import Any, Callable
+
+class Lazy:
+    """
+    Defers constructing an object (and the heavy imports behind it) until the
+    first attribute access, so module import stays cheap at startup.
+    """
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def instance(self) -> Any:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.instance, name)
@@ -0,0 +1,259 @@
+import os
+import io
+import asyncio
+import hashlib
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+PUBLIC_API_BASE = os.getenv("PUBLIC_API_BASE", "http://localhost:8000")
+IMAGE_PROXY_ALLOWED_HOSTS = os.getenv("IMAGE_PROXY_ALLOWED_HOSTS", "images.fanart.tv,assets.fanart.tv,upload.wikimedia.org")
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "backend/data/image_cache")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "256")) * 1024 * 1024
+IMAGE_PROXY_TIMEOUT_SECONDS = float(os.getenv("IMAGE_PROXY_TIMEOUT_SECONDS", "10"))
+IMAGE_MAX_SOURCE_BYTES = 20 * 1024 * 1024
+IMAGE_MAX_REDIRECTS = 3
+# Card images render 12rem high in a max-w-md card; 640 px covers that on high-DPI screens
+IMAGE_WIDTHS = (320, 640, 1280)
+DEFAULT_IMAGE_WIDTH = 640
+
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "orig": "application/octet-stream"}
+
+class ImageProxyError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def _pillow():
+    try:
+        from PIL import Image
+        return Image
+    except ImportError:
+        return None
+
+class ImageProxy:
+    """
+    Fetches remote card images once and serves resized variants from a
+    size-bounded disk cache (least recently used files are evicted first).
+    Variants are immutable: the cache key (url, width, format) doubles as a strong ETag.
+    Without Pillow installed, the original bytes are cached and served as-is.
+    """
+    def __init__(self, cache_dir: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+                 allowed_hosts: str = IMAGE_PROXY_ALLOWED_HOSTS, public_base: str = PUBLIC_API_BASE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.allowed_hosts = {h.strip().lower() for h in allowed_hosts.split(",") if h.strip()}
+        self.public_base = public_base.rstrip("/")
+        self._client = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._cache_bytes: Optional[int] = None # Scanned from disk on first use
+        self.stats = {"hits": 0, "misses": 0, "upstream_fetches": 0, "upstream_bytes": 0, "served_bytes": 0, "evictions": 0}
+
+    def allowed(self, url: str) -> bool:
+        parsed = urlparse(url or "")
+        return parsed.scheme in ("http", "https") and (parsed.hostname or "").lower() in self.allowed_hosts
+
+    def proxy_url(self, url: str, width: int = DEFAULT_IMAGE_WIDTH) -> str:
+        """
+        URL of the resized variant behind /api/image; other hosts are left untouched.
+        """
+        if not self.allowed(url):
+            return url
+        return f"{self.public_base}/api/image?{urlencode({'url': url, 'w': width})}"
+
+    @staticmethod
+    def pick_format(accept: str = "") -> str:
+        return "webp" if "image/webp" in (accept or "") else "jpeg"
+
+    @staticmethod
+    def _key(url: str, width: int, fmt: str) -> str:
+        return hashlib.sha1(f"{url}|{width}|{fmt}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{fmt}")
+
+    # --- Disk cache ---
+
+    def _scan(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files if not f.endswith(".tmp"))
+        return total
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path) # mtime tracks recency for eviction
+            return data
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path) # Readers never see a partial file
+        if self._cache_bytes is None:
+            self._cache_bytes = self._scan()
+        else:
+            self._cache_bytes += len(data)
+        if self._cache_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # Oldest (least recently served) first, down to 90% of the bound
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue # Being written by another thread; it is renamed into place when complete
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass # Evicted concurrently
+            total -= size
+            self.stats["evictions"] += 1
+        self._cache_bytes = total
+
+    # --- Fetch + resize ---
+
+    async def _download(self, url: str) -> bytes:
+        if self._client is None:
+            import httpx
+            # Redirects are followed by hand, so every hop is checked against the allow-list before it is requested
+            self._client = httpx.AsyncClient(timeout=IMAGE_PROXY_TIMEOUT_SECONDS, follow_redirects=False,
+                                             headers={"User-Agent": "MovieFanDashboard v1.0"})
+        try:
+            for _ in range(IMAGE_MAX_REDIRECTS + 1):
+                if not self.allowed(url):
+                    raise ImageProxyError(502, "Upstream redirected to a host that is not allowed")
+                async with self._client.stream("GET", url) as resp:
+                    if resp.is_redirect:
+                        url = str(resp.url.join(resp.headers["location"]))
+                        continue
+                    if resp.status_code != 200:
+                        raise ImageProxyError(502, f"Upstream returned {resp.status_code}")
+                    if not resp.headers.get("content-type", "").startswith("image/"):
+                        raise ImageProxyError(502, "Upstream did not return a usable image")
+                    # Stop reading as soon as the body is over the limit, instead of buffering all of it
+                    body = bytearray()
+                    async for chunk in resp.aiter_bytes():
+                        body += chunk
+                        if len(body) > IMAGE_MAX_SOURCE_BYTES:
+                            raise ImageProxyError(502, "Upstream image is too large")
+                    break
+            else:
+                raise ImageProxyError(502, "Upstream redirected too many times")
+        except ImageProxyError:
+            raise
+        except Exception as e:
+            raise ImageProxyError(502, f"Upstream fetch failed: {e}")
+        self.stats["upstream_fetches"] += 1
+        self.stats["upstream_bytes"] += len(body)
+        return bytes(body)
+
+    @staticmethod
+    def _resize(original: bytes, width: int, fmt: str) -> bytes:
+        Image = _pillow()
+        with Image.open(io.BytesIO(original)) as image:
+            image = image.convert("RGB")
+            if image.width > width:
+                image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            out = io.BytesIO()
+            if fmt == "webp":
+                image.save(out, "WEBP", quality=80, method=4)
+            else:
+                image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+            return out.getvalue()
+
+    async def _original(self, url: str) -> bytes:
+        # The source is fetched once; every variant is derived from the cached original
+        key = self._key(url, 0, "orig")
+        path = self._path(key, "orig")
+        data = await asyncio.to_thread(self._read, path)
+        if data is None:
+            data = await self._download(url)
+            await asyncio.to_thread(self._write, path, data)
+        return data
+
+    async def _build(self, url: str, width: int, fmt: str, path: str) -> bytes:
+        original = await self._original(url)
+        if _pillow() is None:
+            return original
+        try:
+            data = await asyncio.to_thread(self._resize, original, width, fmt)
+        except Exception as e:
+            raise ImageProxyError(502, f"Could not decode image: {e}")
+        await asyncio.to_thread(self._write, path, data)
+        return data
+
+    def variant(self, url: str, width: int, fmt: str) -> Tuple[int, str, str]:
+        """
+        Normalizes a request to a cached variant: (width, format, etag).
+        """
+        if not self.allowed(url):
+            raise ImageProxyError(400, "Image host not allowed")
+        if width not in IMAGE_WIDTHS:
+            width = min(IMAGE_WIDTHS, key=lambda w: abs(w - width))
+        if _pillow() is None:
+            fmt = "orig"
+        return width, fmt, f'"{self._key(url, width, fmt)}"'
+
+    async def get(self, url: str, width: int = DEFAULT_IMAGE_WIDTH, fmt: str = "jpeg") -> Tuple[bytes, str, str]:
+        """
+        Returns (body, content type, etag) for a variant, fetching and resizing it on first use.
+        """
+        width, fmt, etag = self.variant(url, width, fmt)
+        key = etag.strip('"')
+        path = self._path(key, fmt)
+
+        data = await asyncio.to_thread(self._read, path)
+        if data is not None:
+            self.stats["hits"] += 1
+        else:
+            # Single flight: concurrent requests for the same variant share one fetch
+            self.stats["misses"] += 1
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = asyncio.ensure_future(self._build(url, width, fmt, path))
+                future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            data = await asyncio.shield(future)
+
+        content_type = CONTENT_TYPES[fmt]
+        if fmt == "orig":
+            content_type = self._sniff(data)
+        self.stats["served_bytes"] += len(data)
+        return data, content_type, etag
+
+    @staticmethod
+    def _sniff(data: bytes) -> str:
+        if data.startswith(b"\x89PNG"):
+            return "image/png"
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            return "image/webp"
+        if data.startswith(b"GIF8"):
+            return "image/gif"
+        return "image/jpeg"
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def metrics(self) -> Dict[str, int]:
+        return {**self.stats, "cache_bytes": self._cache_bytes or 0, "resizing": _pillow() is not None}
+
+# Global instance
+image_proxy = ImageProxy()
@@ -0,0 +1,151 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple
+from pymongo import IndexModel, ASCENDING, TEXT
+from backend.app.database import db
+
+class QueryShape(NamedTuple):
+    """
+    A query the agents actually run, with a representative filter for explain().
+    """
+    collection: str
+    filter: Dict[str, Any]
+    used_by: str
+
+def cache_ttl_seconds() -> int:
+    return int(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+def required_indexes() -> Dict[str, List[IndexModel]]:
+    """
+    Indexes derived from the access patterns below. `_id` lookups need nothing extra.
+    """
+    return {
+        "movies": [
+            IndexModel([("title", TEXT)], name="title_text_index"),
+            IndexModel([("external_ids.tmdb", ASCENDING)], name="external_ids_tmdb_index", sparse=True),
+        ],
+        "people": [
+            IndexModel([("name", TEXT)], name="name_text_index"),
+        ],
+        "facts": [
+            IndexModel([("related_entities", ASCENDING)], name="related_entities_index"),
+            IndexModel([("content", TEXT)], name="content_text_index"),
+        ],
+        "subtitles": [
+            IndexModel([("query", ASCENDING)], name="query_index", sparse=True),
+            IndexModel([("movie", ASCENDING), ("start", ASCENDING)], name="movie_start_index", sparse=True),
+        ],
+        "api_cache": [
+            IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl_index", expireAfterSeconds=cache_ttl_seconds()),
+        ],
+        "app_state": [
+            IndexModel([("updated_at", ASCENDING)], name="updated_at_index"),
+            # Only keys written with a TTL (chat sessions) have expires_at; the others never expire
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl_index", expireAfterSeconds=0),
+        ],
+    }
+
+# Indexes earlier versions created that no query uses any more
+OBSOLETE_INDEXES = {
+    "movies": ["release_date_index", "title_1_release_date_1"],
+    "subtitles": ["movie_id_1_language_1"],
+}
+
+QUERY_SHAPES = [
+    QueryShape("movies", {"_id": "movie_wiki_30007"}, "WikipediaAgent / FanartAgent upserts"),
+    QueryShape("movies", {"external_ids.tmdb": "603"}, "movie lookup by TMDB id"),
+    QueryShape("movies", {"$text": {"$search": "matrix"}}, "title search"),
+    QueryShape("facts", {"_id": "fact_0000000000000000"}, "WikipediaAgent summary upsert"),
+    QueryShape("facts", {"related_entities": "movie_wiki_30007"}, "facts for a movie / compaction repointing"),
+    QueryShape("facts", {"$text": {"$search": "thanos"}}, "fact retrieval by keyword"),
+    QueryShape("subtitles", {"query": "The Matrix"}, "OpenSubtitlesAgent upsert"),
+    QueryShape("subtitles", {"movie": "The Matrix"}, "ingestion replace / vector index rebuild"),
+    QueryShape("subtitles", {"movie": "The Matrix", "_id": {"$nin": ["chunk_0"]}}, "ingestion stale-chunk delete"),
+    QueryShape("api_cache", {"_id": "wiki_search_the matrix"}, "CacheManager.get"),
+    QueryShape("embedding_cache", {"_id": {"$in": ["model:hash"]}}, "EmbeddingCache.get_many"),
+    QueryShape("app_state", {"updated_at": {"$gte": datetime(2024, 1, 1)}}, "SharedState polling for other workers' changes"),
+]
+
+def _index_signature(spec: Dict[str, Any]) -> Any:
+    key = spec["key"]
+    key = tuple(key.items()) if hasattr(key, "items") else tuple(key)
+    # Text indexes are reported with internal keys; compare by name only
+    if any(k in ("_fts", "_ftsx") or v == "text" for k, v in key):
+        key = "text"
+    return key, spec.get("sparse", False), spec.get("unique", False)
+
+class IndexManager:
+    """
+    Declares the indexes the agents' query shapes need and reconciles them
+    against the live database: creates missing ones, updates TTLs in place,
+    rebuilds ones whose definition changed and drops known-obsolete ones.
+    """
+    async def reconcile(self) -> Dict[str, List[str]]:
+        if db.db is None:
+            return {}
+        report = {"created": [], "updated": [], "dropped": []}
+
+        for collection, models in required_indexes().items():
+            coll = db.db[collection]
+            existing = {}
+            async for spec in coll.list_indexes():
+                existing[spec["name"]] = spec
+
+            missing = []
+            for model in models:
+                wanted = model.document
+                name = wanted["name"]
+                current = existing.get(name)
+                if current is None:
+                    missing.append(model)
+                elif "expireAfterSeconds" in wanted and current.get("expireAfterSeconds") != wanted["expireAfterSeconds"]:
+                    await db.db.command("collMod", collection, index={"name": name, "expireAfterSeconds": wanted["expireAfterSeconds"]})
+                    report["updated"].append(f"{collection}.{name}")
+                elif _index_signature(current) != _index_signature(wanted):
+                    await coll.drop_index(name)
+                    missing.append(model)
+                    report["updated"].append(f"{collection}.{name}")
+
+            if missing:
+                await coll.create_indexes(missing)
+                report["created"].extend(f"{collection}.{m.document['name']}" for m in missing)
+
+            for name in OBSOLETE_INDEXES.get(collection, []):
+                if name in existing:
+                    await coll.drop_index(name)
+                    report["dropped"].append(f"{collection}.{name}")
+
+        for action, names in report.items():
+            if names:
+                print(f"🗂️ IndexManager: {action} {', '.join(names)}")
+        return report
+
+    @staticmethod
+    def _stages(plan: Dict[str, Any]) -> List[str]:
+        stages = [plan.get("stage", "")]
+        for child_key in ("inputStage", "queryPlan"):
+            if isinstance(plan.get(child_key), dict):
+                stages += IndexManager._stages(plan[child_key])
+        for child in plan.get("inputStages", []):
+            stages += IndexManager._stages(child)
+        return stages
+
+    async def check(self) -> List[Dict[str, Any]]:
+        """
+        Runs explain() for every registered query shape and flags collection scans.
+        """
+        results = []
+        for shape in QUERY_SHAPES:
+            try:
+                explain = await db.db[shape.collection].find(shape.filter).explain()
+                winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+                stages = self._stages(winning)
+                status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+            except Exception as e:
+                stages, status = [], f"error: {e}"
+            results.append({"collection": shape.collection, "filter": shape.filter,
+                            "used_by": shape.used_by, "stages": stages, "status": status})
+        return results
+
+# Global instance
+index_manager = IndexManager()
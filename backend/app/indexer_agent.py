@@ -44,18 +44,16 @@ class MongoIndexerAgent:
         }
         print(f"ℹ️ [Atlas Requirement] Please create a SEARCH INDEX on '{collection_name}' with definition:")
         print(str(index_def))
+        print("ℹ️ Atlas Vector Search only indexes array embeddings: ingest with EMBEDDING_STORAGE=array if you rely on it.")
 
     async def ensure_performance_indexes(self):
         """
-        Creates compound indexes for speed.
+        Reconciles the indexes required by the agents' query shapes.
         """
         if db.db is None: return
 
-        # Movies: Search by Title + Year
-        await db.db.movies.create_index([("title", ASCENDING), ("release_date", ASCENDING)])
-        
-        # Subtitles: Search by Movie + Language
-        await db.db.subtitles.create_index([("movie_id", ASCENDING), ("language", ASCENDING)])
+        from backend.app.index_manager import index_manager
+        await index_manager.reconcile()
         
         print("🚀 Performance Indexes Ensured.")
 
@@ -1,31 +1,50 @@
 import os
-import requests
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, Optional
 from backend.app.database import db
+from backend.app.write_behind import write_queue
+from backend.app.entity_ids import movie_id_for_query
+from backend.app.deadline import Deadline
+from backend.app.title_resolver import title_resolver
+from backend.app.rate_limiter import upstream_guard, UpstreamLimited
+
+FANART_TIMEOUT_SECONDS = 10
 
 class FanartAgent:
     def __init__(self):
         self.api_key = os.getenv("FANART_API_KEY")
         self.base_url = "http://webservice.fanart.tv/v3/movies"
 
-    async def get_movie_assets(self, tmdb_id: str = None, movie_name: str = None) -> Dict[str, Any]:
+    @staticmethod
+    def cache_key(tmdb_id: str = None, movie_name: str = None) -> str:
+        # Keyed by TMDB id, so every spelling of a title shares one entry
+        return f"fanart_assets_tmdb_{tmdb_id}" if tmdb_id else f"fanart_assets_{title_resolver.canonical_key(movie_name)}"
+
+    async def cached(self, movie_name: str) -> Optional[Dict[str, Any]]:
+        """
+        The cached assets for a movie name, without calling Fanart.tv (None on a miss).
+        """
+        from backend.app.cache_manager import cache
+        match = title_resolver.resolve(movie_name)
+        return await cache.get(self.cache_key(match.tmdb_id if match else None, movie_name))
+
+    async def get_movie_assets(self, tmdb_id: str = None, movie_name: str = None,
+                               deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         Fetches images/assets from Fanart.tv and updates the Movie in DB.
         If no TMDB ID is provided, it returns a mock response for now or error.
         """
-        # For prototype without real TMDB ID, we rely on name matching if id missing
-        # DEMO: Manual mapping for high-fidelity demo
-        if not tmdb_id and movie_name:
-            lower_name = movie_name.lower()
-            if "infinity war" in lower_name: tmdb_id = "299536"
-            elif "matrix" in lower_name: tmdb_id = "603"
+        # Without a TMDB ID, resolve the name against the local title dataset
+        match = title_resolver.resolve(movie_name) if movie_name and not tmdb_id else None
+        if match:
+            tmdb_id = str(match.tmdb_id)
             
         if not tmdb_id and not movie_name:
              return {"error": "Need tmdb_id or movie_name"}
 
         # 1. Check Cache
         from backend.app.cache_manager import cache
-        cache_key = f"fanart_assets_{tmdb_id or movie_name}"
+        cache_key = self.cache_key(tmdb_id, movie_name)
         cached_data = await cache.get(cache_key)
         if cached_data:
             print(f"⚡ Cache Hit for Fanart: {movie_name}")
@@ -43,14 +62,23 @@ class FanartAgent:
                  
             if tmdb_id:
                 try:
+                    # aiohttp rather than a blocking client in a thread: cancelling the chat closes the request
+                    import aiohttp
                     print(f"🎨 FanartAgent: Fetching assets for TMDB ID {tmdb_id}...")
                     url = f"{self.base_url}/{tmdb_id}?api_key={self.api_key}"
-                    response = requests.get(url)
-                    if response.status_code == 200:
-                        assets = response.json()
-                        print(f"✅ FanartAgent: Success! Found {len(assets)} categories.")
-                    else:
-                        print(f"❌ FanartAgent: API Error {response.status_code}")
+                    timeout = deadline.upstream_timeout(FANART_TIMEOUT_SECONDS) if deadline else FANART_TIMEOUT_SECONDS
+                    async with upstream_guard.guard("fanart"):
+                        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+                            async with session.get(url) as response:
+                                if response.status == 200:
+                                    assets = await response.json(content_type=None)
+                                    print(f"✅ FanartAgent: Success! Found {len(assets)} categories.")
+                                else:
+                                    print(f"❌ FanartAgent: API Error {response.status}")
+                except UpstreamLimited:
+                    raise # Reported as "limited" by the fan-out
+                except asyncio.TimeoutError:
+                    print(f"⏱️ FanartAgent: Timed out after {timeout:.1f}s for TMDB ID {tmdb_id}")
                 except Exception as e:
                      print(f"Fanart API failed: {e}")
         else:
@@ -66,21 +94,27 @@ class FanartAgent:
                 assets = {"moviebackground": [{"url": "https://images.fanart.tv/fanart/avengers-infinity-war-5ac5e1657803e.jpg"}]}
             else:
                  assets = {"moviebackground": [{"url": "https://dummyimage.com/1920x1080/000/fff&text=No+Fanart"}]}
+            # Neither cached nor persisted: a slow or failed call must not pin a placeholder for this movie
+            return {"status": "fallback", "assets": assets, "movie": movie_name}
             
         # Persist (Update Movie)
         if db.db is not None and movie_name:
             # We assume the movie exists or we upsert it with minimal info
-            await db.db.movies.update_one(
-                {"name": movie_name},
-                {"$set": {"metadata.fanart": assets}},
-                upsert=True
+            # Same id as the Wikipedia agent derives from this query, so both write one document
+            write_queue.enqueue(
+                "movies",
+                {"_id": movie_id_for_query(movie_name, tmdb_id=tmdb_id)},
+                {
+                    "$set": {"metadata.fanart": assets, **({"external_ids.tmdb": str(tmdb_id)} if tmdb_id else {})},
+                    "$setOnInsert": {"name": match.title if match else movie_name, "title": match.title if match else movie_name}
+                }
             )
             val = {"status": "updated", "assets": assets, "movie": movie_name}
-            await cache.set(cache_key, val)
+            await cache.set(cache_key, val, defer=True)
             return val
 
         val = {"status": "fetched", "assets": assets}
-        await cache.set(cache_key, val)
+        await cache.set(cache_key, val, defer=True)
         return val
 
 if __name__ == "__main__":
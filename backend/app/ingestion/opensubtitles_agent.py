@@ -1,14 +1,20 @@
 import os
-import aiohttp
 import asyncio
 from typing import Optional, Dict, Any
+from backend.app.write_behind import write_queue
+from backend.app.deadline import Deadline
 from backend.app.database import db
+from backend.app.title_resolver import title_resolver
+from backend.app.rate_limiter import upstream_guard
+
+OPENSUBTITLES_TIMEOUT_SECONDS = 30
 
 # Minimal OpenSubtitles API Client
 # API Documentation: https://opensubtitles.com/docs/api/html/index.htm
 
 class OpenSubtitlesAgent:
     BASE_URL = "https://api.opensubtitles.com/api/v1"
+    agent_name = "OpenSubtitlesAgent"
     
     def __init__(self):
         self.api_key = os.getenv("OPENSUBTITLES_API_KEY")
@@ -18,7 +24,24 @@ class OpenSubtitlesAgent:
             "User-Agent": "MovieFanDashboard v1.0" # Required by their API
         }
 
-    async def search_and_download(self, query: str) -> Optional[str]:
+    @staticmethod
+    def track_key(query: str) -> str:
+        """
+        Key of a stored track: the canonical title, so spelling variants share it.
+        """
+        match = title_resolver.resolve(query)
+        return match.title if match else query
+
+    @staticmethod
+    def remember_title(query: str, movie: str):
+        """
+        Records the movie title a stored track was loaded as, so the quote
+        index rebuilds it under the same name as the chat and vector paths.
+        """
+        write_queue.enqueue("subtitles", {"query": OpenSubtitlesAgent.track_key(query)},
+                            {"$set": {"movie": movie}}, upsert=False)
+
+    async def search_and_download(self, query: str, deadline: Optional[Deadline] = None) -> Optional[str]:
         """
         Searches for subtitles for the movie query and returns the SRT content string.
         """
@@ -36,52 +59,67 @@ class OpenSubtitlesAgent:
                 return await self._mock_search("avengers")
             return None
 
-        # 2. Real API Search (If Key Present)
-        try:
-            async with aiohttp.ClientSession() as session:
-                # Step A: Search for the movie/subtitle
-                params = {"query": query, "languages": "en"}
-                async with session.get(f"{self.BASE_URL}/subtitles", headers=self.headers, params=params) as resp:
-                    if resp.status != 200:
-                        print(f"❌ OpenSubtitles API Error: {resp.status} - {await resp.text()}")
-                        return await self._mock_search(query)
+        # 2. Stored track, keyed by the canonical title so spelling variants share it
+        match = title_resolver.resolve(query)
+        track_key = self.track_key(query)
+        if db.db is not None:
+            try:
+                doc = await db.reader("subtitles").find_one({"query": track_key, "content": {"$exists": True}}, {"content": 1})
+                if doc:
+                    print(f"⚡ OpenSubtitlesAgent: Stored track for '{track_key}'")
+                    return doc["content"]
+            except Exception as e:
+                print(f"⚠️ OpenSubtitlesAgent: stored track lookup failed: {e}")
+
+        # 3. Real API Search (If Key Present), within the download quota shared by all users
+        # (raises UpstreamLimited when it is used up or too many downloads are running)
+        async with upstream_guard.guard("opensubtitles"):
+            try:
+                import aiohttp
+                total = deadline.upstream_timeout(OPENSUBTITLES_TIMEOUT_SECONDS) if deadline else OPENSUBTITLES_TIMEOUT_SECONDS
+                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=total)) as session:
+                    # Step A: Search for the movie/subtitle
+                    params = {"tmdb_id": match.tmdb_id, "languages": "en"} if match else {"query": query, "languages": "en"}
+                    async with session.get(f"{self.BASE_URL}/subtitles", headers=self.headers, params=params) as resp:
+                        if resp.status != 200:
+                            print(f"❌ OpenSubtitles API Error: {resp.status} - {await resp.text()}")
+                            return await self._mock_search(query)
                     
-                    data = await resp.json()
-                    if not data.get("data"):
-                        print("❌ OpenSubtitles: No results found.")
-                        return None
+                        data = await resp.json()
+                        if not data.get("data"):
+                            print("❌ OpenSubtitles: No results found.")
+                            return None
                         
-                    # Get the first best match
-                    first_match = data["data"][0]
-                    file_id = first_match["attributes"]["files"][0]["file_id"]
-                    print(f"✅ Found subtitle for '{query}' (ID: {file_id})")
+                        # Get the first best match
+                        first_match = data["data"][0]
+                        file_id = first_match["attributes"]["files"][0]["file_id"]
+                        print(f"✅ Found subtitle for '{query}' (ID: {file_id})")
 
-                # Step B: Download Request (to get link)
-                download_payload = {"file_id": file_id}
-                async with session.post(f"{self.BASE_URL}/download", headers=self.headers, json=download_payload) as resp:
-                    if resp.status != 200:
-                        print(f"❌ Download Link Error: {resp.status}")
-                        return None
+                    # Step B: Download Request (to get link)
+                    download_payload = {"file_id": file_id}
+                    async with session.post(f"{self.BASE_URL}/download", headers=self.headers, json=download_payload) as resp:
+                        if resp.status != 200:
+                            print(f"❌ Download Link Error: {resp.status}")
+                            return None
                     
-                    link_data = await resp.json()
-                    download_url = link_data.get("link")
+                        link_data = await resp.json()
+                        download_url = link_data.get("link")
                 
-                # Step C: Fetch raw content
-                if download_url:
-                    async with session.get(download_url) as resp:
-                        if resp.status == 200:
-                            content = await resp.text()
-                            # Persist to DB if possible
-                            if db.db is not None:
-                                await db.db.subtitles.update_one(
-                                    {"query": query},
-                                    {"$set": {"content": content, "source": "opensubtitles"}},
-                                    upsert=True
+                    # Step C: Fetch raw content
+                    if download_url:
+                        async with session.get(download_url) as resp:
+                            if resp.status == 200:
+                                content = await resp.text()
+                                # Persist to DB if possible (write-behind)
+                                write_queue.enqueue(
+                                    "subtitles",
+                                    {"query": track_key},
+                                    {"$set": {"content": content, "movie": track_key, "source": "opensubtitles"}}
                                 )
-                            return content
+                                return content
                             
-        except Exception as e:
-            print(f"❌ OpenSubtitles Exception: {e}")
+            except Exception as e:
+                print(f"❌ OpenSubtitles Exception: {e}")
             
         return await self._mock_search(query)
 
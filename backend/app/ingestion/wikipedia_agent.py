@@ -1,38 +1,109 @@
-import wikipedia
-import uuid
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, Optional
 from datetime import datetime
 from backend.app.database import db
+from backend.app.write_behind import write_queue
 from backend.app.models import Movie, Fact
+from backend.app.entity_ids import movie_id_for_query, fact_id_for
+from backend.app.deadline import Deadline, run_blocking
+from backend.app.title_resolver import title_resolver, normalize_title
+from backend.app.rate_limiter import upstream_guard, UpstreamLimited
+
+def _fetch_page(query: str):
+    """
+    Blocking part of a lookup (search + page + lazily loaded fields), run in a worker thread.
+    """
+    import wikipedia
+    results = wikipedia.search(query)
+    if not results:
+        return None
+    page = wikipedia.page(results[0], auto_suggest=False)
+    # These properties each trigger another HTTP request; resolve them off the event loop
+    page.summary, page.images
+    return page
+
+def _fetch_summary(query: str):
+    """
+    Blocking search + summary only (no page object, no images), run in a worker thread.
+    """
+    import wikipedia
+    results = wikipedia.search(query)
+    if not results:
+        return None
+    return results[0], wikipedia.summary(results[0], auto_suggest=False)
 
 class WikipediaAgent:
     def __init__(self, lang: str = "en"):
-        wikipedia.set_lang(lang)
+        self.lang = lang # Applied on first use; the wikipedia client is imported lazily
+
+    @staticmethod
+    def cache_key(query: str) -> str:
+        # Canonical key: "load the matrix" and "The Matrix" share one entry
+        return f"wiki_search_{title_resolver.canonical_key(query)}"
+
+    async def cached(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        The cached lookup for a query, without calling Wikipedia (None on a miss).
+        """
+        from backend.app.cache_manager import cache
+        return await cache.get(self.cache_key(query))
+
+    async def lookup_summary(self, query: str) -> Dict[str, Any]:
+        """
+        Read-only lookup for entity context ("Thor Avengers: Infinity War"):
+        the best page's title and summary, cached, with nothing written to
+        movies or facts (the query is a character or place, not a film).
+        """
+        import wikipedia
+        wikipedia.set_lang(self.lang)
+        from backend.app.cache_manager import cache
+        cache_key = f"wiki_entity_{normalize_title(query)}"
+        cached_data = await cache.get(cache_key)
+        if cached_data:
+            return cached_data
+
+        try:
+            async with upstream_guard.guard("wikipedia"):
+                found = await run_blocking(_fetch_summary, query)
+        except (wikipedia.exceptions.DisambiguationError, wikipedia.exceptions.PageError) as e:
+            return {"error": str(e)}
+        if found is None:
+            return {"error": "No results found"}
+        result_payload = {"title": found[0], "summary": found[1]}
+        await cache.set(cache_key, result_payload, defer=True)
+        return result_payload
 
-    async def search_movie(self, query: str) -> Dict[str, Any]:
+    async def search_movie(self, query: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         Searches Wikipedia, returns metadata, and PERSISTS it to the DB.
         """
+        import wikipedia
+        wikipedia.set_lang(self.lang)
+
         try:
             # 1. Check Cache
             from backend.app.cache_manager import cache
-            cache_key = f"wiki_search_{query.lower().strip()}"
+            match = title_resolver.resolve(query)
+            cache_key = self.cache_key(query)
             cached_data = await cache.get(cache_key)
             if cached_data:
                 print(f"⚡ Cache Hit for Wikipedia query: {query}")
                 return cached_data
 
-            # Basic search (synchronous call)
-            results = wikipedia.search(query)
-            if not results:
+            # Search + fetch generic page (the wikipedia client is synchronous)
+            # A resolved movie is searched by its canonical title, which finds the film's page
+            search = f"{match.title} {match.year} film" if match else query
+            # The wikipedia client blocks: a cancelled chat stops waiting, but the thread runs to completion
+            async with upstream_guard.guard("wikipedia"):
+                fetch = run_blocking(_fetch_page, search)
+                page = await (asyncio.wait_for(fetch, deadline.upstream_timeout()) if deadline else fetch)
+            if page is None:
                 return {"error": "No results found"}
             
-            # Fetch generic page
-            page = wikipedia.page(results[0], auto_suggest=False)
-            
             # Create Movie Entity
-            # Generate a consistent ID based on title or use UUID
-            movie_id = f"movie_{uuid.uuid4().hex[:8]}"
+            # Same id as the Fanart agent derives from this query (TMDB id, else the stripped query),
+            # so both write one document; the page id is kept in external_ids
+            movie_id = movie_id_for_query(query, tmdb_id=match.tmdb_id if match else None)
             
             movie = Movie(
                 _id=movie_id,
@@ -42,11 +113,12 @@ class WikipediaAgent:
                     "url": page.url,
                     "source": "wikipedia",
                     "images": page.images
-                }
+                },
+                external_ids={"wikipedia": str(page.pageid), **({"tmdb": str(match.tmdb_id)} if match else {})}
             )
             
-            # Create Fact Entity (Summary)
-            fact_id = f"fact_{uuid.uuid4().hex[:8]}"
+            # Create Fact Entity (Summary) - one per movie and source
+            fact_id = fact_id_for(movie_id, "wikipedia", "summary")
             summary_fact = Fact(
                 _id=fact_id,
                 content=page.summary,
@@ -55,18 +127,22 @@ class WikipediaAgent:
                 tags=["summary", "overview"]
             )
             
-            # Persist to MongoDB
-            if db.db is not None:
-                await db.db.movies.update_one(
-                    {"name": movie.name}, 
-                    {"$set": movie.model_dump(by_alias=True)}, 
-                    upsert=True
-                )
-                await db.db.facts.update_one(
-                    {"_id": fact_id},
-                    {"$set": summary_fact.model_dump(by_alias=True)},
-                    upsert=True
-                )
+            # Persist to MongoDB (write-behind, off the request path).
+            # Nested fields are set by path so other agents' data (e.g. metadata.fanart) survives.
+            movie_doc = movie.model_dump(by_alias=True, exclude={"id"})
+            movie_fields = {k: v for k, v in movie_doc.items() if k not in ("metadata", "external_ids")}
+            movie_fields.update({f"metadata.{k}": v for k, v in movie_doc["metadata"].items()})
+            movie_fields.update({f"external_ids.{k}": v for k, v in movie_doc["external_ids"].items()})
+            write_queue.enqueue(
+                "movies",
+                {"_id": movie_id},
+                {"$set": movie_fields}
+            )
+            write_queue.enqueue(
+                "facts",
+                {"_id": fact_id},
+                {"$set": summary_fact.model_dump(by_alias=True, exclude={"id"})}
+            )
             
             result_payload = {
                 "title": page.title,
@@ -77,7 +153,7 @@ class WikipediaAgent:
             }
 
             # 2. Save to Cache
-            await cache.set(cache_key, result_payload)
+            await cache.set(cache_key, result_payload, defer=True)
             
             return result_payload
             
@@ -85,6 +161,10 @@ class WikipediaAgent:
             return {"error": "Disambiguation", "options": e.options}
         except wikipedia.exceptions.PageError:
             return {"error": "Page format not supported or found"}
+        except asyncio.TimeoutError:
+            return {"error": "Timed out waiting for Wikipedia"} # Nothing is cached; the next request retries
+        except UpstreamLimited:
+            raise # Reported as "limited" by the fan-out; nothing is cached
         except Exception as e:
             return {"error": str(e)}
 
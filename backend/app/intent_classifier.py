@@ -0,0 +1,91 @@
+import os
+import json
+import numpy as np
+from typing import List, Sequence, Tuple
+from backend.app.embedding_backends import hashed_ngram_counts
+
+INTENT_TRAINING_PATH = os.getenv("INTENT_TRAINING_PATH", "backend/data/intent_queries.jsonl")
+
+def load_labelled(path: str) -> Tuple[List[str], List[str]]:
+    """
+    Reads a JSONL file of {"query": ..., "intent": ...} rows.
+    """
+    queries, labels = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                queries.append(row["query"])
+                labels.append(row["intent"])
+    return queries, labels
+
+class IntentClassifier:
+    """
+    Multinomial logistic regression over hashed character n-grams (NumPy only).
+    Trains in well under a second on a few hundred labelled queries and
+    classifies a query in microseconds, so the router only needs the LLM for
+    queries it is unsure about.
+    """
+    def __init__(self, n_features: int = 4096, l2: float = 1e-4, epochs: int = 300, learning_rate: float = 4.0):
+        self.n_features = n_features
+        self.l2 = l2
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.labels: List[str] = []
+        self.weights = None
+        self.bias = None
+
+    @property
+    def trained(self) -> bool:
+        return self.weights is not None
+
+    def features(self, texts: Sequence[str]) -> np.ndarray:
+        x = hashed_ngram_counts(texts, self.n_features, ngram_range=(2, 5))
+        x = np.sign(x) * np.log1p(np.abs(x))
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        return x / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def _softmax(z: np.ndarray) -> np.ndarray:
+        z = z - z.max(axis=1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def fit(self, queries: Sequence[str], labels: Sequence[str]) -> "IntentClassifier":
+        """
+        Full-batch gradient descent on the L2-regularized cross-entropy.
+        """
+        self.labels = sorted(set(labels))
+        index = {label: i for i, label in enumerate(self.labels)}
+        x = self.features(queries)
+        y = np.zeros((len(queries), len(self.labels)), dtype=np.float32)
+        y[np.arange(len(queries)), [index[label] for label in labels]] = 1.0
+
+        # Only buckets seen in training can get non-zero weight: optimize those columns
+        active = np.flatnonzero(np.abs(x).sum(axis=0))
+        x = np.ascontiguousarray(x[:, active])
+        w = np.zeros((len(active), len(self.labels)), dtype=np.float32)
+        bias = np.zeros(len(self.labels), dtype=np.float32)
+        for _ in range(self.epochs):
+            grad = (self._softmax(x @ w + bias) - y) / len(queries)
+            w -= self.learning_rate * (x.T @ grad + self.l2 * w)
+            bias -= self.learning_rate * grad.sum(axis=0)
+
+        self.weights = np.zeros((self.n_features, len(self.labels)), dtype=np.float32)
+        self.weights[active] = w
+        self.bias = bias
+        return self
+
+    def fit_file(self, path: str = INTENT_TRAINING_PATH) -> "IntentClassifier":
+        return self.fit(*load_labelled(path))
+
+    def predict_proba(self, queries: Sequence[str]) -> np.ndarray:
+        return self._softmax(self.features(queries) @ self.weights + self.bias)
+
+    def predict(self, query: str) -> Tuple[str, float]:
+        """
+        Returns (intent, confidence) for a single query.
+        """
+        probs = self.predict_proba([query])[0]
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
@@ -5,17 +5,42 @@ from dotenv import load_dotenv
 # Load env variables from .env file (looked for in cwd or parents)
 load_dotenv("backend/.env")
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from contextlib import asynccontextmanager
+import json
+import time
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from contextlib import asynccontextmanager, aclosing
 
 from backend.app.database import db
 from backend.app.agent_router import AgentRouter
 from backend.app.ingestion.wikipedia_agent import WikipediaAgent
 from backend.app.ingestion.fanart_agent import FanartAgent
+from backend.app.ingestion.opensubtitles_agent import OpenSubtitlesAgent
 from backend.app.commerce.x402_agent import X402Agent
 from backend.app.nemo_agent import NeMoAgent
 from backend.app.thesys_adapter import ThesysMockAdapter
+from backend.app.vector_agent import VectorEmbeddingAgent
+from backend.app.vector_index import vector_index, VECTOR_INDEX_PATH
+from backend.app.quote_index import quote_index, reciprocal_rank_fusion
+from backend.app.write_behind import write_queue
+from backend.app.embedding_cache import embedding_cache
+from backend.app.cache_manager import cache
+from backend.app.index_manager import index_manager
+from backend.app.scene_agent import SceneBufferAgent
+from backend.app.srt_parser import SRTManager
+from backend.app.helpers.lazy import Lazy
+from backend.app.warmup import warmup
+from backend.app.semantic_cache import semantic_cache
+from backend.app.conversation_memory import conversation_memory, truncate_to_tokens
+from backend.app.entity_catalog import detect_entity
+from backend.app.title_resolver import title_resolver
+from backend.app.prefetcher import prefetcher
+from backend.app.image_proxy import image_proxy, ImageProxyError, DEFAULT_IMAGE_WIDTH
+from backend.app.deadline import Deadline, SourceResult, fan_out, fan_out_stats, supervisor
+from backend.app.rate_limiter import rate_limiter, upstream_guard, Decision
+from backend.app.shared_state import shared_state
 
 # API Models
 class ChatRequest(BaseModel):
@@ -27,24 +52,49 @@ class ChatResponse(BaseModel):
     data: dict = {}
     agent_used: str
 
+async def load_default_track():
+    # A movie loaded earlier (or by another worker) stays loaded
+    loaded = shared_state.get(LOADED_MOVIE_KEY)
+    if loaded:
+        print(f"🎬 Startup: '{loaded['movie']}' is already loaded")
+        return
+    # Load Default Movie Context (Async safe here)
+    print("🎬 Startup: Loading 'Avengers: Infinity War' context...")
+    content = await OpenSubtitlesAgent().search_and_download("Avengers: Infinity War")
+    if content:
+        await load_track(content, "Avengers: Infinity War")
+        print("✅ Default Movie Loaded: Avengers Infinity War")
+
+async def load_vector_index():
+    # Semantic search index: snapshot on disk first (read in a worker thread), MongoDB otherwise
+    snapshot = await asyncio.to_thread(vector_index.read_snapshot, VECTOR_INDEX_PATH)
+    if not vector_index.load(VECTOR_INDEX_PATH, snapshot):
+        await vector_index.build_from_db()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    await db.connect()
-    
-    # Load Default Movie Context (Async safe here)
-    try:
-        print("🎬 Startup: Loading 'Avengers: Infinity War' context...")
-        agent = OpenSubtitlesAgent()
-        content = await agent.search_and_download("Avengers: Infinity War")
-        if content:
-            srt_manager.load_file(content)
-            print("✅ Default Movie Loaded: Avengers Infinity War")
-    except Exception as e:
-        print(f"⚠️ Startup Error: {e}")
+    # Startup (minimal): only the connection is needed to serve requests.
+    # Everything else warms up in the background; see /api/ready.
+    await db.connect(init_indexes=False)
+    await shared_state.start() # Before warmup: the default track is only loaded if no movie is
+
+    warmup.add("indexes", index_manager.reconcile)
+    warmup.add("default_track", load_default_track)
+    warmup.add("vector_index", load_vector_index)
+    warmup.add("quote_index", quote_index.build_from_db)
+    warmup.add("router", lambda: asyncio.to_thread(lambda: router.instance)) # Trains the intent classifier
+    warmup.add("titles", lambda: asyncio.to_thread(title_resolver.load))
+    warmup.start()
 
     yield
-    # Shutdown
+    # Shutdown: stop warmup, then drain buffered agent writes before the client goes away
+    await warmup.stop()
+    await prefetcher.stop()
+    await conversation_memory.stop()
+    await shared_state.stop()
+    await image_proxy.close()
+    rate_limiter.close()
+    await write_queue.stop()
     await db.close()
 
 app = FastAPI(title="Movie Fan Generative UI API", lifespan=lifespan)
@@ -59,91 +109,233 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Agents
-from backend.app.scene_agent import SceneBufferAgent
-router = AgentRouter()
-wiki_agent = WikipediaAgent()
-fanart_agent = FanartAgent()
-x402 = X402Agent()
-nemo = NeMoAgent()
-scene_agent = SceneBufferAgent()
+# Initialize Agents (constructed on first use, so cold start stays cheap)
+router = Lazy(AgentRouter)
+wiki_agent = Lazy(WikipediaAgent)
+fanart_agent = Lazy(FanartAgent)
+x402 = Lazy(X402Agent)
+nemo = Lazy(NeMoAgent)
+scene_agent = Lazy(SceneBufferAgent)
+vector_agent = Lazy(VectorEmbeddingAgent)
 
-from backend.app.srt_parser import SRTManager
 srt_manager = SRTManager()
-# Load "Avengers: Infinity War" default data immediately for demo
-# We use the OpenSubtitlesMock to get the string content
-from backend.app.ingestion.opensubtitles_agent import OpenSubtitlesAgent
-import asyncio
+# "Avengers: Infinity War" is loaded as the default track by the warmup (see lifespan)
 
-# Default movie loader moved to lifespan
+# The loaded movie lives in shared state, so every worker serves the same track
+LOADED_MOVIE_KEY = "loaded_movie"
+
+track_loading: Optional[asyncio.Task] = None
+
+def prepare_track(content: str):
+    subs = SRTManager.parse(content)
+    return subs, quote_index.prepare(subs)
+
+async def swap_in_track(loaded: dict):
+    # Parsing and cleaning run in a worker thread; only the swap happens on the event loop
+    subs, cues = await asyncio.to_thread(prepare_track, loaded["srt"])
+    quote_index.add_track(loaded["movie"], cues, prepared=True)
+    if shared_state.get(LOADED_MOVIE_KEY) is loaded: # Unless a newer track arrived while this one was being parsed
+        srt_manager.use(subs, movie=loaded["movie"])
+
+def apply_loaded_movie(key: str, loaded: dict):
+    # Runs in every worker whenever any of them loads a movie
+    global track_loading
+    track_loading = asyncio.ensure_future(swap_in_track(loaded))
+    return track_loading
+
+shared_state.subscribe(LOADED_MOVIE_KEY, apply_loaded_movie)
+
+async def load_track(content: str, movie: str):
+    await shared_state.set(LOADED_MOVIE_KEY, {"movie": movie, "srt": content})
+    if track_loading is not None:
+        await asyncio.shield(track_loading) # This worker serves the new track as soon as the call returns
 
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Movie Fan Dashboard API"}
 
+@app.get("/api/ready")
+def ready_endpoint():
+    """
+    Readiness probe: answers once startup has finished (the app can serve traffic),
+    with background warmup progress.
+    """
+    return warmup.status()
+
+@app.get("/api/metrics")
+def metrics_endpoint():
+    """
+    Internal counters for monitoring (queue depths, cache hit rates).
+    """
+    return {
+        "write_behind": write_queue.stats(),
+        "embedding_cache": embedding_cache.stats,
+        "api_cache": cache.stats(),
+        "mongo_pool": db.pool_stats(),
+        "router": router.stats if router.loaded else {},
+        "nemo": nemo.stats() if nemo.loaded else {},
+        "semantic_cache": semantic_cache.metrics(),
+        "conversation_memory": conversation_memory.metrics(),
+        "prefetch": prefetcher.metrics(),
+        "image_proxy": image_proxy.metrics(),
+        "fan_out": {**fan_out_stats(), "active_chats": supervisor.active()},
+        "rate_limits": rate_limiter.metrics(),
+        "upstreams": upstream_guard.metrics(),
+        "shared_state": shared_state.metrics()
+    }
+
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request, response: Response):
     """
     Main entry point for the Generative UI Chat.
     """
-    intent = await router.route_query(request.query)
+    decision = await rate_limiter.check("chat", request.user_id)
+    if not decision.allowed:
+        response.headers["Retry-After"] = str(max(1, round(decision.retry_after)))
+        return await limited_chat(request, decision)
+    with supervisor.track(request.user_id, http_request) as abandoned:
+        intent = await router.route_query(request.query)
+        return await run_chat(request, intent, abandoned)
+
+async def limited_chat(request: ChatRequest, decision: Decision) -> ChatResponse:
+    """
+    Answer for a user over their chat rate limit: whatever the caches already
+    hold for the query, or a short notice. Never waits on an upstream.
+    """
+    intent = await router.route_query(request.query, allow_llm=False) # Routing stays local too
+    retry = max(1, round(decision.retry_after))
+    notice = f"You're sending messages quickly. Try again in {retry}s."
+    data_payload = {}
+
+    if intent == "ingestion":
+        results = {name: value for name, value in (("wikipedia", await wiki_agent.cached(request.query)),
+                                                   ("fanart", await fanart_agent.cached(request.query))) if value}
+        if results:
+            title = (results.get("wikipedia") or {}).get("title") or request.query
+            data_payload = ingestion_payload(results, {name: {"status": "cached", "ms": 0} for name in results})
+            notice = f"Here is what I already had for '{title}'. {notice}"
+    elif intent in LLM_INTENTS:
+        cached, _ = await semantic_cache.lookup(request.query, srt_manager.movie)
+        if cached is not None:
+            notice = cached
+            data_payload = llm_payload(intent, cached)
+
+    print(f"🚦 Chat rate limit: user '{request.user_id}' served {'from cache' if data_payload else 'a notice'}")
+    return build_chat_response(intent, notice, {**data_payload, "rate_limited": True, "retry_after": retry})
+
+async def run_chat(request: ChatRequest, intent: str,
+                   abandoned: Optional[Callable[[], Awaitable[bool]]] = None) -> ChatResponse:
+    """
+    Runs the agents for a routed chat request.
+    `abandoned` reports when nobody waits for the answer anymore (see ChatSupervisor).
+    """
     response_text = ""
     data_payload = {}
 
     if intent == "ingestion":
-        # PARALLEL EXECUTION STRATEGY
-        # We launch all agent tasks simultaneously to minimize latency.
-        from backend.app.ingestion.opensubtitles_agent import OpenSubtitlesAgent
-        os_agent = OpenSubtitlesAgent()
-        
-        # Create coroutines
-        task_wiki = wiki_agent.search_movie(request.query)
-        task_subs = os_agent.search_and_download(request.query)
-        task_fanart = fanart_agent.get_movie_assets(movie_name=request.query) # Use query initially
-        
-        # Execute concurrently
-        import asyncio # Ensure asyncio is imported
-        results = await asyncio.gather(task_wiki, task_subs, task_fanart, return_exceptions=True)
-        
-        # Unpack results
-        wiki_data = results[0] if not isinstance(results[0], Exception) else {}
-        srt_content = results[1] if not isinstance(results[1], Exception) else None
-        fanart_data = results[2] if not isinstance(results[2], Exception) else {}
-        
-        # Exception Handling Logging
-        if isinstance(results[0], Exception): print(f"Wiki Agent Failed: {results[0]}")
-        if isinstance(results[1], Exception): print(f"Subtitle Agent Failed: {results[1]}")
-        if isinstance(results[2], Exception): print(f"Fanart Agent Failed: {results[2]}")
-
-        # Logic to merge data
-        # If Wikipedia found a better title, we might want to re-query Fanart (optional, but for speed we accept the simultaneous result)
-        title = wiki_data.get('title', request.query)
-
-        if srt_content:
-            srt_manager.load_file(srt_content)
-            response_text = f"Simultaneously fetched data for '{title}' from Wikipedia, Fanart, and OpenSubtitles!"
-        else:
-            response_text = f"Fetched data for '{title}', but subtitles were not found."
-
-        data_payload = {**wiki_data, "fanart": fanart_data.get('assets', {})}
+        results, status = {}, {}
+        async for _ in ingest_sources(request, results, status, abandoned):
+            pass
+        response_text, data_payload = await finish_ingestion(request, results, status)
         
     elif intent == "commerce":
         # Mock buying flow
         data_payload = x402.buy_gift_card(25.0, "user@example.com")
         response_text = "I can help you with that gift card transaction."
 
-    elif intent == "reasoning":
+    elif intent in LLM_INTENTS:
         # NeMo conversation
-        response_text = await nemo.generate_response(request.query)
-        data_payload = {
-            "context": "knowledge_graph_lookup", 
-            "response_text": response_text
-        }
+        context = await conversation_memory.build_context(request.user_id, request.query, srt_manager.movie)
+        response_text = await nemo.generate_response(request.query, context, scope=srt_manager.movie)
+        data_payload = llm_payload(intent, response_text)
 
     else:
         response_text = "I'm not sure how to handle that yet."
 
+    await remember_turn(request, response_text)
+    return build_chat_response(intent, response_text, data_payload)
+
+async def ingest_sources(request: ChatRequest, results: dict, status: dict,
+                         abandoned: Optional[Callable[[], Awaitable[bool]]] = None) -> AsyncIterator[SourceResult]:
+    """
+    Runs the ingestion agents, filling `results`/`status` and yielding each source as it returns.
+    Sources still running when the chat is abandoned are cancelled, unless nearly done.
+    """
+    # PARALLEL EXECUTION STRATEGY
+    # We launch all agent tasks simultaneously to minimize latency.
+    # The deadline caps the response time; late sources finish in the background.
+    deadline = Deadline()
+    os_agent = OpenSubtitlesAgent()
+    
+    # Create coroutines
+    sources = {
+        "wikipedia": wiki_agent.search_movie(request.query, deadline=deadline),
+        "subtitles": os_agent.search_and_download(request.query, deadline=deadline),
+        "fanart": fanart_agent.get_movie_assets(movie_name=request.query, deadline=deadline) # Use query initially
+    }
+
+    # Execute concurrently, until everything returned or the deadline expired
+    # aclosing: if this generator is dropped mid-way, the fan-out releases its tasks right away
+    async with aclosing(fan_out(sources, deadline, abandoned)) as completed:
+        async for result in completed:
+            status[result.name] = {"status": result.status, "ms": result.ms}
+            if result.status == "ok":
+                results[result.name] = result.value
+            elif result.status == "error":
+                print(f"{result.name} agent failed: {result.value}")
+            elif result.status == "cancelled":
+                print(f"🛑 {result.name} agent released: chat abandoned by the client")
+            elif result.status == "limited":
+                print(f"🚦 {result.name} agent skipped: {result.value}")
+            else:
+                print(f"⏱️ {result.name} agent missed the {deadline.budget_ms} ms deadline, finishing in background")
+            yield result
+
+def ingestion_payload(results: dict, status: dict) -> dict:
+    wiki_data = results.get("wikipedia") or {}
+    fanart_data = results.get("fanart") or {}
+    return {**wiki_data, "fanart": fanart_data.get('assets', {}), "sources": status}
+
+async def finish_ingestion(request: ChatRequest, results: dict, status: dict):
+    """
+    Loads the fetched subtitles and builds the (response_text, data_payload) for the chat.
+    """
+    srt_content = results.get("subtitles")
+
+    # Logic to merge data
+    # If Wikipedia found a better title, we might want to re-query Fanart (optional, but for speed we accept the simultaneous result)
+    # Canonical title first: tracks, quote hits and vector chunks are all keyed by it
+    resolved = title_resolver.resolve(request.query)
+    title = resolved.title if resolved else (results.get("wikipedia") or {}).get('title') or request.query
+
+    if srt_content:
+        await load_track(srt_content, title)
+        OpenSubtitlesAgent.remember_title(request.query, title)
+        response_text = f"Simultaneously fetched data for '{title}' from Wikipedia, Fanart, and OpenSubtitles!"
+    elif status["subtitles"]["status"] == "timeout":
+        response_text = f"Fetched data for '{title}'; subtitles are still downloading."
+    elif status["subtitles"]["status"] == "limited":
+        response_text = f"Fetched data for '{title}'; subtitle downloads are busy, try again shortly."
+    else:
+        response_text = f"Fetched data for '{title}', but subtitles were not found."
+
+    return response_text, ingestion_payload(results, status)
+
+async def remember_turn(request: ChatRequest, response_text: str):
+    await conversation_memory.load(request.user_id) # Earlier turns may have been answered by another worker
+    conversation_memory.add_turn(request.user_id, "user", request.query)
+    conversation_memory.add_turn(request.user_id, "assistant", response_text)
+
+# Intents answered by NeMo, token by token on /api/chat/stream
+LLM_INTENTS = ("reasoning", "chitchat")
+
+def llm_payload(intent: str, response_text: str) -> dict:
+    if intent == "reasoning":
+        return {"context": "knowledge_graph_lookup", "response_text": response_text}
+    return {"response_text": response_text}
+
+def build_chat_response(intent: str, response_text: str, data_payload: dict) -> ChatResponse:
     # Adapt for Thesys Generative UI
     thesys_adapter = ThesysMockAdapter()
     ui_schema = thesys_adapter.adapt_response(intent, data_payload)
@@ -154,6 +346,88 @@ async def chat_endpoint(request: ChatRequest):
         agent_used=intent
     )
 
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Streaming variant of /api/chat (NDJSON, one event per line):
+    {"type": "intent"}, then {"type": "token"} for LLM answers as they are
+    generated, or {"type": "ui"} fragments for movie ingestion as each source
+    returns (nodes carry an "id" to replace), then {"type": "final"} carrying
+    the same body as /api/chat.
+    """
+    decision = await rate_limiter.check("chat", request.user_id)
+    if not decision.allowed:
+        final = await limited_chat(request, decision)
+        event = json.dumps({"type": "final", **final.model_dump()}) + "\n"
+        return StreamingResponse(iter([event]), media_type="application/x-ndjson",
+                                 headers={"Retry-After": str(final.data["retry_after"])})
+
+    async def events():
+        # No disconnect polling here: the response is cancelled when the client goes,
+        # which closes the fan-out; a newer query from the same user supersedes this one
+        with supervisor.track(request.user_id) as abandoned:
+            start = time.perf_counter()
+            intent = await router.route_query(request.query)
+            yield json.dumps({"type": "intent", "agent_used": intent}) + "\n"
+
+            if intent in LLM_INTENTS:
+                parts = []
+                context = await conversation_memory.build_context(request.user_id, request.query, srt_manager.movie)
+                async for token in nemo.stream_response(request.query, context, scope=srt_manager.movie):
+                    if not parts:
+                        ttft_ms = round((time.perf_counter() - start) * 1000, 1)
+                        yield json.dumps({"type": "ttft", "ms": ttft_ms}) + "\n"
+                    parts.append(token)
+                    yield json.dumps({"type": "token", "text": token}) + "\n"
+                response_text = "".join(parts)
+                await remember_turn(request, response_text)
+                final = build_chat_response(intent, response_text, llm_payload(intent, response_text))
+            elif intent == "ingestion":
+                # Progressive UI: one fragment per source as soon as it returns, so the card
+                # appears at the speed of the fastest source instead of the slowest
+                adapter = ThesysMockAdapter()
+                results, status = {}, {}
+                async with aclosing(ingest_sources(request, results, status, abandoned)) as sources:
+                    async for result in sources:
+                        source_status = result.status
+                        if result.name == "subtitles" and source_status == "ok" and not result.value:
+                            source_status = "missing"
+                        fragment = adapter.adapt_partial(result.name, ingestion_payload(results, status), source_status)
+                        if fragment:
+                            yield json.dumps({"type": "ui", "source": result.name, "status": source_status,
+                                              "ms": result.ms, "ui_schema": fragment}) + "\n"
+                response_text, data_payload = await finish_ingestion(request, results, status)
+                await remember_turn(request, response_text)
+                final = build_chat_response(intent, response_text, data_payload)
+            else:
+                final = await run_chat(request, intent, abandoned)
+
+            yield json.dumps({"type": "final", **final.model_dump()}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.get("/api/image")
+async def image_endpoint(url: str, http_request: Request, w: int = DEFAULT_IMAGE_WIDTH):
+    """
+    Resized, cached copy of a card image (Fanart.tv / Wikimedia only).
+    WebP when the browser accepts it, JPEG otherwise.
+    """
+    fmt = image_proxy.pick_format(http_request.headers.get("accept", ""))
+    try:
+        w, fmt, etag = image_proxy.variant(url, w, fmt)
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept"}
+        if etag in http_request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        body, content_type, _ = await image_proxy.get(url, w, fmt)
+    except ImageProxyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return Response(content=body, media_type=content_type, headers=headers)
+
+# Prefetched context shown on a /api/sync card (the card is a few lines, not an article)
+CARD_SUMMARY_TOKENS = 60
+CARD_FACTS = 2
+CARD_FACT_TOKENS = 30
+
 class SyncRequest(BaseModel):
     timestamp_seconds: float
 
@@ -163,8 +437,16 @@ async def sync_endpoint(request: SyncRequest):
     Returns the context UI for a specific timestamp (seconds).
     """
     sub = srt_manager.get_subtitle_at_time(request.timestamp_seconds)
-    
-    scene_theme = scene_agent.get_current_theme()
+
+    # LOOK-AHEAD: warm context for entities in the upcoming lines, so their cards are ready when spoken
+    upcoming = srt_manager.get_subtitles_between(request.timestamp_seconds, request.timestamp_seconds + prefetcher.lookahead)
+    prefetched = prefetcher.schedule(srt_manager.movie, upcoming)
+
+    # SCENE ANALYSIS: mood of the lines leading up to this moment. Derived from the
+    # (shared) track rather than from the syncs this worker happened to serve.
+    recent = srt_manager.get_subtitles_before(request.timestamp_seconds, scene_agent.buffer.maxlen)
+    scene_agent.reset(line["text"] for line in recent)
+    scene_theme = await scene_agent.analyze_scene()
     
     if not sub:
         return {"ui_schema": [], "subtitle": None, "logs": [], "theme": scene_theme}
@@ -172,49 +454,13 @@ async def sync_endpoint(request: SyncRequest):
     # LOGIC: Extract keywords from subtitle to simulate "Context"
     text = sub["text"]
     
-    # Naive entity extraction for demo
-    detected_entity = "Unknown"
-    summary = "Context loading..."
-    context_type = "ingestion" # Default
-    
+    # Naive entity extraction for demo (see entity_catalog)
     # GENERATIVE UI LOGIC:
     # We decide the "Type" of UI to render based on the context.
-    
-    if "Neo" in text:
-        detected_entity = "Neo"
-        summary = "Thomas A. Anderson, also known as Neo, is the protagonist."
-        context_type = "ingestion" # Standard Card, but we'll try to find an image
-        
-    elif "Thanos" in text:
-        detected_entity = "Thanos"
-        context_type = "mindmap"
-        summary = "The Mad Titan."
-        
-    elif "Thor" in text:
-        detected_entity = "Thor"
-        context_type = "ingestion"
-        summary = "God of Thunder."
-
-    elif "Matrix" in text:
-        detected_entity = "The Matrix"
-        summary = "A simulated reality created by sentient machines to subdue the human population."
-        context_type = "ingestion"
-        
-    elif "blue pill" in text:
-        detected_entity = "Blue Pill"
-        summary = "Choosing the Blue Pill means returning to the simulated reality of the Matrix."
-        context_type = "ingestion"
-
-    elif "red pill" in text:
-        detected_entity = "Red Pill"
-        summary = "Choosing the Red Pill reveals the truth about the Matrix."
-        context_type = "ingestion"
-        
-    elif "Morpheus" in text:
-        # SHOWCASE: MINDMAP GENERATION
-        detected_entity = "Morpheus"
-        context_type = "mindmap"
-        summary = "Captain of the Nebuchadnezzar."
+    entity = detect_entity(text) or {"name": "Unknown", "context_type": "ingestion", "summary": "Context loading..."}
+    detected_entity = entity["name"]
+    context_type = entity["context_type"]
+    warmed = prefetcher.get(srt_manager.movie, detected_entity) if detected_entity != "Unknown" else None
 
     # Generate Thesys UI for this context
     # We reuse the "ingestion" adapter logic but with context data
@@ -224,41 +470,22 @@ async def sync_endpoint(request: SyncRequest):
     
     if context_type == "mindmap":
         # Dynamic Knowledge Graph Construction
-        if detected_entity == "Morpheus":
-            data_payload = {
-                "center": detected_entity,
-                "relations": [
-                    {"relation": "Captain of", "label": "Nebuchadnezzar"},
-                    {"relation": "Mentor to", "label": "Neo"},
-                    {"relation": "Enemy of", "label": "Agents"},
-                    {"relation": "Believes in", "label": "The One"}
-                ]
-            }
-        elif detected_entity == "Thanos":
-             data_payload = {
-                "center": "Thanos",
-                "relations": [
-                    {"relation": "Wields", "label": "Infinity Gauntlet"},
-                    {"relation": "Seeks", "label": "Balance"},
-                    {"relation": "Enemy of", "label": "Avengers"},
-                    {"relation": "Daughter", "label": "Gamora"}
-                ]
-            }
+        if entity.get("relations"):
+            data_payload = {"center": detected_entity, "relations": entity["relations"]}
     else:
         # Standard Card
-        # In a real app, we'd query the DB for the Fanart we found earlier
-        # Here we mock it for the high-fidelity demo
-        image_url = None
-        if detected_entity == "Neo":
-            image_url = "https://images.fanart.tv/fanart/the-matrix-523ce51b89944.jpg" 
-        elif detected_entity == "Thor":
-            image_url = "https://images.fanart.tv/fanart/avengers-infinity-war-5ac5e1657803e.jpg"
-        elif detected_entity == "The Matrix":
-            image_url = "https://images.fanart.tv/fanart/the-matrix-5979c6d66e762.jpg"
+        # Curated image first, then the movie's Fanart warmed by the prefetcher
+        image_url = entity.get("image_url") or (warmed or {}).get("image_url")
+        # Curated summary, then what the prefetcher found: the Wikipedia summary and related facts
+        context = f"Context: {entity['summary']}"
+        if warmed and warmed.get("summary"):
+            context += f"\n\n{truncate_to_tokens(warmed['summary'], CARD_SUMMARY_TOKENS)}"
+        if warmed and warmed.get("facts"):
+            context += "\n\nRelated: " + " | ".join(truncate_to_tokens(f, CARD_FACT_TOKENS) for f in warmed["facts"][:CARD_FACTS])
 
         data_payload = {
             "title": detected_entity,
-            "summary": f"Line: \"{text}\"\n\nContext: {summary}",
+            "summary": f"Line: \"{text}\"\n\n{context}",
             "url": "#timestamp",
             "images": [image_url] if image_url else []
         }
@@ -273,10 +500,12 @@ async def sync_endpoint(request: SyncRequest):
         f"[SRT] Active Subtitle Index: {sub['index']}",
         f"[NLP] Entity Extraction: '{detected_entity}'",
     ]
+    if prefetched:
+        system_logs.append(f"[PREFETCH] Warming {prefetched} upcoming entities (next {prefetcher.lookahead:.0f}s)")
+    if warmed:
+        system_logs.append(f"[PREFETCH] Context ready for '{detected_entity}'"
+                           f" (summary: {'yes' if warmed.get('summary') else 'no'}, {len(warmed['facts'])} related facts)")
     
-    # SCENE ANALYSIS
-    scene_agent.add_line(text)
-    scene_theme = await scene_agent.analyze_scene()
     system_logs.append(f"[AGENT] Scene Theme: {scene_theme.upper()}")
 
     if context_type == "mindmap":
@@ -293,6 +522,87 @@ async def sync_endpoint(request: SyncRequest):
         "theme": scene_theme
     }
 
+class SearchRequest(BaseModel):
+    query: str
+    movie: Optional[str] = None
+    k: int = Field(5, ge=1, le=100)
+    user_id: Optional[str] = None
+
+@app.post("/api/search")
+async def search_endpoint(request: SearchRequest, http_request: Request):
+    """
+    Semantic scene search over ingested subtitle chunks (in-process vector index).
+    """
+    # Every search embeds the query (Fireworks when configured): rate limited per user, or per client address
+    decision = await rate_limiter.check("search", request.user_id or (http_request.client.host if http_request.client else "anonymous"))
+    if not decision.allowed:
+        raise HTTPException(status_code=429, detail="Too many searches",
+                            headers={"Retry-After": str(max(1, round(decision.retry_after)))})
+
+    vector = await vector_agent.generate_embedding(request.query)
+    if vector is None:
+        raise HTTPException(status_code=503, detail="Embedding backend unavailable")
+
+    matches = vector_index.search(vector, k=request.k, movie=request.movie)
+    return {
+        "query": request.query,
+        "index_mode": vector_index.mode,
+        "results": [
+            {
+                "id": m["id"],
+                "movie": m["movie"],
+                "text": m["text"],
+                "score": m["score"],
+                "start_ms": int(round(m["start"] * 1000)),
+                "end_ms": int(round(m["end"] * 1000))
+            }
+            for m in matches
+        ]
+    }
+
+class QuoteRequest(BaseModel):
+    query: str
+    movie: Optional[str] = None
+    k: int = Field(10, ge=1, le=100)
+    phrase: bool = False
+    fuse_vector: bool = False
+    user_id: Optional[str] = None
+
+@app.post("/api/quote")
+async def quote_endpoint(request: QuoteRequest, http_request: Request):
+    """
+    "When does X say Y?" - BM25 / exact-phrase lookup over indexed subtitle cues.
+    Wrap words in double quotes for exact phrases; fuse_vector adds semantic hits (RRF).
+    """
+    if request.fuse_vector:
+        # Embeds the query like /api/search does, so it shares that route's limit
+        decision = await rate_limiter.check("search", request.user_id or (http_request.client.host if http_request.client else "anonymous"))
+        if not decision.allowed:
+            raise HTTPException(status_code=429, detail="Too many searches",
+                                headers={"Retry-After": str(max(1, round(decision.retry_after)))})
+
+    hits = quote_index.search(request.query, k=request.k, movie=request.movie, phrase=request.phrase)
+
+    if request.fuse_vector:
+        vector = await vector_agent.generate_embedding(request.query)
+        if vector is not None:
+            vector_hits = vector_index.search(vector, k=request.k, movie=request.movie)
+            hits = reciprocal_rank_fusion(hits, vector_hits, k=request.k)
+
+    return {
+        "query": request.query,
+        "results": [
+            {
+                "movie": h["movie"],
+                "text": h["text"],
+                "score": h.get("rrf", h["score"]),
+                "start_ms": int(round(h["start"] * 1000)),
+                "end_ms": int(round(h["end"] * 1000))
+            }
+            for h in hits
+        ]
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("backend.app.main:app", host="0.0.0.0", port=8000, reload=True)
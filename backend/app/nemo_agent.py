@@ -1,46 +1,166 @@
 import os
-import fireworks.client
-from typing import Dict, Any
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Any, List, Optional
+from backend.app.semantic_cache import semantic_cache
+from backend.app.chunker import estimate_tokens
+from backend.app.rate_limiter import upstream_guard, UpstreamLimited
+
+_clients: Dict[str, Any] = {}
+
+def fireworks_client(api_key: str):
+    """
+    Shared async Fireworks client (one connection pool per key).
+    Imported on first use: the SDK adds ~1s to cold start.
+    """
+    if api_key not in _clients:
+        from fireworks import AsyncFireworks
+        _clients[api_key] = AsyncFireworks(api_key=api_key)
+    return _clients[api_key]
 
 class NeMoAgent:
     """
     Wrapper for 'NeMo' conversational AI capabilities, powered by Fireworks.ai for this demo.
     """
+    model = "accounts/fireworks/models/mixtral-8x7b-instruct"
+
     def __init__(self):
         self.api_key = os.getenv("FIREWORKS_API_KEY")
-        if self.api_key:
-            fireworks.client.api_key = self.api_key
-        else:
+        if not self.api_key:
             print("⚠️ NeMoAgent: No FIREWORKS_API_KEY found. Running in basic Mock mode.")
+        self.completions = 0
+        self.failures = 0
+        self.limited = 0 # Refused by the Fireworks bulkhead
+        self.ttft_ms = deque(maxlen=512) # Time to first token, recent completions
+        self.total_ms = deque(maxlen=512)
+        self.prompt_tokens = deque(maxlen=512)
+
+    def _messages(self, user_query: str, context: Dict[str, Any] = None) -> List[Dict[str, str]]:
+        # Construct a prompt that encourages "Generative UI" thinking
+        system_prompt = (
+            "You are an advanced Movie Database Assistant. "
+            "You help users explore movies, actors, and trivia. "
+            "Keep your answers concise, witty, and engaging."
+        )
+        history: List[Dict[str, str]] = []
+        if context and "history" in context:
+            # Bounded conversation state from ConversationMemory
+            if context.get("movie"):
+                system_prompt += f"\nThe user is watching: {context['movie']}."
+            if context.get("summary"):
+                system_prompt += f"\nEarlier in this conversation: {context['summary']}"
+            if context.get("facts"):
+                system_prompt += "\nRelevant facts:\n" + "\n".join(f"- {fact}" for fact in context["facts"])
+            history = context["history"]
+        elif context:
+            system_prompt += f"\nContext: {context}"
+        return [
+            {"role": "system", "content": system_prompt},
+            *history,
+            {"role": "user", "content": user_query}
+        ]
+
+    @staticmethod
+    def _cacheable(context: Dict[str, Any] = None) -> bool:
+        # Answers that depend on earlier turns must not be shared through the semantic cache
+        return not context or ("history" in context and not context["history"] and not context.get("summary"))
 
-    async def generate_response(self, user_query: str, context: Dict[str, Any] = None) -> str:
+    async def _stream_completion(self, messages: List[Dict[str, str]], max_tokens: int = 200) -> AsyncIterator[str]:
+        # The slot is held until the stream is consumed
+        async with upstream_guard.guard("fireworks"):
+            stream = await fireworks_client(self.api_key).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def stream_response(self, user_query: str, context: Dict[str, Any] = None,
+                              scope: Optional[str] = None) -> AsyncIterator[str]:
         """
-        Generates a conversational response based on user query and context.
+        Yields the response as it is generated, token by token, without blocking the event loop.
+        Context-free questions are answered from the semantic cache when a paraphrase
+        was already answered for the same movie (scope).
         """
         if not self.api_key:
-             return f"I understand you are asking about '{user_query}'. (Add FIREWORKS_API_KEY to .env for real AI responses)"
+            yield f"I understand you are asking about '{user_query}'. (Add FIREWORKS_API_KEY to .env for real AI responses)"
+            return
 
+        vector = None
+        cacheable = self._cacheable(context)
+        if cacheable:
+            cached, vector = await semantic_cache.lookup(user_query, scope)
+            if cached is not None:
+                yield cached
+                return
+
+        messages = self._messages(user_query, context)
+        self.prompt_tokens.append(sum(estimate_tokens(m["content"]) for m in messages))
+        start = time.perf_counter()
+        parts: List[str] = []
         try:
-            # Construct a prompt that encourages "Generative UI" thinking
-            system_prompt = (
-                "You are an advanced Movie Database Assistant. "
-                "You help users explore movies, actors, and trivia. "
-                "Keep your answers concise, witty, and engaging."
-            )
-            
-            completion = fireworks.client.ChatCompletion.create(
-                model="accounts/fireworks/models/mixtral-8x7b-instruct",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_query}
-                ],
-                temperature=0.7,
-                max_tokens=200
-            )
-            return completion.choices[0].message.content
+            async for token in self._stream_completion(messages):
+                if not parts:
+                    self.ttft_ms.append((time.perf_counter() - start) * 1000)
+                parts.append(token)
+                yield token
+        except UpstreamLimited as e:
+            print(f"🚦 NeMo: {e}")
+            self.limited += 1
+            if not parts:
+                yield f"I'm answering a lot of questions right now. Please ask again in {max(1, round(e.retry_after))}s."
+            return
         except Exception as e:
             print(f"❌ NeMo (Fireworks) Error: {e}")
-            return "I'm having trouble connecting to my knowledge base right now."
+            self.failures += 1
+            if not parts:
+                yield "I'm having trouble connecting to my knowledge base right now."
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.completions += 1
+        self.total_ms.append(elapsed_ms)
+        if cacheable and parts:
+            await semantic_cache.store(user_query, "".join(parts), scope, vector=vector, cost_ms=elapsed_ms)
+
+    async def generate_response(self, user_query: str, context: Dict[str, Any] = None,
+                                scope: Optional[str] = None) -> str:
+        """
+        Generates a conversational response based on user query and context.
+        """
+        return "".join([token async for token in self.stream_response(user_query, context, scope)])
+
+    async def summarize(self, previous: str, transcript: str, max_tokens: int) -> Optional[str]:
+        """
+        Folds transcript lines into the previous rolling summary. None in mock mode.
+        """
+        if not self.api_key:
+            return None
+        messages = [
+            {"role": "system", "content": "Summarize the conversation between a user and a movie assistant in under "
+                                          f"{max_tokens} tokens. Keep names, movies and open questions."},
+            {"role": "user", "content": f"Summary so far: {previous or '(none)'}\n\nNew messages:\n{transcript}"}
+        ]
+        return "".join([token async for token in self._stream_completion(messages, max_tokens=max_tokens)]).strip()
+
+    def stats(self) -> Dict[str, Any]:
+        def pct(samples, p):
+            ordered = sorted(samples)
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1) if ordered else None
+        return {
+            "completions": self.completions,
+            "failures": self.failures,
+            "limited": self.limited,
+            "ttft_ms_p50": pct(self.ttft_ms, 0.5),
+            "ttft_ms_p95": pct(self.ttft_ms, 0.95),
+            "total_ms_p50": pct(self.total_ms, 0.5),
+            "prompt_tokens_p50": pct(self.prompt_tokens, 0.5),
+            "prompt_tokens_max": max(self.prompt_tokens) if self.prompt_tokens else None,
+        }
 
     async def analyze_sentiment(self, text: str) -> str:
         # Simple keywords for now
@@ -50,14 +170,12 @@ class NeMoAgent:
         return "neutral"
 
 if __name__ == "__main__":
-    agent = NeMoAgent()
     import asyncio
-    # Simple synchronous test for main
-    if agent.api_key:
-        try:
-             # Fireworks sync client check
-             print(str(agent.generate_response("Tell me about Inception"))) # warning: this is async method called syncish if used directly without await in script
-        except:
-             pass 
-    else:
-        print("Mock mode test.")
+
+    async def main():
+        agent = NeMoAgent()
+        async for token in agent.stream_response("Tell me about Inception"):
+            print(token, end="", flush=True)
+        print(f"\n{agent.stats()}")
+
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from backend.app.entity_catalog import entities_in
+from backend.app.thesys_adapter import ThesysMockAdapter
+
+PREFETCH_LOOKAHEAD_SECONDS = float(os.getenv("PREFETCH_LOOKAHEAD_SECONDS", "30"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+PREFETCH_CACHE_SIZE = int(os.getenv("PREFETCH_CACHE_SIZE", "512"))
+PREFETCH_TTL_SECONDS = int(os.getenv("PREFETCH_TTL_SECONDS", "1800"))
+
+class EntityPrefetcher:
+    """
+    Look-ahead for /api/sync: scans the next `lookahead` seconds of the loaded
+    track for catalog entities and warms their context in the background:
+    - the movie's Fanart assets (FanartAgent cache),
+    - the entity's Wikipedia summary (read-only lookup, WikipediaAgent cache),
+    - its graph neighbourhood (facts linked to it in MongoDB).
+    Work is keyed by (movie, entity), so viewers of the same movie share it;
+    at most `concurrency` lookups run at once.
+    """
+    def __init__(self, lookahead: float = PREFETCH_LOOKAHEAD_SECONDS,
+                 concurrency: int = PREFETCH_CONCURRENCY,
+                 max_entries: int = PREFETCH_CACHE_SIZE, ttl: int = PREFETCH_TTL_SECONDS,
+                 wiki_agent=None, fanart_agent=None):
+        self.lookahead = lookahead
+        self.concurrency = concurrency
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.wiki_agent = wiki_agent
+        self.fanart_agent = fanart_agent
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._ready: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"scheduled": 0, "deduplicated": 0, "warmed": 0, "failures": 0, "hits": 0, "misses": 0}
+
+    def _agents(self):
+        # Constructed on first use (same lazy agents as the API)
+        if self.wiki_agent is None:
+            from backend.app.ingestion.wikipedia_agent import WikipediaAgent
+            self.wiki_agent = WikipediaAgent()
+        if self.fanart_agent is None:
+            from backend.app.ingestion.fanart_agent import FanartAgent
+            self.fanart_agent = FanartAgent()
+        return self.wiki_agent, self.fanart_agent
+
+    def _fresh(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        entry = self._ready.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry["warmed_at"] > self.ttl:
+            del self._ready[key]
+            return None
+        return entry
+
+    def schedule(self, movie: Optional[str], cues: List[Dict[str, Any]]) -> int:
+        """
+        Starts background lookups for the entities in `cues` (the upcoming window).
+        Returns how many new lookups were started; call from the event loop.
+        """
+        if not movie:
+            return 0
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        started = 0
+        for cue in cues:
+            for entity in entities_in(cue["text"]):
+                key = (movie, entity["name"])
+                if key in self._inflight or self._fresh(key) is not None:
+                    self.stats["deduplicated"] += 1
+                    continue
+                task = asyncio.get_running_loop().create_task(self._warm(movie, entity, cue["start"]))
+                self._inflight[key] = task
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                self.stats["scheduled"] += 1
+                started += 1
+        return started
+
+    async def _warm(self, movie: str, entity: Dict[str, Any], spoken_at: float):
+        key = (movie, entity["name"])
+        try:
+            async with self._semaphore:
+                wiki_agent, fanart_agent = self._agents()
+                query = entity["name"] if entity["name"].lower() in movie.lower() else f"{entity['name']} {movie}"
+                from backend.app.conversation_memory import conversation_memory
+                wiki, fanart, facts = await asyncio.gather(
+                    wiki_agent.lookup_summary(query), # Read-only: entities are not movies
+                    fanart_agent.get_movie_assets(movie_name=movie),
+                    conversation_memory.retrieve_facts(entity["name"], movie),
+                    return_exceptions=True
+                )
+            failed = [r for r in (wiki, fanart, facts) if isinstance(r, Exception)]
+            if failed:
+                print(f"⚠️ Prefetch: {len(failed)} lookup(s) failed for '{entity['name']}': {failed[0]}")
+                self.stats["failures"] += 1
+
+            wiki = wiki if isinstance(wiki, dict) and "error" not in wiki else {}
+            assets = fanart.get("assets", {}) if isinstance(fanart, dict) else {}
+            self._ready[key] = {
+                "summary": wiki.get("summary"),
+                "image_url": ThesysMockAdapter._fanart_image(assets),
+                "facts": facts if isinstance(facts, list) else [],
+                "spoken_at": spoken_at,
+                "warmed_at": time.monotonic()
+            }
+            self._ready.move_to_end(key)
+            while len(self._ready) > self.max_entries:
+                self._ready.popitem(last=False)
+            self.stats["warmed"] += 1
+        finally:
+            self._inflight.pop(key, None)
+
+    def get(self, movie: Optional[str], name: str) -> Optional[Dict[str, Any]]:
+        """
+        Prefetched context for an entity, or None if it was not warmed (yet).
+        """
+        entry = self._fresh((movie, name)) if movie else None
+        self.stats["hits" if entry else "misses"] += 1
+        return entry
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "ready": len(self._ready), "inflight": len(self._inflight)}
+
+# Global instance
+prefetcher = EntityPrefetcher()
@@ -0,0 +1,207 @@
+import re
+import math
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from backend.app.database import db
+from backend.app.helpers.cleaner import DataCleanerAgent
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class QuoteIndex:
+    """
+    In-memory positional inverted index over cleaned subtitle cues.
+    Answers "when does X say Y?" with BM25 ranking and exact-phrase matching
+    ("quoted" parts of a query), mapping every hit back to its cue timing.
+    Tracks are added incrementally; re-adding a movie replaces its cues.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.cleaner = DataCleanerAgent()
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self.docs: Dict[int, Dict[str, Any]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.doc_terms: Dict[int, List[str]] = {}
+        self.tracks: Dict[str, List[int]] = {}
+        self.total_length = 0
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    @staticmethod
+    def _cue_fields(cue: Any) -> Dict[str, Any]:
+        """
+        Accepts pysrt items or {"text", "start", "end", "index"} dicts (seconds).
+        """
+        if isinstance(cue, dict):
+            return cue
+        return {
+            "text": cue.text,
+            "start": cue.start.ordinal / 1000.0,
+            "end": cue.end.ordinal / 1000.0,
+            "index": cue.index
+        }
+
+    def remove_track(self, movie: str):
+        for doc_id in self.tracks.pop(movie, []):
+            for term in self.doc_terms.pop(doc_id):
+                postings = self.postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            del self.docs[doc_id]
+
+    def prepare(self, cues: Iterable[Any]) -> List[Tuple[Dict[str, Any], str, List[str]]]:
+        """
+        Cleans and tokenizes a track's cues without touching the index (safe off the event loop).
+        """
+        cues = [self._cue_fields(cue) for cue in cues]
+        cleaned = self.cleaner.clean_batch([cue["text"] for cue in cues])
+        return [(fields, text, tokenize(text)) for fields, text in zip(cues, cleaned)]
+
+    def add_track(self, movie: str, cues: Iterable[Any], prepared: bool = False) -> int:
+        """
+        Indexes every cue of a track (or the output of prepare()). Returns the number of cues indexed.
+        """
+        self.remove_track(movie)
+        doc_ids = []
+        for fields, text, tokens in (cues if prepared else self.prepare(cues)):
+            if not tokens:
+                continue
+
+            doc_id = self._next_id
+            self._next_id += 1
+            for position, term in enumerate(tokens):
+                self.postings.setdefault(term, {}).setdefault(doc_id, []).append(position)
+            self.docs[doc_id] = {
+                "movie": movie,
+                "text": text,
+                "start": fields["start"],
+                "end": fields["end"],
+                "index": fields.get("index")
+            }
+            self.doc_lengths[doc_id] = len(tokens)
+            self.doc_terms[doc_id] = list(dict.fromkeys(tokens))
+            self.total_length += len(tokens)
+            doc_ids.append(doc_id)
+
+        self.tracks[movie] = doc_ids
+        print(f"🔎 QuoteIndex: Indexed {len(doc_ids)} cues for '{movie}' ({len(self.docs)} total).")
+        return len(doc_ids)
+
+    def _phrase_docs(self, terms: List[str], candidates: Optional[set]) -> set:
+        """
+        Docs containing `terms` at consecutive positions.
+        """
+        lists = [self.postings.get(t) for t in terms]
+        if not terms or any(p is None for p in lists):
+            return set()
+        # Intersect starting from the rarest term
+        docs = set(min(lists, key=len))
+        for postings in lists:
+            docs.intersection_update(postings)
+        if candidates is not None:
+            docs &= candidates
+
+        matched = set()
+        for doc_id in docs:
+            starts = set(lists[0][doc_id])
+            for offset, postings in enumerate(lists[1:], start=1):
+                starts &= {p - offset for p in postings[doc_id]}
+                if not starts:
+                    break
+            if starts:
+                matched.add(doc_id)
+        return matched
+
+    def search(self, query: str, k: int = 10, movie: Optional[str] = None, phrase: bool = False) -> List[Dict[str, Any]]:
+        """
+        BM25 search. Quoted segments (or the whole query when phrase=True)
+        must appear verbatim; all terms contribute to the score.
+        """
+        phrases = [tokenize(p) for p in PHRASE_PATTERN.findall(query)]
+        if phrase and not phrases:
+            phrases = [tokenize(query)]
+        terms = tokenize(query)
+        if not terms or not self.docs:
+            return []
+
+        candidates = set(self.tracks.get(movie, [])) if movie is not None else None
+        for phrase_terms in phrases:
+            candidates = self._phrase_docs(phrase_terms, candidates)
+            if not candidates:
+                return []
+
+        n_docs = len(self.docs)
+        avg_length = self.total_length / n_docs
+        scores: Dict[int, float] = {}
+        for term in dict.fromkeys(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, positions in postings.items():
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                tf = len(positions)
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [{"score": score, **self.docs[doc_id]} for doc_id, score in ranked]
+
+    async def build_from_db(self) -> int:
+        """
+        Indexes every raw SRT track stored in the 'subtitles' collection,
+        under the movie title it was loaded as (its query for older tracks).
+        """
+        if db.db is None:
+            return 0
+        import pysrt
+
+        tracks = 0
+        async for doc in db.reader("subtitles").find({"content": {"$exists": True}}, {"query": 1, "movie": 1, "content": 1}):
+            try:
+                # Parsing and cleaning run in a worker thread, so requests keep being served meanwhile
+                cues = await asyncio.to_thread(lambda content: self.prepare(pysrt.from_string(content)), doc["content"])
+                self.add_track(doc.get("movie") or doc["query"], cues, prepared=True)
+                tracks += 1
+            except Exception as e:
+                print(f"⚠️ QuoteIndex: Skipping track '{doc.get('query')}': {e}")
+        return tracks
+
+def reciprocal_rank_fusion(quote_hits: List[Dict[str, Any]], vector_hits: List[Dict[str, Any]],
+                           k: int = 10, rrf_k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Fuses cue-level quote hits with chunk-level vector hits (RRF).
+    A vector chunk votes for every quote hit of the same movie it overlaps in time;
+    chunks with no matching cue are kept as their own results.
+    """
+    fused: Dict[Any, Dict[str, Any]] = {}
+    for rank, hit in enumerate(quote_hits):
+        key = (hit["movie"], hit["start"], hit["end"])
+        fused[key] = {**hit, "rrf": 1.0 / (rrf_k + rank + 1), "sources": ["quote"]}
+
+    for rank, hit in enumerate(vector_hits):
+        contribution = 1.0 / (rrf_k + rank + 1)
+        overlapping = [
+            entry for (movie, start, end), entry in fused.items()
+            if movie == hit["movie"] and start < hit["end"] and end > hit["start"] and "quote" in entry["sources"]
+        ]
+        for entry in overlapping:
+            entry["rrf"] += contribution
+            entry["sources"].append("vector")
+        if not overlapping:
+            key = (hit["movie"], hit["start"], hit["end"])
+            fused[key] = {**hit, "rrf": contribution, "sources": ["vector"]}
+
+    return sorted(fused.values(), key=lambda entry: entry["rrf"], reverse=True)[:k]
+
+# Global instance
+quote_index = QuoteIndex()
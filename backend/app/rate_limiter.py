@@ -0,0 +1,242 @@
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Tuple
+
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory") # memory (per worker) | sqlite (shared by the workers of one host)
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "backend/data/rate_limits.sqlite3")
+# Per user and route: sustained "<requests>/<seconds>", plus the burst a user may spend at once
+RATE_LIMIT_CHAT = os.getenv("RATE_LIMIT_CHAT", "30/60")
+RATE_LIMIT_CHAT_BURST = int(os.getenv("RATE_LIMIT_CHAT_BURST", "10"))
+RATE_LIMIT_SEARCH = os.getenv("RATE_LIMIT_SEARCH", "60/60")
+RATE_LIMIT_SEARCH_BURST = int(os.getenv("RATE_LIMIT_SEARCH_BURST", "20"))
+# Per upstream, for everyone: concurrent calls per worker, and "<calls>/<seconds>" quotas kept in the store
+UPSTREAM_CONCURRENCY = os.getenv("UPSTREAM_CONCURRENCY", "opensubtitles=2,fireworks=8,wikipedia=8,fanart=8")
+UPSTREAM_QUOTAS = os.getenv("UPSTREAM_QUOTAS", "opensubtitles=100/86400,fireworks=600/60")
+MEMORY_STORE_MAX_KEYS = 100000
+
+def parse_rate(spec: str) -> Tuple[float, float]:
+    """
+    "30/60" -> (0.5 tokens per second, 30 tokens).
+    """
+    count, seconds = spec.split("/")
+    return float(count) / float(seconds), float(count)
+
+def parse_pairs(spec: str) -> Dict[str, str]:
+    """
+    "opensubtitles=2,fireworks=8" -> {"opensubtitles": "2", "fireworks": "8"}.
+    """
+    pairs = (item.split("=", 1) for item in (spec or "").split(",") if "=" in item)
+    return {name.strip(): value.strip() for name, value in pairs}
+
+class UpstreamLimited(Exception):
+    """
+    Raised instead of calling an upstream that is saturated ("busy") or out of quota ("quota").
+    """
+    def __init__(self, upstream: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{upstream} {reason}, retry in {retry_after:.0f}s")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+class Decision(NamedTuple):
+    allowed: bool
+    retry_after: float # Seconds until the request would be allowed (0 when allowed)
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+class MemoryBucketStore:
+    """
+    Token buckets in a dict, private to this process. Least recently used
+    keys are dropped past `max_keys` (a dropped bucket comes back full).
+    """
+    kind = "memory"
+    blocking = False
+
+    def __init__(self, max_keys: int = MEMORY_STORE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """
+        Spends `cost` tokens if available. Returns 0, or the seconds until they are.
+        """
+        now = time.time() if now is None else now
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = _refill(tokens, updated, now, rate, burst)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def close(self):
+        pass
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a local SQLite file, so every uvicorn worker on the host
+    draws from the same buckets. Each take is one short write transaction.
+    """
+    kind = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str = RATE_LIMIT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._takes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS buckets "
+                               "(key TEXT PRIMARY KEY, tokens REAL, updated REAL, full_at REAL)")
+        return self._conn
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE") # Serializes concurrent workers on this bucket
+            try:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = _refill(*row, now, rate, burst) if row else burst
+                wait = 0.0
+                if tokens >= cost:
+                    tokens -= cost
+                else:
+                    wait = (cost - tokens) / rate
+                full_at = now + (burst - tokens) / rate
+                conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)", (key, tokens, now, full_at))
+                self._takes += 1
+                if self._takes % 1000 == 0:
+                    # A bucket that has refilled is the same as no bucket
+                    conn.execute("DELETE FROM buckets WHERE full_at < ?", (now,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def make_store(kind: str = RATE_LIMIT_STORE):
+    if kind == "sqlite":
+        return SQLiteBucketStore()
+    if kind != "memory":
+        print(f"⚠️ RateLimiter: unknown RATE_LIMIT_STORE '{kind}', using memory")
+    return MemoryBucketStore()
+
+async def _take(store, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+    if store.blocking:
+        return await asyncio.to_thread(store.take, key, rate, burst, cost)
+    return store.take(key, rate, burst, cost)
+
+class RateLimiter:
+    """
+    Per-user admission control: one token bucket per (route, user_id).
+    A request spends a token; without one it is limited and told when to retry.
+    """
+    def __init__(self, store=None, limits: Optional[Dict[str, Tuple[str, int]]] = None):
+        self._store = store
+        if limits is None:
+            limits = {"chat": (RATE_LIMIT_CHAT, RATE_LIMIT_CHAT_BURST), "search": (RATE_LIMIT_SEARCH, RATE_LIMIT_SEARCH_BURST)}
+        self.limits = {route: (parse_rate(spec)[0], float(burst)) for route, (spec, burst) in limits.items()}
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"allowed": 0, "limited": 0})
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = make_store()
+        return self._store
+
+    async def check(self, route: str, user_id: str) -> Decision:
+        if route not in self.limits:
+            return Decision(True, 0.0)
+        rate, burst = self.limits[route]
+        try:
+            wait = await _take(self.store, f"user:{route}:{user_id}", rate, burst)
+        except Exception as e:
+            # A broken limiter store must not take the API down with it
+            print(f"⚠️ RateLimiter: store unavailable ({e}), admitting request")
+            wait = 0.0
+        self.stats[route]["limited" if wait else "allowed"] += 1
+        return Decision(not wait, round(wait, 2))
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+
+    def metrics(self) -> Dict[str, object]:
+        return {"store": self.store.kind, "routes": dict(self.stats)}
+
+class UpstreamGuard:
+    """
+    Bulkheads in front of the upstream APIs everyone shares. Each upstream gets
+    a concurrency cap (per worker) and optionally a call quota (token bucket in
+    the limiter store, so workers share it). Saturated calls fail fast with
+    UpstreamLimited instead of queueing; callers answer from cache or degrade.
+    """
+    def __init__(self, store=None, concurrency: str = UPSTREAM_CONCURRENCY, quotas: str = UPSTREAM_QUOTAS):
+        self._store = store
+        self.concurrency = {name: int(value) for name, value in parse_pairs(concurrency).items()}
+        self.quotas = {name: parse_rate(value) for name, value in parse_pairs(quotas).items()}
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "busy": 0, "quota": 0})
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = rate_limiter.store
+        return self._store
+
+    @asynccontextmanager
+    async def guard(self, upstream: str) -> AsyncIterator[None]:
+        """
+        Holds one of the upstream's slots for the block; raises UpstreamLimited when none is free.
+        """
+        limit = self.concurrency.get(upstream)
+        if limit is not None and self.in_flight[upstream] >= limit:
+            self.stats[upstream]["busy"] += 1
+            raise UpstreamLimited(upstream, "busy")
+        self.in_flight[upstream] += 1
+        try:
+            if upstream in self.quotas:
+                rate, burst = self.quotas[upstream]
+                try:
+                    wait = await _take(self.store, f"upstream:{upstream}", rate, burst)
+                except Exception as e:
+                    print(f"⚠️ UpstreamGuard: store unavailable ({e}), not enforcing the {upstream} quota")
+                    wait = 0.0
+                if wait:
+                    self.stats[upstream]["quota"] += 1
+                    raise UpstreamLimited(upstream, "quota", wait)
+            self.stats[upstream]["calls"] += 1
+            yield
+        finally:
+            self.in_flight[upstream] -= 1
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        return {name: {**self.stats[name], "in_flight": self.in_flight[name], "limit": self.concurrency.get(name)}
+                for name in set(self.concurrency) | set(self.stats)}
+
+# Global instances (sharing one store)
+rate_limiter = RateLimiter()
+upstream_guard = UpstreamGuard()
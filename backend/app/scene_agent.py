@@ -18,6 +18,12 @@ class SceneBufferAgent:
         if text and text not in self.buffer:
            self.buffer.append(text)
 
+    def reset(self, lines):
+        """Replaces the buffer with the given lines (oldest first)."""
+        self.buffer.clear()
+        for text in lines:
+            self.add_line(text)
+
     async def analyze_scene(self) -> str:
         """
         Analyzes the buffered text to determine the mood.
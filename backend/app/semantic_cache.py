@@ -0,0 +1,160 @@
+import os
+import re
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "2000"))
+
+GLOBAL_SCOPE = "_global"
+
+class _Scope:
+    """
+    Cached answers for one movie: a dense matrix of unit query vectors plus parallel lists.
+    """
+    def __init__(self, dimensions: int):
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self.queries: List[str] = []
+        self.responses: List[str] = []
+        self.created: List[float] = []
+        self.cost_ms: List[float] = []
+        self.exact: Dict[str, int] = {}
+
+class SemanticCache:
+    """
+    Reuses LLM answers for paraphrased questions ("who is Thanos?" / "who's Thanos").
+    Lookups try the normalized query text first, then cosine similarity between
+    query embeddings within the same movie scope. Entries expire after the TTL.
+    The right threshold depends on the embedding backend: the local n-gram
+    embedder only matches near-identical wording, Fireworks embeddings also
+    match rephrasings.
+    """
+    def __init__(self, embedder=None, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl_seconds: int = SEMANTIC_CACHE_TTL_SECONDS, max_entries: int = SEMANTIC_CACHE_SIZE):
+        self._embedder = embedder
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._scopes: Dict[str, _Scope] = {}
+        self.stats = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0,
+                      "stores": 0, "expired": 0, "saved_ms": 0.0, "lookup_ms": 0.0}
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from backend.app.vector_agent import VectorEmbeddingAgent
+            self._embedder = VectorEmbeddingAgent()
+        return self._embedder
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", query.lower())).strip()
+
+    def _expired(self, scope: _Scope, i: int, now: float) -> bool:
+        return now - scope.created[i] > self.ttl_seconds
+
+    def _compact(self, scope: _Scope, now: float):
+        keep = [i for i in range(len(scope.queries)) if not self._expired(scope, i, now)][-self.max_entries:]
+        self.stats["expired"] += len(scope.queries) - len(keep)
+        scope.vectors = scope.vectors[keep]
+        for name in ("queries", "responses", "created", "cost_ms"):
+            values = getattr(scope, name)
+            setattr(scope, name, [values[i] for i in keep])
+        scope.exact = {q: i for i, q in enumerate(scope.queries)}
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        vector = await self.embedder.generate_embedding(text)
+        if vector is None:
+            return None
+        v = np.asarray(vector, dtype=np.float32)
+        return v / max(float(np.linalg.norm(v)), 1e-12)
+
+    async def lookup(self, query: str, scope: Optional[str] = None) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Returns (cached response or None, query vector). Pass the vector back to
+        store() on a miss so the query is not embedded twice.
+        """
+        start = time.perf_counter()
+        self.stats["lookups"] += 1
+        entries = self._scopes.get(scope or GLOBAL_SCOPE)
+        now = time.time()
+        key = self.normalize(query)
+
+        # Fast path: same question, modulo case/punctuation/whitespace
+        i = entries.exact.get(key) if entries else None
+        if i is not None and not self._expired(entries, i, now):
+            return self._hit("exact_hits", entries, i, start), None
+
+        vector = await self._embed(key)
+        if entries and vector is not None and len(entries.queries) and vector.shape[0] == entries.vectors.shape[1]:
+            scores = entries.vectors @ vector
+            i = int(scores.argmax())
+            if scores[i] >= self.threshold and not self._expired(entries, i, now):
+                return self._hit("semantic_hits", entries, i, start), vector
+
+        self.stats["misses"] += 1
+        self.stats["lookup_ms"] += (time.perf_counter() - start) * 1000
+        return None, vector
+
+    def _hit(self, kind: str, entries: _Scope, i: int, start: float) -> str:
+        lookup_ms = (time.perf_counter() - start) * 1000
+        self.stats[kind] += 1
+        self.stats["lookup_ms"] += lookup_ms
+        self.stats["saved_ms"] += max(0.0, entries.cost_ms[i] - lookup_ms)
+        return entries.responses[i]
+
+    async def store(self, query: str, response: str, scope: Optional[str] = None,
+                    vector: Optional[np.ndarray] = None, cost_ms: float = 0.0):
+        """
+        Caches a generated response. cost_ms (how long generation took) feeds the saved-latency metric.
+        """
+        key = self.normalize(query)
+        if vector is None:
+            vector = await self._embed(key)
+        if vector is None:
+            return
+
+        name = scope or GLOBAL_SCOPE
+        entries = self._scopes.get(name)
+        if entries is None or entries.vectors.shape[1] != vector.shape[0]:
+            entries = self._scopes[name] = _Scope(vector.shape[0])
+
+        if key in entries.exact:
+            i = entries.exact[key]
+            entries.vectors[i], entries.responses[i] = vector, response
+            entries.created[i], entries.cost_ms[i] = time.time(), cost_ms
+        else:
+            entries.exact[key] = len(entries.queries)
+            entries.vectors = np.vstack([entries.vectors, vector[None, :]])
+            entries.queries.append(key)
+            entries.responses.append(response)
+            entries.created.append(time.time())
+            entries.cost_ms.append(cost_ms)
+        self.stats["stores"] += 1
+
+        if len(entries.queries) > self.max_entries:
+            self._compact(entries, time.time())
+
+    def invalidate(self, scope: Optional[str] = None):
+        """
+        Drops one movie's answers (or everything when scope is None).
+        """
+        if scope is None:
+            self._scopes.clear()
+        else:
+            self._scopes.pop(scope, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        return {
+            **self.stats,
+            "saved_ms": round(self.stats["saved_ms"], 1),
+            "lookup_ms": round(self.stats["lookup_ms"], 1),
+            "hit_rate": round(hits / self.stats["lookups"], 3) if self.stats["lookups"] else 0.0,
+            "entries": sum(len(s.queries) for s in self._scopes.values()),
+        }
+
+# Global instance
+semantic_cache = SemanticCache()
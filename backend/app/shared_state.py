@@ -0,0 +1,268 @@
+import os
+import re
+import socket
+import asyncio
+import inspect
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+from backend.app.database import db
+
+SHARED_STATE_COLLECTION = os.getenv("SHARED_STATE_COLLECTION", "app_state")
+SHARED_STATE_POLL_MS = int(os.getenv("SHARED_STATE_POLL_MS", "500"))
+# Polls re-read this much history: a write can become visible after a later one
+SHARED_STATE_POLL_OVERLAP_MS = 2000
+SHARED_STATE_SEEN_KEYS = 10000
+
+# Distinguishes this process's writes from other workers' in change notifications
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+Subscriber = Callable[[str, Any], Any]
+
+class SharedState:
+    """
+    Application state that every worker process must agree on (the loaded
+    movie, chat sessions), as versioned key/value documents in MongoDB
+    (`app_state`). Without a database it is a plain in-process store.
+    Keys written with a TTL (chat sessions) are removed by MongoDB once they expire.
+
+    Watched keys (those with an exact subscription) are mirrored in a local
+    cache, so get() never leaves the process. Other workers' writes arrive
+    through a change stream, or by polling `updated_at` when the deployment
+    has no change streams (standalone mongod), and are pushed to subscribers.
+    """
+    def __init__(self, collection: str = SHARED_STATE_COLLECTION, poll_ms: int = SHARED_STATE_POLL_MS,
+                 worker_id: str = WORKER_ID):
+        self.collection = collection
+        self.poll_ms = poll_ms
+        self.worker_id = worker_id
+        self._local: Dict[str, Tuple[int, Any]] = {} # key -> (version, value)
+        self._seen: "OrderedDict[str, int]" = OrderedDict() # Latest version notified, per key
+        self._subscribers: Dict[str, List[Subscriber]] = defaultdict(list)
+        self._prefix_subscribers: Dict[str, List[Subscriber]] = defaultdict(list)
+        self._prefix_holds: Dict[str, Callable[[str], bool]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._callbacks: set = set()
+        self.mode = "local"
+        self.stats = {"sets": 0, "remote_changes": 0, "notifications": 0, "subscriber_errors": 0, "polls": 0,
+                      "values_fetched": 0}
+
+    @property
+    def shared(self) -> bool:
+        """
+        True when state is shared with other processes through MongoDB.
+        """
+        return self.mode != "local"
+
+    def _coll(self):
+        return db.db[self.collection]
+
+    # --- Subscriptions ---
+
+    def subscribe(self, key: str, callback: Subscriber, prefix: bool = False,
+                  holds: Optional[Callable[[str], bool]] = None):
+        """
+        Calls `callback(key, value)` (plain or async) whenever the key changes,
+        here or in another worker. prefix=True subscribes to every key starting with `key`;
+        `holds(key)` then limits remote changes to the keys this worker has (e.g. its sessions).
+        Exact keys are watched: their value is cached locally and served by get().
+        """
+        (self._prefix_subscribers if prefix else self._subscribers)[key].append(callback)
+        if prefix and holds is not None:
+            self._prefix_holds[key] = holds
+
+    def _wants(self, key: str) -> bool:
+        """
+        Whether another worker's change to `key` matters here.
+        """
+        if key in self._subscribers:
+            return True
+        for prefix in self._prefix_subscribers:
+            if key.startswith(prefix):
+                holds = self._prefix_holds.get(prefix)
+                if holds is None or holds(key):
+                    return True
+        return False
+
+    def _notify(self, key: str, value: Any):
+        callbacks = list(self._subscribers.get(key, ()))
+        for prefix, subscribers in self._prefix_subscribers.items():
+            if key.startswith(prefix):
+                callbacks.extend(subscribers)
+        for callback in callbacks:
+            self.stats["notifications"] += 1
+            try:
+                result = callback(key, value)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._callbacks.add(task)
+                    task.add_done_callback(self._callback_done)
+            except Exception as e:
+                self.stats["subscriber_errors"] += 1
+                print(f"⚠️ SharedState: subscriber of '{key}' failed: {e}")
+
+    def _callback_done(self, task: asyncio.Task):
+        self._callbacks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["subscriber_errors"] += 1
+            print(f"⚠️ SharedState: subscriber failed: {task.exception()}")
+
+    def _apply(self, key: str, version: int, value: Any, remote: bool = False) -> bool:
+        # Changes can be seen twice (poll overlap, own writes echoed back); only newer versions count
+        if version <= self._seen.get(key, 0):
+            return False
+        self._seen[key] = version
+        self._seen.move_to_end(key)
+        while len(self._seen) > SHARED_STATE_SEEN_KEYS:
+            self._seen.popitem(last=False)
+        if key in self._subscribers or not self.shared:
+            self._local[key] = (version, value)
+        if remote:
+            self.stats["remote_changes"] += 1
+        self._notify(key, value)
+        return True
+
+    # --- Reads / writes ---
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Current value of a watched key (or any key without a database), from the local cache.
+        """
+        entry = self._local.get(key)
+        return entry[1] if entry else default
+
+    def forget(self, key: str):
+        """
+        Drops what this worker knows about a key (e.g. one deleted by its TTL), so a recreated key,
+        whose versions start over, is not taken for an old change.
+        """
+        self._seen.pop(key, None)
+        self._local.pop(key, None)
+
+    async def fetch(self, key: str, default: Any = None) -> Any:
+        """
+        Current value of any key: the local cache when it has it, MongoDB otherwise.
+        """
+        if key in self._local or not self.shared:
+            return self.get(key, default)
+        doc = await self._coll().find_one({"_id": key}, {"value": 1})
+        return doc["value"] if doc else default
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """
+        Stores a value and notifies subscribers here and, through MongoDB, in every other worker.
+        With `ttl_seconds`, MongoDB deletes the key once it goes that long without a write.
+        """
+        self.stats["sets"] += 1
+        if not self.shared:
+            version = self._local.get(key, (0, None))[0] + 1
+        else:
+            fields = {"value": value, "writer": self.worker_id}
+            if ttl_seconds:
+                fields["expires_at"] = datetime.utcnow() + timedelta(seconds=ttl_seconds) # TTL index, see index_manager
+            doc = await self._coll().find_one_and_update(
+                {"_id": key},
+                {"$set": fields, "$inc": {"version": 1},
+                 "$currentDate": {"updated_at": True}},
+                upsert=True,
+                projection={"version": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            version = doc["version"]
+        self._apply(key, version, value)
+
+    # --- Change notifications ---
+
+    async def start(self):
+        """
+        Loads the watched keys and starts following other workers' writes.
+        Call after db.connect(); without a database the state stays in-process.
+        """
+        if db.db is None:
+            print("🔗 SharedState: no database, state is local to this process")
+            return
+        try:
+            since = await self._latest_update()
+            async for doc in self._coll().find({"_id": {"$in": list(self._subscribers)}}):
+                self._apply(doc["_id"], doc.get("version", 0), doc.get("value"))
+        except Exception as e:
+            print(f"⚠️ SharedState: could not load from MongoDB ({e}), state is local to this process")
+            return
+        self.mode = "mongo"
+        self._task = asyncio.create_task(self._follow(since))
+
+    async def _latest_update(self) -> datetime:
+        doc = await self._coll().find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+        return doc["updated_at"] if doc and doc.get("updated_at") else datetime.utcnow()
+
+    def _change_filter(self) -> Dict[str, Any]:
+        # Filtered by the server: other workers' writes to the keys this worker subscribes to
+        keys = [{"documentKey._id": {"$in": list(self._subscribers)}}]
+        keys += [{"documentKey._id": {"$regex": f"^{re.escape(prefix)}"}} for prefix in self._prefix_subscribers]
+        return {"$match": {"operationType": {"$in": ["insert", "update", "replace"]},
+                           "fullDocument.writer": {"$ne": self.worker_id},
+                           "$or": keys}}
+
+    def _on_change(self, doc: Optional[Dict[str, Any]]):
+        if doc and doc.get("writer") != self.worker_id and self._wants(doc["_id"]):
+            self._apply(doc["_id"], doc.get("version", 0), doc.get("value"), remote=True)
+
+    async def _poll(self, since: datetime) -> datetime:
+        """
+        One polling round: recent changes are listed without their values, which are
+        then fetched only for the keys this worker wants and has not seen yet.
+        """
+        wanted = []
+        cursor = self._coll().find({"updated_at": {"$gte": since}}, {"value": 0}).sort("updated_at", 1)
+        async for doc in cursor:
+            since = max(since, doc["updated_at"])
+            key = doc["_id"]
+            if (doc.get("writer") != self.worker_id and doc.get("version", 0) > self._seen.get(key, 0)
+                    and self._wants(key)):
+                wanted.append(key)
+        if wanted:
+            self.stats["values_fetched"] += len(wanted)
+            async for doc in self._coll().find({"_id": {"$in": wanted}}):
+                self._on_change(doc)
+        return since
+
+    async def _follow(self, since: datetime):
+        try:
+            # Subscriptions are made at import time, before start(), so the filter covers all of them
+            async with self._coll().watch([self._change_filter()], full_document="updateLookup") as stream:
+                self.mode = "mongo+change_stream"
+                print("🔗 SharedState: following changes with a change stream")
+                async for change in stream:
+                    self._on_change(change.get("fullDocument"))
+        except OperationFailure:
+            pass # Standalone server: change streams need a replica set
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ SharedState: change stream failed ({e}), polling instead")
+
+        self.mode = "mongo+polling"
+        print(f"🔗 SharedState: polling for changes every {self.poll_ms} ms")
+        overlap = timedelta(milliseconds=SHARED_STATE_POLL_OVERLAP_MS)
+        while True:
+            await asyncio.sleep(self.poll_ms / 1000)
+            try:
+                self.stats["polls"] += 1
+                since = max(since, await self._poll(since - overlap))
+            except Exception as e:
+                print(f"⚠️ SharedState: poll failed: {e}")
+
+    async def stop(self):
+        tasks = [t for t in [self._task, *self._callbacks] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "mode": self.mode, "worker": self.worker_id, "watched_keys": len(self._subscribers)}
+
+# Global instance
+shared_state = SharedState()
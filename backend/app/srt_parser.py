@@ -1,30 +1,70 @@
-import pysrt
-from typing import Optional, Dict, Any
+from bisect import bisect_left, bisect_right
+from typing import Optional, Dict, Any, List
 
 class SRTManager:
     def __init__(self):
         self.subs = None
         self.filename = None
+        self.movie = None # Title of the loaded track; scopes per-movie caches
+        self._starts: List[float] = [] # Cue start times (seconds), for binary search
 
-    def load_file(self, content_str: str):
+    def _index(self):
+        # SRT cues are ordered by start time; keep them sorted in case a file isn't
+        if self.subs:
+            self.subs.sort(key=lambda sub: sub.start.ordinal)
+        self._starts = [sub.start.ordinal / 1000.0 for sub in self.subs or []]
+
+    @staticmethod
+    def _cue(sub) -> Dict[str, Any]:
+        return {
+            "text": sub.text,
+            "start": sub.start.ordinal / 1000.0,
+            "end": sub.end.ordinal / 1000.0,
+            "index": sub.index
+        }
+
+    @staticmethod
+    def parse(content_str: str) -> list:
         """
-        Parses SRT content string.
+        Parses SRT content into cues sorted by start time, without touching the loaded track
+        (safe off the event loop).
         """
         try:
-            self.subs = pysrt.from_string(content_str)
-            print(f"Loaded {len(self.subs)} subtitles.")
+            import pysrt
+            subs = pysrt.from_string(content_str)
+            print(f"Loaded {len(subs)} subtitles.")
         except Exception as e:
             print(f"Error parsing SRT: {e}")
-            self.subs = []
+            subs = []
+        if subs:
+            subs.sort(key=lambda sub: sub.start.ordinal)
+        return subs
+
+    def use(self, subs, movie: Optional[str] = None):
+        """
+        Makes already parsed cues (see parse) the loaded track.
+        """
+        self.movie = movie
+        self.subs = subs
+        self._index()
+
+    def load_file(self, content_str: str, movie: Optional[str] = None):
+        """
+        Parses SRT content string.
+        """
+        self.use(self.parse(content_str), movie=movie)
 
-    def load_from_path(self, path: str):
+    def load_from_path(self, path: str, movie: Optional[str] = None):
+        self.movie = movie
         try:
+            import pysrt
             self.subs = pysrt.open(path)
             self.filename = path
             print(f"Loaded {len(self.subs)} subtitles from {path}.")
         except Exception as e:
             print(f"Error loading SRT file: {e}")
             self.subs = []
+        self._index()
 
     def get_subtitle_at_time(self, seconds: float) -> Optional[Dict[str, Any]]:
         """
@@ -34,32 +74,26 @@ class SRTManager:
         if not self.subs:
             return None
 
-        # Convert seconds to pysrt SubRipTime-like comparison
-        # pysrt uses hours, minutes, seconds, milliseconds
-        # Simplest way is 
-        
-        # Linear search for now (optimization: binary search or index)
-        # Standard SRT files are ordered.
-        
-        target_index = None
-        
-        # Optimization: Start from last known index if we were tracking state, 
-        # but for stateless API we search.
-        # pysrt objects behave like list.
-        
-        # We need to construct a time object to compare, or just check standard seconds
-        # pysrt.SubRipTime(0, 0, 10, 500)
-        
-        for sub in self.subs:
-            start_seconds = sub.start.ordinal / 1000.0
-            end_seconds = sub.end.ordinal / 1000.0
-            
-            if start_seconds <= seconds <= end_seconds:
-                return {
-                    "text": sub.text,
-                    "start": start_seconds,
-                    "end": end_seconds,
-                    "index": sub.index
-                }
-                
+        # Binary search: the last cue starting at or before `seconds` (SRT cues are ordered)
+        i = bisect_right(self._starts, seconds) - 1
+        if i >= 0 and self.subs[i].end.ordinal / 1000.0 >= seconds:
+            return self._cue(self.subs[i])
         return None
+
+    def get_subtitles_between(self, start: float, end: float) -> List[Dict[str, Any]]:
+        """
+        Cues starting within [start, end] seconds, in order (look-ahead window).
+        """
+        if not self.subs:
+            return []
+        lo, hi = bisect_left(self._starts, start), bisect_right(self._starts, end)
+        return [self._cue(sub) for sub in self.subs[lo:hi]]
+
+    def get_subtitles_before(self, seconds: float, count: int) -> List[Dict[str, Any]]:
+        """
+        The last `count` cues starting at or before `seconds`, in order.
+        """
+        if not self.subs or count <= 0:
+            return []
+        hi = bisect_right(self._starts, seconds)
+        return [self._cue(sub) for sub in self.subs[max(0, hi - count):hi]]
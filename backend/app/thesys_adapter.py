@@ -1,4 +1,5 @@
 from typing import Dict, Any, List
+from backend.app.image_proxy import image_proxy
 
 class ThesysMockAdapter:
     """
@@ -40,10 +41,11 @@ class ThesysMockAdapter:
         
         if image_url:
             # Insert image at top of content
+            # Served resized through /api/image instead of hot-linking the full-size asset
             image_component = {
                 "type": "img",
                 "props": {
-                    "src": image_url,
+                    "src": image_proxy.proxy_url(image_url),
                     "alt": title,
                     "className": "w-full h-48 object-cover rounded-md mb-4"
                 }
@@ -126,6 +128,42 @@ class ThesysMockAdapter:
             ]
         }
 
+    @staticmethod
+    def _fanart_image(assets: Dict[str, Any] = None) -> str:
+        """
+        First usable image from Fanart.tv assets (backgrounds preferred).
+        """
+        for kind in ("moviebackground", "movieposter", "moviethumb", "hdmovielogo"):
+            for item in (assets or {}).get(kind, []):
+                if item.get("url"):
+                    return item["url"]
+        return None
+
+    def adapt_partial(self, source: str, data: Dict[str, Any], status: str = "ok") -> List[Dict[str, Any]]:
+        """
+        UI fragments for one ingestion source that just returned (progressive /api/chat/stream).
+        Every fragment has an "id": the client replaces the node with that id, or appends it.
+        `data` is everything merged so far, so the movie card improves as sources arrive.
+        """
+        if source in ("wikipedia", "fanart"):
+            if not data.get("summary") and not self._fanart_image(data.get("fanart")):
+                return []
+            card = self.adapt_response("ingestion", {"summary": "Loading summary...", **data})["ui_schema"][0]
+            return [{"id": "movie_card", **card}]
+
+        if source == "subtitles":
+            notice = {
+                "ok": "Subtitles loaded: live context is ready.",
+                "missing": "No subtitles found for this movie.",
+                "timeout": "Subtitles are still downloading...",
+                "error": "Subtitles could not be loaded.",
+                "cancelled": "Subtitle download cancelled.",
+                "limited": "Subtitle downloads are busy right now, try again shortly."
+            }[status]
+            return [{"id": "subtitles_notice", "type": "p", "props": {"className": "text-xs text-gray-400"}, "children": [notice]}]
+
+        return []
+
     def adapt_response(self, agent_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Main entry point. Takes raw agent data and returns a UI Schema.
@@ -142,7 +180,8 @@ class ThesysMockAdapter:
             image = None
             if "images" in data and data["images"]:
                 image = data["images"][0] # Naive first image
-            # Or check fanart data if available in future
+            else:
+                image = self._fanart_image(data.get("fanart"))
             
             ui_schema.append(self._create_card(title, subtitle, content, image_url=image))
         
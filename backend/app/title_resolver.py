@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+TITLE_DATASET_PATH = os.getenv("TITLE_DATASET_PATH", "backend/data/tmdb_titles.jsonl")
+TITLE_MATCH_THRESHOLD = float(os.getenv("TITLE_MATCH_THRESHOLD", "0.8"))
+TITLE_RESOLVER_CACHE = 4096
+
+ROMAN_NUMERALS = {"ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8", "ix": "9", "x": "10"}
+# Chat phrasing around a title ("load the matrix", "subtitles for inception please")
+QUERY_PREFIX = re.compile(r"^(?:please|can you|could you|i want to|let s|load|play|watch|find|fetch|open|get|start|"
+                          r"show me|search for|search|look up|the movie|the film|movie|film|subtitles for|subs for) ")
+QUERY_SUFFIX = re.compile(r"(?: (?:movie|film|subtitles|subs|please|now))+$")
+YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+
+def normalize_title(text: str) -> str:
+    """
+    Spelling-insensitive form of a title: lowercase ASCII, no punctuation,
+    roman numerals as digits, no leading article.
+    """
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    text = text.replace("&", " and ").replace("'", "")
+    words = re.sub(r"[^a-z0-9]+", " ", text).split()
+    words = [ROMAN_NUMERALS.get(w, w) for w in words]
+    if len(words) > 1 and words[0] in ("the", "a", "an"):
+        words = words[1:]
+    return " ".join(words)
+
+def query_forms(text: str) -> List[str]:
+    """
+    The normalized query, then with chat phrasing peeled off one phrase at a
+    time ("load get out" -> "get out" -> "out"); the last form is fully stripped.
+    """
+    query = normalize_title(text)
+    forms = [query]
+    while True:
+        stripped = QUERY_PREFIX.sub("", query + " ", count=1).strip()
+        if stripped == query or not stripped:
+            break
+        query = stripped
+        forms.append(normalize_title(query)) # Drops an article exposed by the prefix ("load the matrix")
+    suffixless = QUERY_SUFFIX.sub("", forms[-1])
+    if suffixless and suffixless != forms[-1]:
+        forms.append(normalize_title(suffixless))
+    return forms
+
+def strip_query(text: str) -> str:
+    """
+    Normalized query with the chat phrasing around the title removed.
+    """
+    return query_forms(text)[-1]
+
+def _extra_words(query: str, key: str) -> Tuple[int, int]:
+    """
+    Query words the title doesn't account for: (numbers, other words).
+    A number must match exactly (sequels); a word may be misspelled.
+    """
+    key_words = key.split()
+    numbers = words = 0
+    for word in query.split():
+        if word in key_words:
+            continue
+        if word.isdigit():
+            numbers += 1
+        elif len(word) > 2 and max((SequenceMatcher(None, word, k).ratio() for k in key_words), default=0) < 0.75:
+            words += 1
+    numbers += sum(1 for k in key_words if k.isdigit() and k not in query.split())
+    return numbers, words
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TitleMatch(NamedTuple):
+    tmdb_id: int
+    title: str
+    year: int
+    score: float # 1.0 for exact title/alias matches, similarity otherwise
+
+class TitleResolver:
+    """
+    Maps free-text movie queries to TMDB ids, offline, from a title dataset
+    (one JSON object per line: tmdb_id, title, year, aliases).
+    Exact title/alias lookups first, then fuzzy matching: a trigram index
+    proposes candidates, which are re-ranked by edit similarity.
+    The dataset is loaded on first use; results are memoized per query.
+    """
+    def __init__(self, path: str = TITLE_DATASET_PATH, threshold: float = TITLE_MATCH_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._movies: Dict[int, Tuple[str, int]] = {}
+        self._exact: Dict[str, List[int]] = defaultdict(list) # normalized title/alias -> ids (dataset order)
+        self._compact: Dict[str, str] = {} # key without spaces -> key ("spiderman", "end game")
+        self._keys: List[str] = []
+        self._key_ids: Dict[str, List[int]] = {}
+        self._trigram_index: Dict[str, List[int]] = defaultdict(list) # trigram -> positions in _keys
+        self.resolve = lru_cache(maxsize=TITLE_RESOLVER_CACHE)(self._resolve)
+
+    def load(self, path: Optional[str] = None):
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(path or self.path, "r", encoding="utf-8") as f:
+                    rows = [json.loads(line) for line in f if line.strip()]
+            except FileNotFoundError:
+                print(f"⚠️ TitleResolver: dataset not found at {path or self.path}; titles won't resolve")
+                rows = []
+            for row in rows:
+                tmdb_id = int(row["tmdb_id"])
+                self._movies[tmdb_id] = (row["title"], row.get("year"))
+                for name in [row["title"], *row.get("aliases", [])]:
+                    key = normalize_title(name)
+                    if key and tmdb_id not in self._exact[key]:
+                        self._exact[key].append(tmdb_id)
+            for key, ids in self._exact.items():
+                position = len(self._keys)
+                self._keys.append(key)
+                self._key_ids[key] = ids
+                self._compact.setdefault(key.replace(" ", ""), key)
+                for gram in _trigrams(key):
+                    self._trigram_index[gram].append(position)
+            self._loaded = True
+            print(f"🎞️ TitleResolver: indexed {len(self._movies)} movies ({len(self._keys)} titles and aliases)")
+
+    def _pick(self, ids: List[int], year: Optional[int], score: float) -> TitleMatch:
+        # Same title for several movies (remakes): the one from the requested year, else the first listed
+        chosen = next((i for i in ids if year and self._movies[i][1] == year), ids[0])
+        title, movie_year = self._movies[chosen]
+        return TitleMatch(chosen, title, movie_year, score)
+
+    def _fuzzy(self, query: str, year: Optional[int]) -> Optional[TitleMatch]:
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in _trigrams(query):
+            for position in self._trigram_index.get(gram, ()):
+                shared[position] += 1
+        candidates = sorted(shared, key=shared.get, reverse=True)[:20]
+
+        best, best_score = None, 0.0
+        for position in candidates:
+            key = self._keys[position]
+            bonus = 0.05 if year and any(self._movies[i][1] == year for i in self._key_ids[key]) else 0.0
+            matcher = SequenceMatcher(None, query, key)
+            # Cheap upper bound first: most candidates can't reach the threshold
+            if matcher.quick_ratio() + bonus < max(self.threshold, best_score):
+                continue
+            # Extra numbers or words mean another movie ("harry potter 3") or more than a title ("thor avengers")
+            numbers, words = _extra_words(query, key)
+            score = matcher.ratio() + bonus - 0.15 * numbers - 0.1 * words
+            if score > best_score:
+                best, best_score = key, score
+        if best is None or best_score < self.threshold:
+            return None
+        return self._pick(self._key_ids[best], year, round(min(best_score, 1.0), 3))
+
+    def _resolve(self, query: str) -> Optional[TitleMatch]:
+        if not self._loaded:
+            self.load()
+        forms = query_forms(query)
+        for form in forms: # "Get Out" is a title before it is chat phrasing
+            key = form if form in self._exact else self._compact.get(form.replace(" ", ""))
+            if key:
+                return self._pick(self._exact[key], None, 1.0)
+        text = forms[-1]
+        if not text:
+            return None
+
+        # "the matrix 1999": the year picks between same-named movies
+        year_match = YEAR.search(text)
+        year = int(year_match.group()) if year_match else None
+        if year:
+            without_year = normalize_title(YEAR.sub(" ", text))
+            if without_year in self._exact:
+                return self._pick(self._exact[without_year], year, 1.0)
+            text = without_year or text
+        return self._fuzzy(text, year)
+
+    def canonical_key(self, query: str) -> str:
+        """
+        Cache key shared by every spelling of the same movie ("tmdb_603"),
+        or the normalized query when it doesn't resolve to a known movie.
+        """
+        match = self.resolve(query or "")
+        return f"tmdb_{match.tmdb_id}" if match else f"q_{strip_query(query or '')}"
+
+# Global instance
+title_resolver = TitleResolver()
@@ -1,52 +1,52 @@
-import os
-import fireworks.client
 from typing import List, Optional
+from backend.app.embedding_cache import embedding_cache
+from backend.app.embedding_backends import EmbeddingBackend, get_embedding_backend
 
 class VectorEmbeddingAgent:
     """
-    Agent responsible for generating vector embeddings for text using Fireworks AI.
+    Agent responsible for generating vector embeddings for text.
+    The backend (Fireworks AI or the local hashed n-gram embedder) is chosen per
+    deployment via EMBEDDING_BACKEND; remote calls go through the
+    content-addressed embedding cache first.
     """
-    def __init__(self):
-        self.api_key = os.getenv("FIREWORKS_API_KEY")
-        if self.api_key:
-            fireworks.client.api_key = self.api_key
-        else:
-            print("⚠️ VectorAgent: No FIREWORKS_API_KEY found.")
+    def __init__(self, backend: EmbeddingBackend = None):
+        self.backend = backend or get_embedding_backend()
+        print(f"🧠 VectorAgent: Using embedding backend '{self.backend.model}'")
+
+    @property
+    def model(self) -> str:
+        return self.backend.model
 
     async def generate_embedding(self, text: str) -> Optional[List[float]]:
         """
-        Generates a vector embedding for the given text using REST API.
+        Generates a vector embedding for the given text.
+        """
+        vectors = await self.generate_embeddings([text])
+        return vectors[0]
+
+    async def generate_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Batch variant: cache hits are served locally, and the remaining unique
+        texts are sent to the backend in a single call.
         """
-        if not self.api_key:
-            print("⚠️ VectorAgent: Using Mock Embedding")
-            return [0.1] * 768
-
-        try:
-             # Direct REST API call to avoid client version issues
-            import requests
-            url = "https://api.fireworks.ai/inference/v1/embeddings"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            payload = {
-                "model": "nomic-ai/nomic-embed-text-v1.5",
-                "input": text
-            }
-            
-            # Since this is sync inside async, ideally await loop.run_in_executor
-            # For simplicity in this demo:
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code == 200:
-                data = response.json()
-                return data["data"][0]["embedding"]
-            else:
-                print(f"❌ Vector API Error: {response.text}")
-                return None
-                
-        except Exception as e:
-            print(f"❌ Vector Generation Failed: {e}")
-            return None
+        if not self.backend.cacheable:
+            return await self.backend.embed(texts)
+
+        hits = await embedding_cache.get_many(self.model, texts)
+
+        pending = {}
+        for text in texts:
+            if embedding_cache.make_key(self.model, text) not in hits:
+                pending.setdefault(embedding_cache.normalize(text), text)
+
+        if pending:
+            fresh = await self.backend.embed(list(pending))
+            computed = {text: vector for text, vector in zip(pending, fresh) if vector}
+            await embedding_cache.set_many(self.model, computed)
+            for normalized, vector in computed.items():
+                hits[embedding_cache.make_key(self.model, normalized)] = vector
+
+        return [hits.get(embedding_cache.make_key(self.model, text)) for text in texts]
 
 if __name__ == "__main__":
     agent = VectorEmbeddingAgent()
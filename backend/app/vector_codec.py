@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from bson.binary import Binary
+from typing import Any, Dict, Iterable, Sequence, Tuple, Union
+
+# Storage formats for the 'embedding' field of subtitle chunks:
+#   array   - legacy BSON array of doubles (~9 bytes per dimension)
+#   float32 - packed little-endian float32 (4 bytes per dimension)
+#   int8    - per-vector scalar quantization with scale/offset (1 byte per dimension)
+STORAGE_FORMATS = ("array", "float32", "int8")
+
+def default_storage() -> str:
+    storage = os.getenv("EMBEDDING_STORAGE", "float32").lower()
+    return storage if storage in STORAGE_FORMATS else "float32"
+
+def encode_embedding(vector: Union[Sequence[float], np.ndarray], storage: str = None) -> Any:
+    """
+    Encodes a vector for storage in MongoDB.
+    Binary formats are stored as a small subdocument:
+    {"dtype", "dim", "data": BinData, ["scale", "offset"]}.
+    """
+    storage = storage or default_storage()
+    arr = np.asarray(vector, dtype=np.float32)
+
+    if storage == "array":
+        return arr.tolist()
+
+    if storage == "int8":
+        lo = float(arr.min())
+        hi = float(arr.max())
+        scale = (hi - lo) / 255.0 or 1.0
+        codes = np.clip(np.rint((arr - lo) / scale) - 128, -128, 127).astype(np.int8)
+        return {
+            "dtype": "int8",
+            "dim": int(arr.size),
+            "scale": scale,
+            "offset": lo,
+            "data": Binary(codes.tobytes())
+        }
+
+    return {
+        "dtype": "float32",
+        "dim": int(arr.size),
+        "data": Binary(arr.astype("<f4").tobytes())
+    }
+
+def decode_int8(value: Dict[str, Any]) -> Tuple[np.ndarray, float, float]:
+    """
+    Zero-copy view of the raw int8 codes plus their (scale, offset).
+    Useful for scoring directly in the quantized domain.
+    """
+    codes = np.frombuffer(value["data"], dtype=np.int8)
+    return codes, value["scale"], value["offset"]
+
+def decode_embedding(value: Any) -> np.ndarray:
+    """
+    Decodes any stored format into a float32 vector.
+    float32 payloads are returned as a read-only zero-copy view of the BSON bytes.
+    """
+    if isinstance(value, dict):
+        if value.get("dtype") == "int8":
+            codes, scale, offset = decode_int8(value)
+            return (codes.astype(np.float32) + 128.0) * np.float32(scale) + np.float32(offset)
+        return np.frombuffer(value["data"], dtype="<f4")
+    return np.asarray(value, dtype=np.float32)
+
+def decode_matrix(values: Iterable[Any]) -> np.ndarray:
+    """
+    Stacks stored embeddings into an (n, dim) float32 matrix.
+    Packed float32 rows are joined in one buffer copy instead of per-element parsing.
+    """
+    values = list(values)
+    if not values:
+        return np.zeros((0, 0), dtype=np.float32)
+    if all(isinstance(v, dict) and v.get("dtype") == "float32" for v in values):
+        return np.frombuffer(b"".join(v["data"] for v in values), dtype="<f4").reshape(len(values), -1)
+    return np.vstack([decode_embedding(v) for v in values])
@@ -0,0 +1,274 @@
+import os
+import json
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from backend.app.database import db
+from backend.app.vector_codec import decode_embedding
+
+class VectorIndex:
+    """
+    In-process ANN index over subtitle chunk embeddings.
+    Small collections are searched exactly with one matrix product; once the
+    live row count passes `exact_threshold` the index trains an IVF layout
+    (k-means centroids) and only scans the `nprobe` closest lists per query.
+    Rows are cosine-normalized, deletes are tombstones that get compacted.
+    """
+    def __init__(self, exact_threshold: int = None, nprobe: int = None):
+        self.exact_threshold = exact_threshold or int(os.getenv("VECTOR_INDEX_EXACT_THRESHOLD", "20000"))
+        self.nprobe = nprobe or int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+        self.dim = None
+        self.size = 0 # Rows used in the backing arrays (including tombstones)
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.movie_codes = np.zeros(0, dtype=np.int32)
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.centroids = None
+        self.ids: List[str] = []
+        self.meta: List[Dict[str, Any]] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.movies: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.id_to_row)
+
+    @property
+    def mode(self) -> str:
+        return "ivf" if self.centroids is not None else "exact"
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32)
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        capacity = len(self.alive)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        self.vectors = vectors
+        for name, dtype in (("alive", bool), ("movie_codes", np.int32), ("assign", np.int32)):
+            grown = np.zeros(capacity, dtype=dtype)
+            grown[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, grown)
+
+    def _movie_code(self, movie: str) -> int:
+        if movie not in self.movies:
+            self.movies[movie] = len(self.movies)
+        return self.movies[movie]
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, metas: Sequence[Dict[str, Any]]):
+        """
+        Adds (or replaces) rows. `metas` carry movie/text/start/end for results.
+        """
+        if not len(ids):
+            return
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.delete([i for i in ids if i in self.id_to_row])
+
+        self._reserve(len(ids))
+        rows = np.arange(self.size, self.size + len(ids))
+        self.vectors[rows] = vectors
+        self.alive[rows] = True
+        self.movie_codes[rows] = [self._movie_code(m.get("movie", "")) for m in metas]
+        if self.centroids is not None:
+            self.assign[rows] = np.argmax(vectors @ self.centroids.T, axis=1)
+        for row, doc_id, meta in zip(rows, ids, metas):
+            self.ids.append(doc_id)
+            self.meta.append(dict(meta))
+            self.id_to_row[doc_id] = int(row)
+        self.size += len(ids)
+
+        if self.centroids is None and len(self) >= self.exact_threshold:
+            self.train()
+
+    def delete(self, ids: Sequence[str]):
+        for doc_id in ids:
+            row = self.id_to_row.pop(doc_id, None)
+            if row is not None:
+                self.alive[row] = False
+        if self.size and len(self) < self.size * 0.75:
+            self.compact()
+
+    def delete_movie(self, movie: str):
+        code = self.movies.get(movie)
+        if code is None:
+            return
+        rows = np.flatnonzero(self.alive[:self.size] & (self.movie_codes[:self.size] == code))
+        self.delete([self.ids[r] for r in rows])
+
+    def compact(self):
+        """
+        Drops tombstoned rows and rebuilds the id map.
+        """
+        keep = np.flatnonzero(self.alive[:self.size])
+        self.vectors = self.vectors[keep].copy()
+        self.movie_codes = self.movie_codes[keep].copy()
+        self.assign = self.assign[keep].copy()
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.ids = [self.ids[r] for r in keep]
+        self.meta = [self.meta[r] for r in keep]
+        self.id_to_row = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.size = len(keep)
+
+    def train(self, nlist: int = None, iterations: int = 10, seed: int = 0):
+        """
+        Spherical k-means over the live rows to build the IVF lists.
+        """
+        live = np.flatnonzero(self.alive[:self.size])
+        nlist = nlist or max(1, int(np.sqrt(len(live))))
+        rng = np.random.default_rng(seed)
+        sample = live if len(live) <= nlist * 64 else rng.choice(live, nlist * 64, replace=False)
+        data = self.vectors[sample]
+        centroids = data[rng.choice(len(data), nlist, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+            sums = centroids.copy() # Empty lists keep their previous centroid
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+            sums[filled] = np.add.reduceat(data[order], starts, axis=0)
+            centroids = self._normalize(sums)
+        self.centroids = centroids
+        self.assign[:self.size] = np.argmax(self.vectors[:self.size] @ centroids.T, axis=1)
+        print(f"🧭 VectorIndex: Trained IVF with {nlist} lists over {len(live)} vectors.")
+
+    def search(self, query: Sequence[float], k: int = 5, movie: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not len(self):
+            return []
+        q = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+
+        mask = self.alive[:self.size].copy()
+        if movie is not None:
+            code = self.movies.get(movie)
+            if code is None:
+                return []
+            mask &= self.movie_codes[:self.size] == code
+        # Probe IVF lists only when the (filtered) candidate set is large
+        if self.centroids is not None and mask.sum() > self.exact_threshold:
+            probes = np.argsort(-(self.centroids @ q))[:self.nprobe]
+            mask &= np.isin(self.assign[:self.size], probes)
+
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return []
+        if len(rows) > self.size // 4:
+            # Dense matvec over the contiguous block beats gathering most rows
+            scores = (self.vectors[:self.size] @ q)[rows]
+        else:
+            scores = self.vectors[rows] @ q
+        top = np.argpartition(-scores, min(k, len(rows)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"id": self.ids[rows[i]], "score": float(scores[i]), **self.meta[rows[i]]}
+            for i in top
+        ]
+
+    def save(self, path: str):
+        """
+        Persists the index as a single .npz (arrays + JSON metadata).
+        """
+        if self.dim is None:
+            return
+        if len(self) < self.size:
+            self.compact()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        header = {"ids": self.ids, "meta": self.meta, "movies": self.movies}
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            vectors=self.vectors[:self.size],
+            movie_codes=self.movie_codes[:self.size],
+            assign=self.assign[:self.size],
+            centroids=self.centroids if self.centroids is not None else np.zeros((0, self.dim), dtype=np.float32),
+            header=np.array(json.dumps(header))
+        )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+        """
+        Reads a snapshot written by save() without touching the index (safe off the event loop).
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return {
+                "header": json.loads(str(data["header"])),
+                "vectors": data["vectors"],
+                "movie_codes": data["movie_codes"],
+                "assign": data["assign"],
+                "centroids": data["centroids"] if len(data["centroids"]) else None
+            }
+
+    def load(self, path: str, snapshot: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Replaces the index with a snapshot (read from `path` unless already read).
+        """
+        snapshot = snapshot or self.read_snapshot(path)
+        if snapshot is None:
+            return False
+        header = snapshot["header"]
+        self.vectors = snapshot["vectors"]
+        self.movie_codes = snapshot["movie_codes"]
+        self.assign = snapshot["assign"]
+        self.centroids = snapshot["centroids"]
+        self.size = len(self.vectors)
+        self.dim = self.vectors.shape[1] if self.size else None
+        self.alive = np.ones(self.size, dtype=bool)
+        self.ids = header["ids"]
+        self.meta = header["meta"]
+        self.movies = header["movies"]
+        self.id_to_row = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        print(f"📂 VectorIndex: Loaded {self.size} vectors ({self.mode}) from {path}")
+        return True
+
+    def add_documents(self, docs: Sequence[Dict[str, Any]]):
+        """
+        Adds subtitle chunk documents as stored in the 'subtitles' collection.
+        """
+        docs = [d for d in docs if d.get("embedding") is not None]
+        if not docs:
+            return
+        self.add(
+            [str(d["_id"]) for d in docs],
+            np.vstack([decode_embedding(d["embedding"]) for d in docs]),
+            [{"movie": d.get("movie", ""), "text": d.get("text", ""),
+              "start": d.get("start", 0.0), "end": d.get("end", 0.0)} for d in docs]
+        )
+
+    async def build_from_db(self, movie: Optional[str] = None, batch_size: int = 2000) -> int:
+        """
+        (Re)loads chunk embeddings from MongoDB, optionally for a single movie.
+        """
+        if db.db is None:
+            return 0
+        query = {"embedding": {"$exists": True}}
+        if movie is not None:
+            query["movie"] = movie
+            self.delete_movie(movie)
+
+        batch = []
+        total = 0
+        async for doc in db.reader("subtitles").find(query, {"movie": 1, "text": 1, "start": 1, "end": 1, "embedding": 1}):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                self.add_documents(batch)
+                total += len(batch)
+                batch = []
+        self.add_documents(batch)
+        total += len(batch)
+        print(f"🧭 VectorIndex: Indexed {total} chunks from MongoDB ({self.mode}).")
+        return total
+
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "backend/data/vector_index.npz")
+
+# Global instance
+vector_index = VectorIndex()
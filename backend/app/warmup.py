@@ -0,0 +1,50 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+class WarmupManager:
+    """
+    Runs startup work that is not needed to serve the first request
+    (default tracks, index snapshots, index reconciliation) as background
+    tasks, and tracks their state for the readiness endpoint.
+    """
+    def __init__(self):
+        self._steps: List[Tuple[str, Callable[[], Awaitable[Any]]]] = []
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add(self, name: str, step: Callable[[], Awaitable[Any]]):
+        self._steps.append((name, step))
+        self._state[name] = {"state": "pending"}
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[Any]]):
+        self._state[name] = {"state": "running"}
+        start = time.perf_counter()
+        try:
+            await step()
+            self._state[name] = {"state": "done"}
+        except Exception as e:
+            print(f"⚠️ Warmup '{name}' failed: {e}")
+            self._state[name] = {"state": "failed", "error": str(e)}
+        self._state[name]["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    def start(self):
+        """
+        Launches every registered step concurrently.
+        """
+        self._tasks = [asyncio.create_task(self._run_step(name, step)) for name, step in self._steps]
+
+    @property
+    def complete(self) -> bool:
+        return all(s["state"] in ("done", "failed") for s in self._state.values())
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": True, "warmup_complete": self.complete, "steps": self._state}
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+# Global instance
+warmup = WarmupManager()
@@ -0,0 +1,145 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from backend.app.database import db
+
+class WriteBehindQueue:
+    """
+    In-process write-behind buffer for agent upserts.
+    Request paths enqueue an update and return immediately; a background task
+    flushes the buffer as unordered bulk_write batches whenever it holds
+    `max_batch` operations or every `flush_interval` seconds.
+    Updates to the same (collection, filter) that only use $set are coalesced.
+    Other updates to a document with a write already pending are queued after it;
+    a document's writes are then flushed in a separate ordered bulk_write.
+    """
+    def __init__(self, max_batch: int = None, flush_interval: float = None):
+        self.max_batch = max_batch or int(os.getenv("WRITE_BEHIND_MAX_BATCH", "100"))
+        self.flush_interval = flush_interval or int(os.getenv("WRITE_BEHIND_FLUSH_MS", "250")) / 1000.0
+        self._pending: "OrderedDict[Tuple[str, Any], Dict[str, Any]]" = OrderedDict()
+        self._last: Dict[Tuple[str, Any], Tuple[str, Any]] = {} # (collection, filter) -> key of its latest pending op
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._seq = 0
+        self._stopping = False
+        self.stats_counters = {"enqueued": 0, "coalesced": 0, "flushed": 0, "batches": 0, "errors": 0}
+        self.last_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    @staticmethod
+    def _filter_key(filter_doc: Dict[str, Any]) -> Any:
+        return tuple(sorted((k, repr(v)) for k, v in filter_doc.items()))
+
+    def _ensure_running(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return # No loop (e.g. sync script); flush() must be awaited explicitly
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    def enqueue(self, collection: str, filter_doc: Dict[str, Any], update: Dict[str, Any], upsert: bool = True):
+        """
+        Queues an update_one(filter, update, upsert). Non-blocking.
+        """
+        if db.db is None:
+            return
+
+        self.stats_counters["enqueued"] += 1
+        doc_key = (collection, self._filter_key(filter_doc))
+        # Only the latest pending op may absorb a $set: merging into an earlier one would reorder writes
+        existing = self._pending.get(self._last.get(doc_key))
+        if existing is not None and set(existing["update"]) == {"$set"} and set(update) == {"$set"}:
+            existing["update"]["$set"].update(update["$set"])
+            existing["upsert"] = existing["upsert"] or upsert
+            self.stats_counters["coalesced"] += 1
+        else:
+            key = doc_key
+            if existing is not None:
+                # Not mergeable: queued after it, and flushed in order (see flush)
+                self._seq += 1
+                key = (*doc_key, self._seq)
+            self._last[doc_key] = key
+            self._pending[key] = {
+                "collection": collection,
+                "filter": filter_doc,
+                "update": {op: dict(fields) for op, fields in update.items()},
+                "upsert": upsert
+            }
+
+        self._ensure_running()
+        if self._wakeup is not None and self.depth >= self.max_batch:
+            self._wakeup.set()
+
+    def peek(self, collection: str, filter_doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the pending $set for a document, so readers see their own writes.
+        """
+        pending = self._pending.get(self._last.get((collection, self._filter_key(filter_doc))))
+        return pending["update"].get("$set") if pending else None
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """
+        Writes everything queued so far as one unordered bulk_write per collection.
+        Documents with several pending ops get theirs in an ordered bulk_write, in enqueue order.
+        """
+        if not self._pending or db.db is None:
+            return
+        from pymongo import UpdateOne
+
+        batch, self._pending = self._pending, OrderedDict()
+        self._last = {}
+        sequenced = {key[:2] for key in batch if len(key) > 2}
+        groups: Dict[Tuple[str, bool], list] = {}
+        for key, op in batch.items():
+            groups.setdefault((op["collection"], key[:2] in sequenced), []).append(
+                UpdateOne(op["filter"], op["update"], upsert=op["upsert"])
+            )
+
+        start = time.perf_counter()
+        for (collection, ordered), ops in groups.items():
+            for i in range(0, len(ops), self.max_batch):
+                try:
+                    await db.db[collection].bulk_write(ops[i:i+self.max_batch], ordered=ordered)
+                    self.stats_counters["flushed"] += len(ops[i:i+self.max_batch])
+                except Exception as e:
+                    self.stats_counters["errors"] += 1
+                    print(f"❌ WriteBehind: bulk_write to '{collection}' failed: {e}")
+                self.stats_counters["batches"] += 1
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    async def stop(self):
+        """
+        Stops the background flusher and drains the queue (call before db.close()).
+        """
+        self._stopping = True
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancelling it mid-batch
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        self._stopping = False
+        print(f"💾 WriteBehind: Drained on shutdown ({self.stats_counters['flushed']} writes flushed).")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.stats_counters, "depth": self.depth, "last_flush_ms": round(self.last_flush_ms, 2)}
+
+# Global instance
+write_queue = WriteBehindQueue()
@@ -0,0 +1,144 @@
+import sys
+import os
+import asyncio
+import argparse
+# Allow running from root or backend/
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+
+# Load Environment (Force path)
+env_path = os.path.join(os.getcwd(), "backend", ".env")
+load_dotenv(env_path)
+
+from backend.app.database import db
+from backend.app.entity_ids import movie_id_for, fact_id_for, is_canonical_movie_id, normalize_name
+
+# One-off compaction for data written before ids were deterministic:
+# - movies: duplicates by name are merged into one document with a canonical _id
+# - facts: duplicate summaries are merged under a canonical _id, and references are repointed
+
+async def collection_sizes(names):
+    sizes = {}
+    for name in names:
+        try:
+            stats = await db.db.command("collStats", name)
+            sizes[name] = (stats.get("count", 0), stats.get("size", 0), stats.get("totalIndexSize", 0))
+        except Exception:
+            sizes[name] = (0, 0, 0)
+    return sizes
+
+def resolve_pageid(title: str):
+    """
+    Looks up the Wikipedia page id for legacy documents that never stored it.
+    """
+    try:
+        import wikipedia
+        return wikipedia.page(title, auto_suggest=False).pageid
+    except Exception as e:
+        print(f"   ⚠️ Could not resolve Wikipedia page id for '{title}': {e}")
+        return None
+
+def merge_docs(docs):
+    """
+    Later documents win field by field; metadata and external_ids are merged by key.
+    """
+    merged = {}
+    for doc in docs:
+        for key, value in doc.items():
+            if key == "_id":
+                continue
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = {**merged[key], **value}
+            else:
+                merged[key] = value
+    return merged
+
+async def compact_movies(offline: bool, dry_run: bool):
+    groups = {}
+    async for doc in db.db.movies.find({}):
+        groups.setdefault(normalize_name(doc.get("name") or doc.get("title") or ""), []).append(doc)
+
+    renamed = {}
+    for name, docs in groups.items():
+        if not name:
+            continue
+        if len(docs) == 1 and is_canonical_movie_id(docs[0]["_id"]):
+            continue
+
+        external = merge_docs(docs).get("external_ids", {})
+        canonical = next((d["_id"] for d in docs if is_canonical_movie_id(d["_id"])), None)
+        if canonical is None:
+            pageid = external.get("wikipedia")
+            if not pageid and not external.get("tmdb") and not offline:
+                pageid = resolve_pageid(docs[0].get("title") or docs[0]["name"])
+            canonical = movie_id_for(tmdb_id=external.get("tmdb"), wikipedia_pageid=pageid, name=docs[0]["name"])
+
+        losers = [d["_id"] for d in docs if d["_id"] != canonical]
+        if not losers:
+            continue
+        print(f"   🎬 '{docs[0]['name']}': {len(docs)} docs -> {canonical}")
+        for loser in losers:
+            renamed[loser] = canonical
+
+        if not dry_run:
+            await db.db.movies.update_one({"_id": canonical}, {"$set": merge_docs(docs)}, upsert=True)
+            await db.db.movies.delete_many({"_id": {"$in": losers}})
+    return renamed
+
+async def compact_facts(renamed, dry_run: bool):
+    # Repoint references from merged-away movie ids
+    if renamed and not dry_run:
+        for old_id, new_id in renamed.items():
+            await db.db.facts.update_many({"related_entities": old_id}, {"$addToSet": {"related_entities": new_id}})
+            await db.db.facts.update_many({"related_entities": old_id}, {"$pull": {"related_entities": old_id}})
+
+    removed = 0
+    pipeline = [
+        {"$group": {"_id": {"content": "$content", "source": "$source"},
+                    "ids": {"$push": "$_id"}, "entities": {"$push": "$related_entities"},
+                    "tags": {"$push": "$tags"}, "count": {"$sum": 1}}}
+    ]
+    async for group in db.db.facts.aggregate(pipeline, allowDiskUse=True):
+        entities = sorted({e for lst in group["entities"] for e in (lst or [])})
+        tags = sorted({t for lst in group["tags"] for t in (lst or [])})
+        kind = "summary" if "summary" in tags else "fact"
+        keep = fact_id_for(entities[0], group["_id"]["source"] or "unknown", kind) if entities else group["ids"][0]
+        drop = [i for i in group["ids"] if i != keep]
+        if not drop:
+            continue
+        removed += len(drop)
+        if not dry_run:
+            await db.db.facts.update_one(
+                {"_id": keep},
+                {"$set": {"content": group["_id"]["content"], "source": group["_id"]["source"],
+                          "related_entities": entities, "tags": tags}},
+                upsert=True
+            )
+            await db.db.facts.delete_many({"_id": {"$in": drop}})
+    return removed
+
+async def compact(offline: bool = False, dry_run: bool = False):
+    print(f"🧹 Compacting entities{' (dry run)' if dry_run else ''}...")
+    await db.connect()
+    if not db.client:
+        print("❌ DB Connection Failed.")
+        return
+
+    before = await collection_sizes(["movies", "facts"])
+    renamed = await compact_movies(offline, dry_run)
+    removed = await compact_facts(renamed, dry_run)
+    after = await collection_sizes(["movies", "facts"])
+
+    print(f"✅ Merged {len(renamed)} duplicate movies and {removed} duplicate facts.")
+    for name in before:
+        (c0, s0, i0), (c1, s1, i1) = before[name], after[name]
+        print(f"   {name:<7} docs {c0} -> {c1} | data {s0} -> {s1} B | indexes {i0} -> {i1} B")
+    await db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate movies/facts written with random ids.")
+    parser.add_argument("--offline", action="store_true", help="Do not call Wikipedia to resolve page ids")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(compact(offline=args.offline, dry_run=args.dry_run))
@@ -14,9 +14,16 @@ from backend.app.database import db
 from backend.app.ingestion.opensubtitles_agent import OpenSubtitlesAgent
 from backend.app.srt_parser import SRTManager
 from backend.app.vector_agent import VectorEmbeddingAgent
-from backend.app.helpers.cleaner import DataCleanerAgent
+from backend.app.embedding_cache import embedding_cache
+from backend.app.vector_codec import encode_embedding
+from backend.app.vector_index import vector_index, VECTOR_INDEX_PATH
+from backend.app.write_behind import write_queue
+from backend.app.chunker import SubtitleChunker
+from pymongo import ReplaceOne
 
 async def ingest_movie(movie_title: str):
+    # Chunks are keyed by the canonical title, like the chat's tracks and quote hits
+    movie_title = OpenSubtitlesAgent.track_key(movie_title)
     print(f"🚀 Starting HIGH-VELOCITY Ingestion for: {movie_title}")
     
     # 1. Connect to DB
@@ -43,67 +50,59 @@ async def ingest_movie(movie_title: str):
     # 4. Prepare Batches
     print("🧠 Processing & Vectorizing (Turbo Mode)...")
     vec_agent = VectorEmbeddingAgent()
-    cleaner = DataCleanerAgent()
     
-    chunk_size = 10 
-    doc_batches = [] # Hold processed docs
+    chunker = SubtitleChunker()
+    embed_batch_size = 64 # Texts per embedding request
     
     semaphore = asyncio.Semaphore(10) # Max 10 concurrent API calls
     
-    async def process_batch(batch_subs, batch_idx):
-        async with semaphore:
-            text_raw = " ".join([s.text.replace("\n", " ") for s in batch_subs])
-            text_clean = cleaner.clean_text(text_raw)
-            if not text_clean: return None
-
-            start_time = batch_subs[0].start.ordinal / 1000.0
-            end_time = batch_subs[-1].end.ordinal / 1000.0
+    # Token/time-aware chunks with stable ids (movie + time span)
+    chunks = chunker.chunk(movie_title, subs)
+    print(f"   ✂️ {len(subs)} cues packed into {len(chunks)} chunks "
+          f"(≤{chunker.max_tokens} tokens, break on >{chunker.max_gap_seconds}s silence)")
 
-            vector = await vec_agent.generate_embedding(text_clean)
-            if vector:
-                return {
-                    "movie": movie_title,
-                    "text": text_clean,
-                    "start": start_time,
-                    "end": end_time,
-                    "embedding": vector
-                }
-            return None
+    async def embed_batch(batch_chunks):
+        async with semaphore:
+            vectors = await vec_agent.generate_embeddings([c["text"] for c in batch_chunks])
+            return [{**c, "embedding": encode_embedding(v)} for c, v in zip(batch_chunks, vectors) if v]
 
-    tasks = []
-    total_chunks = 0
-    
-    # Create Tasks
-    for i in range(0, len(subs), chunk_size):
-        batch = subs[i:i+chunk_size]
-        if not batch: continue
-        tasks.append(process_batch(batch, i // chunk_size))
-        total_chunks += 1
+    tasks = [
+        embed_batch(chunks[i:i+embed_batch_size])
+        for i in range(0, len(chunks), embed_batch_size)
+    ]
 
-    print(f"   ⚡ Launching {total_chunks} concurrent tasks...")
+    print(f"   ⚡ Launching {len(tasks)} embedding requests for {len(chunks)} chunks...")
     
-    # Run all tasks (gather)
-    # Note: For very large movies, we might want to chunk the gather too, 
-    # but for ~150 chunks, gather is fine.
     results = await asyncio.gather(*tasks)
     
-    # Filter valid results
-    valid_docs = [r for r in results if r]
+    # Flatten valid results
+    valid_docs = [doc for batch in results for doc in batch]
+    print(f"   🗃️ Embedding cache: {embedding_cache.stats}")
 
     # 5. Bulk Store in MongoDB
     if valid_docs:
         print(f"💾 Bulk Writing {len(valid_docs)} vectors to MongoDB...")
         collection = db.db["subtitles"]
         
-        # Clear old data
-        await collection.delete_many({"movie": movie_title})
-        
-        # Batch Insert
-        await collection.insert_many(valid_docs)
+        # Drop chunks that no longer exist, then upsert by stable chunk id
+        await collection.delete_many({"movie": movie_title, "_id": {"$nin": [d["_id"] for d in valid_docs]}})
+        await collection.bulk_write([ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in valid_docs], ordered=False)
+
+        # Refresh the local vector index snapshot for /api/search
+        if vector_index.load(VECTOR_INDEX_PATH):
+            vector_index.delete_movie(movie_title)
+            vector_index.add_documents(valid_docs)
+        else:
+            # No snapshot yet: start from every movie in MongoDB (this one included),
+            # otherwise the snapshot would hold only this movie and hide the rest
+            await vector_index.build_from_db()
+        vector_index.save(VECTOR_INDEX_PATH)
+        print(f"🧭 Vector index now holds {len(vector_index)} chunks ({vector_index.mode}).")
         print("✅ Turbo Ingestion Complete!")
     else:
         print("⚠️ No valid chunks created.")
 
+    await write_queue.stop()
     await db.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import time
+import random
+import bson
+import numpy as np
+
+from backend.app.cache_manager import CacheManager, pick_codec
+
+SUMMARY = (
+    "The Matrix is a 1999 science fiction action film written and directed by the Wachowskis. "
+    "It is the first installment in the Matrix film series, starring Keanu Reeves, Laurence Fishburne, "
+    "Carrie-Anne Moss, Hugo Weaving, and Joe Pantoliano. It depicts a dystopian future in which humanity "
+    "is unknowingly trapped inside the Matrix, a simulated reality that intelligent machines have created "
+    "to distract humans while using their bodies as an energy source. When computer programmer Thomas "
+    "Anderson, under the hacker alias \"Neo\", uncovers the truth, he joins a rebellion against the machines "
+    "along with other people who have been freed from the Matrix. "
+)
+
+def wiki_payload(rng: random.Random) -> dict:
+    # A Wikipedia summary runs a few paragraphs; shuffled words keep it from being one repeated string
+    words = SUMMARY.split()
+    paragraphs = [" ".join(rng.sample(words, len(words))) for _ in range(rng.randint(2, 5))]
+    return {
+        "title": "The Matrix",
+        "summary": "\n".join(paragraphs),
+        "url": "https://en.wikipedia.org/wiki/The_Matrix",
+        "saved_to_db": True,
+        "movie_id": "movie_tmdb_603"
+    }
+
+def fanart_payload(rng: random.Random) -> dict:
+    # Shape of a fanart.tv movie response: a dozen categories of image records
+    categories = ["hdmovielogo", "moviedisc", "movielogo", "movieposter", "hdmovieclearart", "movieart",
+                  "moviebackground", "moviebanner", "moviethumb", "moviedisc"]
+    assets = {"name": "The Matrix", "tmdb_id": "603", "imdb_id": "tt0133093"}
+    for category in categories:
+        assets[category] = [{
+            "id": str(rng.randint(10000, 999999)),
+            "url": f"https://assets.fanart.tv/fanart/movies/603/{category}/the-matrix-{rng.getrandbits(48):012x}.jpg",
+            "lang": rng.choice(["en", "00", "de", "fr"]),
+            "likes": str(rng.randint(0, 40)),
+            **({"disc": "1", "disc_type": "bluray"} if category == "moviedisc" else {})
+        } for _ in range(rng.randint(3, 25))]
+    return {"status": "updated", "assets": assets, "movie": "The Matrix"}
+
+def stored_document(manager: CacheManager, key: str, data: dict) -> bytes:
+    # What the upsert leaves in api_cache
+    payload = manager.encode(key, data)
+    return bson.encode({"_id": key, "data": None, "blob": None, "codec": None, **payload})
+
+def run_benchmark(entries: int = 300):
+    rng = random.Random(7)
+    workload = [(f"wiki_search_tmdb_{i}", wiki_payload(rng)) for i in range(entries)]
+    workload += [(f"fanart_assets_tmdb_{i}", fanart_payload(rng)) for i in range(entries)]
+    print(f"🗜️ api_cache Compression Benchmark ({len(workload)} entries, Wikipedia + Fanart.tv payloads)")
+
+    codecs = [None, "zlib"] + (["zstd"] if pick_codec("zstd") == "zstd" else [])
+    if "zstd" not in codecs:
+        print("   (zstandard not installed: zstd skipped)")
+    baseline = None
+    for codec in codecs:
+        manager = CacheManager(codec=codec or "") # "" disables compression
+        sizes = {"wiki": 0, "fanart": 0}
+        write_ms, read_ms = [], []
+        for key, data in workload:
+            start = time.perf_counter()
+            doc = stored_document(manager, key, data)
+            write_ms.append((time.perf_counter() - start) * 1000)
+            sizes[key.split("_")[0]] += len(doc)
+
+            start = time.perf_counter()
+            decoded = manager.decode(bson.decode(doc))
+            read_ms.append((time.perf_counter() - start) * 1000)
+            assert decoded == data
+
+        total = sum(sizes.values())
+        baseline = baseline or total
+        print(f"   {codec or 'none':<5} wiki {sizes['wiki'] / entries / 1024:5.2f} KB/doc"
+              f" | fanart {sizes['fanart'] / entries / 1024:5.2f} KB/doc"
+              f" | total {total / 1024:7.1f} KB ({total / baseline:4.0%})"
+              f" | write p50 {np.median(write_ms):.3f} ms | read p50 {np.median(read_ms):.3f} ms")
+
+    legacy = {"_id": "wiki_search_tmdb_0", "data": workload[0][1]}
+    assert CacheManager.decode(bson.decode(bson.encode(legacy))) == workload[0][1]
+    print("   legacy (v1) entries decode unchanged")
+
+if __name__ == "__main__":
+    run_benchmark()
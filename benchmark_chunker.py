@@ -0,0 +1,72 @@
+import random
+import pysrt
+
+from backend.app.chunker import SubtitleChunker, estimate_tokens
+from backend.app.helpers.cleaner import DataCleanerAgent
+
+QUICK_LINES = ["No!", "What?", "Go!", "Move!", "Where is he?", "Now!", "Trinity!", "Get down!", "Run."]
+DIALOGUE_LINES = [
+    "I don't know what you're talking about.",
+    "You have to let it all go, Neo. Fear, doubt, and disbelief.",
+    "We don't have much time, they're coming for you.",
+    "Do you believe in fate, Neo?",
+    "<i>The Matrix is everywhere. It is all around us.</i>",
+    "[gunfire] Get to the phone!",
+]
+LONG_LINES = [
+    "I've watched you, Neo. You do not use a computer like that for a living, you do it because it is all you have.",
+    "Let me tell you why you're here. You're here because you know something. What you know you can't explain.",
+    "Billions of people just living out their lives, oblivious. Did you know that the first Matrix was designed to be perfect?",
+]
+
+def synthetic_track(cues: int = 1800, seed: int = 5):
+    """
+    A feature-length track: bursts of rapid dialogue, monologues and scene gaps.
+    """
+    rng = random.Random(seed)
+    track = []
+    t = 5.0
+    pools = {"quick": (QUICK_LINES, 1.2), "dialogue": (DIALOGUE_LINES, 3.0), "long": (LONG_LINES, 5.5)}
+    mode = "dialogue"
+    for i in range(cues):
+        if rng.random() < 0.05:
+            mode = rng.choices(list(pools), weights=(3, 6, 1))[0]
+        if rng.random() < 0.02:
+            t += rng.uniform(6, 30) # scene change / action without dialogue
+        lines, duration = pools[mode]
+        text = rng.choice(lines)
+        track.append({"text": text, "start": t, "end": t + duration, "index": i + 1})
+        t += duration + rng.uniform(0.1, 1.0)
+    return track
+
+def fixed_chunks(track, size: int = 10):
+    cleaner = DataCleanerAgent()
+    lines = cleaner.clean_batch([c["text"] for c in track])
+    return [" ".join(l for l in lines[i:i+size] if l) for i in range(0, len(track), size)]
+
+def report(name: str, texts, batch_size: int = 64):
+    tokens = [estimate_tokens(t) for t in texts if t]
+    requests = -(-len(tokens) // batch_size)
+    print(f"   [{name:<10}] {len(tokens):5} chunks | {requests:3} embedding requests | "
+          f"tokens/chunk avg {sum(tokens) / len(tokens):6.1f} min {min(tokens):4} max {max(tokens):4} | "
+          f"{sum(tokens):6} tokens embedded")
+    return len(tokens)
+
+def run_benchmark():
+    print("✂️ Chunker Benchmark")
+    tracks = {
+        "synthetic feature (1800 cues)": synthetic_track(),
+        "backend/matrix.srt": [
+            {"text": s.text, "start": s.start.ordinal / 1000.0, "end": s.end.ordinal / 1000.0, "index": s.index}
+            for s in pysrt.open("backend/matrix.srt")
+        ],
+    }
+    chunker = SubtitleChunker()
+    for name, track in tracks.items():
+        print(f" {name}")
+        before = report("fixed-10", fixed_chunks(track))
+        after = report("chunker", [c["text"] for c in chunker.chunk(name, track)])
+        print(f"   → {100 * (1 - after / before):.0f}% fewer chunks")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,59 @@
+import os
+import random
+import tempfile
+import time
+
+from backend.app.helpers.cleaner import DataCleanerAgent
+
+LINES = [
+    "<i>You take the blue pill,</i> the story ends.",
+    "[Thunder crashes] BRING ME THANOS!",
+    "(sighs) I know kung fu.",
+    "Follow the <b>white rabbit</b>.",
+    "There is no spoon.\nOnly the mind.",
+    "NEO: (whispering) Whoa.",
+]
+
+def format_time(ms: int) -> str:
+    return f"{ms // 3600000:02}:{ms // 60000 % 60:02}:{ms // 1000 % 60:02},{ms % 1000:03}"
+
+def write_corpus(directory: str, files: int, cues_per_file: int) -> list:
+    rng = random.Random(3)
+    paths = []
+    for f in range(files):
+        path = os.path.join(directory, f"track_{f}.srt")
+        with open(path, "w") as out:
+            for i in range(cues_per_file):
+                start = i * 2500
+                out.write(f"{i + 1}\n{format_time(start)} --> {format_time(start + 2000)}\n{rng.choice(LINES)}\n\n")
+        paths.append(path)
+    return paths
+
+def run_benchmark(files: int = 64, cues_per_file: int = 2000):
+    print("🧹 Cleaner Benchmark")
+    cleaner = DataCleanerAgent()
+    rng = random.Random(1)
+    texts = [rng.choice(LINES) for _ in range(200000)]
+
+    start = time.perf_counter()
+    per_line = [cleaner.clean_text(t.replace("\n", " ")) for t in texts]
+    elapsed = time.perf_counter() - start
+    print(f"   [clean_text  x1 ] {len(texts) / elapsed:12.0f} lines/s")
+
+    start = time.perf_counter()
+    batched = cleaner.clean_batch(texts)
+    elapsed = time.perf_counter() - start
+    print(f"   [clean_batch    ] {len(texts) / elapsed:12.0f} lines/s | identical output: {batched == per_line}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_corpus(tmp, files, cues_per_file)
+        total = files * cues_per_file
+        for workers in sorted({1, max(2, os.cpu_count() or 1)}):
+            start = time.perf_counter()
+            cleaner.clean_corpus(paths, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"   [clean_corpus workers={workers:<2}] {total / elapsed:12.0f} lines/s "
+                  f"({files} SRT files, parse + clean)")
+
+if __name__ == "__main__":
+    run_benchmark()
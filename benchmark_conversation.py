@@ -0,0 +1,66 @@
+import os
+import time
+import asyncio
+import numpy as np
+
+# Offline: simulated model behind a dummy key; latency grows with prompt size like a hosted LLM
+os.environ["FIREWORKS_API_KEY"] = "benchmark"
+os.environ["EMBEDDING_BACKEND"] = "local"
+
+from backend.app.nemo_agent import NeMoAgent
+from backend.app.conversation_memory import ConversationMemory
+from backend.app.chunker import estimate_tokens
+from backend.app.semantic_cache import semantic_cache
+
+BASE_SECONDS = 0.02
+SECONDS_PER_PROMPT_TOKEN = 0.00005
+
+class SimulatedNeMo(NeMoAgent):
+    async def _stream_completion(self, messages, max_tokens: int = 200):
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        await asyncio.sleep(BASE_SECONDS + prompt_tokens * SECONDS_PER_PROMPT_TOKEN)
+        yield " ".join(f"word{i}" for i in range(min(max_tokens, 60)))
+
+QUESTIONS = [
+    "Who is Thanos and why does he want the Infinity Stones?",
+    "How did Gamora end up with Thanos?",
+    "What happened on Vormir?",
+    "Why did Doctor Strange give up the Time Stone?",
+    "Who survived the snap?",
+]
+
+async def run_session(label: str, turns: int, bounded: bool):
+    semantic_cache.invalidate()
+    agent = SimulatedNeMo()
+    memory = ConversationMemory(summarizer=agent)
+    history = []
+    latencies = []
+    for turn in range(turns):
+        query = f"{QUESTIONS[turn % len(QUESTIONS)]} (turn {turn})"
+        if bounded:
+            context = await memory.build_context("bench", query, "Avengers: Infinity War")
+        else:
+            context = {"history": list(history), "summary": "", "facts": [], "movie": "Avengers: Infinity War"}
+
+        start = time.perf_counter()
+        answer = await agent.generate_response(query, context)
+        latencies.append(time.perf_counter() - start)
+
+        memory.add_turn("bench", "user", query)
+        memory.add_turn("bench", "assistant", answer)
+        history += [{"role": "user", "content": query}, {"role": "assistant", "content": answer}]
+        await asyncio.sleep(0) # Let background summaries run
+
+    await memory.stop()
+    tokens = np.array(agent.prompt_tokens)
+    ms = np.array(latencies) * 1000
+    print(f"   {label:<8} prompt tokens first {tokens[0]:5d} | last {tokens[-1]:5d} | max {tokens.max():5d}"
+          f" | LLM latency last 10 turns {ms[-10:].mean():6.0f} ms | summaries {memory.stats['summaries']}")
+
+async def run_benchmark(turns: int = 200):
+    print(f"💬 Conversation Memory Benchmark ({turns} turns, one user)")
+    await run_session("naive", turns, bounded=False)
+    await run_session("bounded", turns, bounded=True)
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
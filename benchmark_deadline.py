@@ -0,0 +1,65 @@
+import time
+import random
+import itertools
+import asyncio
+import numpy as np
+import httpx
+
+from backend.app import main
+from backend.app.helpers.lazy import Lazy
+from backend.app import deadline as deadline_module
+from backend.app.deadline import straggler_count
+
+rng = random.Random(11)
+users = itertools.count()
+
+def upstream_seconds() -> float:
+    # Mostly fast, with a heavy tail (one call in 20 takes seconds)
+    return rng.uniform(2.0, 4.0) if rng.random() < 0.05 else rng.lognormvariate(-2.3, 0.5)
+
+class SimulatedWikipedia:
+    async def search_movie(self, query, deadline=None):
+        await asyncio.sleep(upstream_seconds())
+        return {"title": "The Matrix", "summary": "A simulated reality...", "url": "https://en.wikipedia.org/wiki/The_Matrix"}
+
+class SimulatedFanart:
+    async def get_movie_assets(self, tmdb_id=None, movie_name=None, deadline=None):
+        await asyncio.sleep(upstream_seconds())
+        return {"assets": {"moviebackground": [{"url": "https://images.fanart.tv/fanart/the-matrix-523ce51b89944.jpg"}]}}
+
+class SimulatedSubtitles:
+    async def search_and_download(self, query, deadline=None):
+        await asyncio.sleep(upstream_seconds())
+        return None
+
+async def scenario(label: str, budget_ms: int, requests: int, concurrency: int):
+    deadline_module.CHAT_DEADLINE_MS = budget_ms
+    transport = httpx.ASGITransport(app=main.app)
+    latencies, partial = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def one():
+            nonlocal partial
+            async with semaphore:
+                start = time.perf_counter()
+                body = (await client.post("/api/chat", json={"query": "load The Matrix", "user_id": f"bench{next(users)}"})).json()
+                latencies.append(time.perf_counter() - start)
+                partial += any(s["status"] != "ok" for s in body["data"]["sources"].values())
+        await asyncio.gather(*(one() for _ in range(requests)))
+
+    ms = np.array(latencies) * 1000
+    print(f"   {label:<18} p50 {np.median(ms):6.0f} ms | p99 {np.percentile(ms, 99):6.0f} ms | max {ms.max():6.0f} ms"
+          f" | partial responses {partial}/{requests} | stragglers still running {straggler_count()}")
+
+async def run_benchmark(requests: int = 200, concurrency: int = 20):
+    print(f"⏱️ Deadline Benchmark ({requests} ingestion chats, 3 simulated upstreams with a 5% slow tail)")
+    main.router.instance
+    main.wiki_agent = Lazy(SimulatedWikipedia)
+    main.fanart_agent = Lazy(SimulatedFanart)
+    main.OpenSubtitlesAgent = SimulatedSubtitles
+    await scenario("no deadline", 60000, requests, concurrency)
+    await scenario("deadline 1000 ms", 1000, requests, concurrency)
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
@@ -0,0 +1,106 @@
+import time
+import random
+import asyncio
+from contextlib import contextmanager
+import httpx
+import uvicorn
+
+from backend.app import main
+from backend.app import deadline as deadline_module
+from backend.app.helpers.lazy import Lazy
+from backend.app.deadline import ChatSupervisor, fan_out_stats
+
+rng = random.Random(3)
+upstream = {"started": 0, "running": 0, "threads": 0, "completed": 0, "cancelled": 0, "busy_s": 0.0}
+
+async def upstream_call(low: float, high: float):
+    # An upstream request: counts how long it held a connection and whether it finished
+    start = time.perf_counter()
+    upstream["running"] += 1
+    upstream["started"] += 1
+    try:
+        await asyncio.sleep(rng.uniform(low, high))
+        upstream["completed"] += 1
+    except asyncio.CancelledError:
+        upstream["cancelled"] += 1
+        raise
+    finally:
+        upstream["running"] -= 1
+        upstream["busy_s"] += time.perf_counter() - start
+
+def blocking_upstream_call(low: float, high: float):
+    # A blocking client (like the wikipedia package) in a worker thread: cancelling cannot stop it
+    start = time.perf_counter()
+    upstream["threads"] += 1
+    upstream["started"] += 1
+    time.sleep(rng.uniform(low, high))
+    upstream["threads"] -= 1
+    upstream["completed"] += 1
+    upstream["busy_s"] += time.perf_counter() - start
+
+class SimulatedWikipedia:
+    async def search_movie(self, query, deadline=None):
+        await deadline_module.run_blocking(blocking_upstream_call, 0.3, 0.6)
+        return {"title": "The Matrix", "summary": "A simulated reality...", "url": "https://en.wikipedia.org/wiki/The_Matrix"}
+
+class SimulatedFanart:
+    async def get_movie_assets(self, tmdb_id=None, movie_name=None, deadline=None):
+        await upstream_call(0.5, 1.5)
+        return {"assets": {}}
+
+class SimulatedSubtitles:
+    async def search_and_download(self, query, deadline=None):
+        await upstream_call(1.0, 3.0)
+        return None
+
+class UnsupervisedChats(ChatSupervisor):
+    """
+    The previous behaviour: nothing notices that the client left.
+    """
+    @contextmanager
+    def track(self, user_id, http_request=None):
+        yield None
+
+async def scenario(label: str, supervisor: ChatSupervisor, chats: int, leave_after: float, port: int):
+    main.supervisor = supervisor
+    upstream.update(started=0, running=0, threads=0, completed=0, cancelled=0, busy_s=0.0)
+    server = uvicorn.Server(uvicorn.Config(main.app, port=port, log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async def impatient_user(client: httpx.AsyncClient, i: int):
+        # Sends a chat and navigates away before the slow sources return (cancelling closes the connection)
+        request = asyncio.create_task(client.post("/api/chat", json={"query": "load The Matrix", "user_id": f"u{i}"}))
+        await asyncio.sleep(leave_after)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30,
+                                 limits=httpx.Limits(max_connections=chats)) as client:
+        await asyncio.gather(*(impatient_user(client, i) for i in range(chats)))
+    await asyncio.sleep(0.5)
+    running_after = upstream["running"] + upstream["threads"]
+    while upstream["running"] or upstream["threads"]:
+        await asyncio.sleep(0.05)
+    server.should_exit = True
+    await serving
+
+    print(f"   {label:<12} upstream calls {upstream['started']:3d} | completed {upstream['completed']:3d}"
+          f" | cancelled {upstream['cancelled']:3d} | still running 0.5 s after users left {running_after:3d}"
+          f" | blocking threads left running by cancelled chats {deadline_module.stats['threads_left_running']:2d}"
+          f" | upstream busy time {upstream['busy_s']:6.1f} s")
+
+async def run_benchmark(chats: int = 50, leave_after: float = 0.4):
+    print(f"🚪 Disconnect Benchmark ({chats} users leave {leave_after * 1000:.0f} ms into an ingestion chat)")
+    main.router.instance # Train the intent classifier up front
+    main.wiki_agent = Lazy(SimulatedWikipedia)
+    main.fanart_agent = Lazy(SimulatedFanart)
+    main.OpenSubtitlesAgent = SimulatedSubtitles
+    deadline_module.CHAT_DEADLINE_MS = 10000
+    await scenario("unsupervised", UnsupervisedChats(), chats, leave_after, port=8768)
+    await scenario("supervised", ChatSupervisor(), chats, leave_after, port=8769)
+    print(f"   fan-out stats: {fan_out_stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+# Load Env
+load_dotenv("backend/.env")
+
+from backend.app.srt_parser import SRTManager
+from backend.app.helpers.cleaner import DataCleanerAgent
+from backend.app.embedding_backends import LocalHashingEmbeddingBackend, FireworksEmbeddingBackend
+
+def load_corpus():
+    manager = SRTManager()
+    manager.load_from_path("backend/matrix.srt")
+    cleaner = DataCleanerAgent()
+    lines = [cleaner.clean_text(s.text.replace("\n", " ")) for s in manager.subs]
+    return [l for l in lines if l]
+
+async def bench_backend(backend, texts, batch_size: int, rounds: int = 3):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            await backend.embed(texts[i:i+batch_size])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+async def run_benchmark():
+    print("⏱️ Embedding Backend Benchmark")
+    cues = load_corpus()
+    # Repeat the track with a take counter so the corpus is big enough to time
+    texts = [f"{cue} (take {i})" for i in range(300) for cue in cues]
+    print(f"   Corpus: {len(texts)} texts built from {len(cues)} cleaned cues of matrix.srt")
+
+    local = LocalHashingEmbeddingBackend()
+    for batch_size in (1, 64, 1024):
+        elapsed = await bench_backend(local, texts, batch_size)
+        print(f"   [local]     batch={batch_size:<5} {elapsed * 1000:8.1f} ms total | "
+              f"{len(texts) / elapsed:9.0f} texts/s | {elapsed / len(texts) * 1e6:8.1f} µs/text")
+
+    # Determinism check
+    a = local.embed_array(texts[:10])
+    b = LocalHashingEmbeddingBackend().embed_array(texts[:10])
+    print(f"   [local]     deterministic across instances: {'YES' if (a == b).all() else 'NO'}")
+
+    api_key = os.getenv("FIREWORKS_API_KEY")
+    if not api_key:
+        print("   [fireworks] skipped (no FIREWORKS_API_KEY)")
+        return
+
+    remote = FireworksEmbeddingBackend(api_key)
+    sample = texts[:128]
+    for batch_size in (1, 64):
+        elapsed = await bench_backend(remote, sample, batch_size, rounds=1)
+        print(f"   [fireworks] batch={batch_size:<5} {elapsed * 1000:8.1f} ms total | "
+              f"{len(sample) / elapsed:9.0f} texts/s | {elapsed / len(sample) * 1e6:8.1f} µs/text")
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
@@ -0,0 +1,78 @@
+import io
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import httpx
+
+from backend.app import main
+from backend.app.image_proxy import ImageProxy
+
+def fanart_like_background(width: int = 1920, height: int = 1080) -> bytes:
+    # Photo-like content (smooth gradients + grain) compresses like a real backdrop
+    from PIL import Image
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x / width * 255, y / height * 255, (x + y) / (width + height) * 255], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 18, base.shape), 0, 255).astype(np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(pixels).save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+class Upstream(BaseHTTPRequestHandler):
+    body = b""
+    requests = 0
+
+    def do_GET(self):
+        Upstream.requests += 1
+        time.sleep(0.15) # CDN round trip
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+async def run_benchmark(cards: int = 50):
+    print(f"🖼️ Image Proxy Benchmark ({cards} card renders of one 1920x1080 background)")
+    Upstream.body = fanart_like_background()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    source = f"http://127.0.0.1:{server.server_port}/fanart/the-matrix-523ce51b89944.jpg"
+
+    cache_dir = tempfile.mkdtemp(prefix="image_cache_")
+    main.image_proxy = ImageProxy(cache_dir=cache_dir, allowed_hosts="127.0.0.1", public_base="http://bench")
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async with httpx.AsyncClient() as direct:
+            start = time.perf_counter()
+            for _ in range(cards):
+                body = (await direct.get(source)).content
+            direct_ms = (time.perf_counter() - start) * 1000 / cards
+        print(f"   hot-link            {len(body) / 1024:7.1f} KB per card | {direct_ms:6.1f} ms per card")
+
+        proxied = main.image_proxy.proxy_url(source).replace("http://bench", "")
+        Upstream.requests = 0
+        for label, accept in (("proxy (JPEG)", "image/*"), ("proxy (WebP)", "image/webp,image/*")):
+            latencies = []
+            for _ in range(cards):
+                start = time.perf_counter()
+                resp = await client.get(proxied, headers={"Accept": accept})
+                latencies.append((time.perf_counter() - start) * 1000)
+            print(f"   {label:<19} {len(resp.content) / 1024:7.1f} KB per card | first {latencies[0]:6.1f} ms,"
+                  f" cached {np.median(latencies[1:]):5.1f} ms | {resp.headers['content-type']}")
+
+        revalidated = await client.get(proxied, headers={"Accept": "image/webp", "If-None-Match": resp.headers["etag"]})
+        print(f"   revalidation        HTTP {revalidated.status_code}, {len(revalidated.content)} bytes"
+              f" | upstream fetches through the proxy: {Upstream.requests}")
+
+    server.shutdown()
+    shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
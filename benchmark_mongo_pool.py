@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import asyncio
+from dotenv import load_dotenv
+
+# Load Env
+load_dotenv("backend/.env")
+
+from backend.app.database import db
+
+async def run_load(concurrency: int, requests_per_worker: int):
+    async def worker(n: int):
+        for i in range(requests_per_worker):
+            await db.reader("movies").find_one({"_id": f"movie_tmdb_{(n * requests_per_worker + i) % 50}"})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return time.perf_counter() - start
+
+async def run_benchmark(pool_sizes=(2, 10, 50), concurrency: int = 100, requests_per_worker: int = 20):
+    """
+    Same read load under different pool sizes: checkout wait in /api/metrics
+    (`mongo_pool.avg_wait_ms`) should track the latency difference.
+    """
+    print(f"🔌 Mongo Pool Benchmark ({concurrency} concurrent workers x {requests_per_worker} reads)")
+    for size in pool_sizes:
+        os.environ["MONGO_MAX_POOL_SIZE"] = str(size)
+        db.pool_metrics.reset()
+        await db.connect(init_indexes=False)
+        if db.db is None:
+            print("   ❌ Connection Failed (start a local mongod or check MONGO_URI)")
+            return 1
+        await run_load(concurrency, 1) # Open the pool before timing
+        db.pool_metrics.reset()
+
+        elapsed = await run_load(concurrency, requests_per_worker)
+        stats = db.pool_stats()
+        total = concurrency * requests_per_worker
+        print(f"   maxPoolSize {size:>3}: {total / elapsed:8.0f} reads/s | avg wait {stats['avg_wait_ms']:7.2f} ms"
+              f" | max wait {stats['max_wait_ms']:7.2f} ms | peak checked out {stats['max_checked_out']}")
+        await db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_benchmark()))
@@ -0,0 +1,70 @@
+import time
+import random
+import asyncio
+import numpy as np
+
+from backend.app.srt_parser import SRTManager
+from backend.app.prefetcher import EntityPrefetcher
+from backend.app.entity_catalog import ENTITIES, detect_entity
+
+SPEEDUP = 10 # Playback runs 10x faster than real time; upstream latencies are scaled the same way
+rng = random.Random(9)
+upstream_calls = {"wikipedia": 0, "fanart": 0}
+
+class SimulatedWikipedia:
+    async def lookup_summary(self, query):
+        upstream_calls["wikipedia"] += 1
+        await asyncio.sleep(rng.uniform(0.4, 1.5) / SPEEDUP)
+        return {"title": query, "summary": f"About {query}."}
+
+class SimulatedFanart:
+    async def get_movie_assets(self, tmdb_id=None, movie_name=None, deadline=None):
+        upstream_calls["fanart"] += 1
+        await asyncio.sleep(rng.uniform(0.2, 0.8) / SPEEDUP)
+        return {"assets": {"moviebackground": [{"url": "https://images.fanart.tv/fanart/the-matrix-523ce51b89944.jpg"}]}}
+
+def synthetic_track(cues: int = 300) -> str:
+    # One cue every 2 s; every 5th line mentions a catalog entity
+    lines, t = [], 1.0
+    for i in range(cues):
+        text = f"{rng.choice(ENTITIES)['match']} walks in." if i % 5 == 0 else "Some dialogue."
+        start, end = t, t + 1.8
+        fmt = lambda s: time.strftime("%H:%M:%S", time.gmtime(int(s))) + f",{int(s * 1000) % 1000:03d}"
+        lines.append(f"{i + 1}\n{fmt(start)} --> {fmt(end)}\n{text}\n")
+        t += 2.0
+    return "\n".join(lines)
+
+async def watch(srt: SRTManager, prefetcher: EntityPrefetcher, duration: float, offset: float, poll: float = 0.5) -> list:
+    # A viewer's player polls /api/sync every `poll` seconds of track time
+    ready, position = [], offset
+    while position < duration:
+        prefetcher.schedule(srt.movie, srt.get_subtitles_between(position, position + prefetcher.lookahead))
+        sub = srt.get_subtitle_at_time(position)
+        entity = detect_entity(sub["text"]) if sub else None
+        if entity:
+            ready.append(prefetcher.get(srt.movie, entity["name"]) is not None)
+        position += poll
+        await asyncio.sleep(poll / SPEEDUP)
+    return ready
+
+async def scenario(label: str, srt: SRTManager, lookahead: float, viewers: int):
+    upstream_calls.update(wikipedia=0, fanart=0)
+    prefetcher = EntityPrefetcher(lookahead=lookahead, wiki_agent=SimulatedWikipedia(), fanart_agent=SimulatedFanart())
+    duration = 120.0
+    runs = await asyncio.gather(*(watch(srt, prefetcher, duration, offset=rng.uniform(0, 10)) for _ in range(viewers)))
+    await prefetcher.stop()
+    ready = np.array([r for run in runs for r in run])
+    print(f"   {label:<22} cards ready when spoken {ready.mean() * 100:5.1f}%"
+          f" | upstream calls wiki {upstream_calls['wikipedia']:3d} fanart {upstream_calls['fanart']:3d}"
+          f" | deduplicated {prefetcher.stats['deduplicated']}")
+
+async def run_benchmark(viewers: int = 20):
+    print(f"🔮 Prefetch Benchmark ({viewers} viewers of the same movie, 120 s of track at {SPEEDUP}x)")
+    srt = SRTManager()
+    srt.load_file(synthetic_track(), movie="The Matrix")
+    await scenario("no look-ahead", srt, 0, viewers)
+    await scenario("look-ahead 10 s", srt, 10, viewers)
+    await scenario("look-ahead 30 s", srt, 30, viewers)
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
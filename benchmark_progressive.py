@@ -0,0 +1,78 @@
+import json
+import time
+import random
+import itertools
+import asyncio
+import numpy as np
+import httpx
+import uvicorn
+
+from backend.app import main
+from backend.app.helpers.lazy import Lazy
+
+rng = random.Random(5)
+users = itertools.count()
+
+# Per-source latency ranges (seconds): Wikipedia is usually first, subtitles last
+LATENCY = {"wikipedia": (0.10, 0.35), "fanart": (0.20, 0.60), "subtitles": (0.50, 1.50)}
+
+class SimulatedWikipedia:
+    async def search_movie(self, query, deadline=None):
+        await asyncio.sleep(rng.uniform(*LATENCY["wikipedia"]))
+        return {"title": "The Matrix", "summary": "A simulated reality...", "url": "https://en.wikipedia.org/wiki/The_Matrix"}
+
+class SimulatedFanart:
+    async def get_movie_assets(self, tmdb_id=None, movie_name=None, deadline=None):
+        await asyncio.sleep(rng.uniform(*LATENCY["fanart"]))
+        return {"assets": {"moviebackground": [{"url": "https://images.fanart.tv/fanart/the-matrix-523ce51b89944.jpg"}]}}
+
+class SimulatedSubtitles:
+    async def search_and_download(self, query, deadline=None):
+        await asyncio.sleep(rng.uniform(*LATENCY["subtitles"]))
+        return "1\n00:00:01,000 --> 00:00:02,000\nWake up, Neo.\n"
+
+async def chat(client: httpx.AsyncClient) -> dict:
+    # Times to the first UI fragment, the first image and the complete response
+    start, marks = time.perf_counter(), {}
+    async with client.stream("POST", "/api/chat/stream", json={"query": "load The Matrix", "user_id": f"bench{next(users)}"}) as response:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            event, now = json.loads(line), time.perf_counter() - start
+            if event["type"] == "ui":
+                marks.setdefault("first_card", now)
+                if "https://images.fanart.tv" in json.dumps(event["ui_schema"]):
+                    marks.setdefault("image", now)
+            elif event["type"] == "final":
+                marks["final"] = now
+    return marks
+
+async def run_benchmark(requests: int = 50, concurrency: int = 10, port: int = 8767):
+    print(f"🃏 Progressive UI Benchmark ({requests} ingestion chats, simulated sources)")
+    main.router.instance # Train the intent classifier up front
+    main.wiki_agent = Lazy(SimulatedWikipedia)
+    main.fanart_agent = Lazy(SimulatedFanart)
+    main.OpenSubtitlesAgent = SimulatedSubtitles
+
+    # A real server: in-process ASGI transports buffer the whole response
+    server = uvicorn.Server(uvicorn.Config(main.app, port=port, log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+        async def one():
+            async with semaphore:
+                return await chat(client)
+        runs = await asyncio.gather(*(one() for _ in range(requests)))
+
+    server.should_exit = True
+    await serving
+
+    for label, key in (("first card", "first_card"), ("card with image", "image"), ("full response", "final")):
+        ms = np.array([run[key] for run in runs]) * 1000
+        print(f"   {label:<16} p50 {np.median(ms):6.0f} ms | p99 {np.percentile(ms, 99):6.0f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
@@ -0,0 +1,55 @@
+import time
+import random
+import numpy as np
+
+from backend.app.quote_index import QuoteIndex
+
+# Dialogue vocabulary is Zipfian: a few words everywhere, most words rare
+COMMON = ("i you we they the a is are was not never here there now go come know think want need see look "
+          "tell say bring me him her them it what where why how this that").split()
+NAMES = "thanos thor stones head snap fingers universe balance gauntlet stormbreaker vormir wakanda".split()
+
+def vocabulary(rng: random.Random, size: int = 6000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    rare = {"".join(rng.choices(letters, k=rng.randint(3, 9))) for _ in range(size)}
+    words = COMMON + NAMES + sorted(rare)
+    weights = [1.0 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+QUERIES = ['"you should have gone for the head"', '"bring me thanos"', "snap fingers", "balance universe",
+           '"i am inevitable"', "where is the stone", '"wait for it"', "brother father"]
+
+def make_track(rng: random.Random, words: list, weights: list, cues: int):
+    track = []
+    for i in range(cues):
+        line = rng.choices(words, weights, k=rng.randint(3, 12))
+        if i % 400 == 0:
+            line = "you should have gone for the head".split() # A quote that really is in the movie
+        track.append({"text": " ".join(line).capitalize(), "start": i * 3.0, "end": i * 3.0 + 2.5, "index": i + 1})
+    return track
+
+def run_benchmark(tracks: int = 50, cues: int = 1500, rounds: int = 50):
+    print(f"🔎 Quote Index Benchmark ({tracks} tracks x {cues} cues)")
+    rng = random.Random(3)
+    words, weights = vocabulary(rng)
+    index = QuoteIndex()
+    start = time.perf_counter()
+    for t in range(tracks):
+        index.add_track(f"Movie {t}", make_track(rng, words, weights, cues))
+    print(f"   build: {(time.perf_counter() - start) * 1000:.0f} ms, {len(index)} cues, {len(index.postings)} terms")
+
+    for label, movie in (("all tracks", None), ("one movie ", "Movie 7")):
+        phrase_us, term_us = [], []
+        for _ in range(rounds):
+            for query in QUERIES:
+                start = time.perf_counter()
+                index.search(query, k=10, movie=movie)
+                (phrase_us if '"' in query else term_us).append((time.perf_counter() - start) * 1e6)
+        print(f"   {label} | phrase p50 {np.median(phrase_us):8.1f} µs, p99 {np.percentile(phrase_us, 99):8.1f} µs"
+              f" | BM25 terms p50 {np.median(term_us):8.1f} µs, p99 {np.percentile(term_us, 99):8.1f} µs")
+
+    hits = index.search('"you should have gone for the head"', k=3, movie="Movie 7")
+    print(f"   phrase hits in Movie 7: {[round(h['start']) for h in hits]} s")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,74 @@
+import os
+import time
+import asyncio
+import tempfile
+import multiprocessing
+import numpy as np
+
+from backend.app.rate_limiter import (RateLimiter, UpstreamGuard, UpstreamLimited,
+                                      MemoryBucketStore, SQLiteBucketStore)
+
+async def download(guard: UpstreamGuard) -> bool:
+    # One subtitle download against the shared OpenSubtitles quota
+    try:
+        async with guard.guard("opensubtitles"):
+            await asyncio.sleep(0.005)
+        return True
+    except UpstreamLimited:
+        return False
+
+async def scenario(per_user_limit: bool, spam: int = 200, users: int = 20, quota: int = 50):
+    store = MemoryBucketStore()
+    limiter = RateLimiter(store, limits={"chat": ("30/60", 10)} if per_user_limit else {})
+    guard = UpstreamGuard(store, concurrency="opensubtitles=32", quotas=f"opensubtitles={quota}/86400")
+    served = {"spammer": 0, "others": 0}
+    latencies = []
+
+    async def request(user: str):
+        start = time.perf_counter()
+        if (await limiter.check("chat", user)).allowed:
+            ok = await download(guard)
+            served["spammer" if user == "spammer" else "others"] += ok
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    for _ in range(spam):
+        await request("spammer")
+    await asyncio.gather(*(request(f"user{i}") for i in range(users)))
+    return served, guard.stats["opensubtitles"], latencies
+
+def hammer(path: str, key: str, calls: int, out):
+    store = SQLiteBucketStore(path)
+    out.put(sum(store.take(key, rate=0.001, burst=100) == 0 for _ in range(calls)))
+    store.close()
+
+def run_benchmark():
+    print("🚦 Rate Limiter Benchmark")
+
+    for label, limited in (("no per-user limit", False), ("per-user limit  ", True)):
+        served, upstream, latencies = asyncio.run(scenario(limited))
+        print(f"   {label} | 200 spam requests, then 20 users x 1 (quota 50): downloads spammer {served['spammer']:3d},"
+              f" other users {served['others']:2d}/20 | quota refusals {upstream['quota']:3d}"
+              f" | p99 {np.percentile(latencies, 99):.1f} ms")
+
+    for store in (MemoryBucketStore(), SQLiteBucketStore(os.path.join(tempfile.mkdtemp(), "buckets.sqlite3"))):
+        samples = []
+        for i in range(2000):
+            start = time.perf_counter()
+            store.take(f"user:chat:u{i % 200}", rate=0.5, burst=10)
+            samples.append((time.perf_counter() - start) * 1e6)
+        print(f"   {store.kind:<6} store: take p50 {np.median(samples):6.1f} µs, p99 {np.percentile(samples, 99):7.1f} µs")
+        store.close()
+
+    # Several workers, one bucket: together they must not exceed its burst
+    path = os.path.join(tempfile.mkdtemp(), "buckets.sqlite3")
+    out = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=hammer, args=(path, "upstream:opensubtitles", 100, out)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    allowed = sum(out.get() for _ in workers)
+    print(f"   sqlite store, 4 processes x 100 takes on a 100-token bucket: {allowed} allowed")
+
+if __name__ == "__main__":
+    run_benchmark()
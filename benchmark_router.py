@@ -0,0 +1,60 @@
+import os
+import time
+import asyncio
+import numpy as np
+
+# Keep the benchmark offline: low-confidence queries keep the classifier's best guess
+os.environ.pop("FIREWORKS_API_KEY", None)
+
+from backend.app.agent_router import AgentRouter
+from backend.app.intent_classifier import IntentClassifier, load_labelled
+
+HOLDOUT_PATH = "backend/data/intent_queries_holdout.jsonl"
+
+def legacy_route(query: str) -> str:
+    # Keyword rules the router used before the classifier
+    q = query.lower()
+    if "buy" in q or "gift card" in q:
+        return "commerce"
+    if "matrix" in q or "find" in q:
+        return "ingestion"
+    return "reasoning"
+
+def percentile_us(samples, p):
+    return np.percentile(np.array(samples) * 1e6, p)
+
+async def run_benchmark():
+    print("🧭 Router Benchmark (held-out queries)")
+    queries, labels = load_labelled(HOLDOUT_PATH)
+
+    start = time.perf_counter()
+    router = AgentRouter(classifier=IntentClassifier().fit_file())
+    print(f"   Classifier trained in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    cold, warm, predicted = [], [], []
+    for q in queries:
+        t = time.perf_counter()
+        predicted.append(await router.route_query(q))
+        cold.append(time.perf_counter() - t)
+    for q in queries:
+        t = time.perf_counter()
+        await router.route_query(q)
+        warm.append(time.perf_counter() - t)
+
+    confident = np.array([router.classifier.predict(router.normalize(q))[1] >= router.confidence_threshold for q in queries])
+    correct = np.array([p == l for p, l in zip(predicted, labels)])
+    legacy = np.mean([legacy_route(q) == l for q, l in zip(queries, labels)])
+
+    print(f"   Accuracy (tiered router):  {correct.mean():.1%} on {len(queries)} queries")
+    print(f"   Accuracy (confident only): {correct[confident].mean():.1%} "
+          f"({confident.mean():.0%} handled locally, {1 - confident.mean():.0%} would escalate to the LLM)")
+    print(f"   Accuracy (legacy keywords): {legacy:.1%}")
+    print(f"   Latency uncached: p50 {percentile_us(cold, 50):6.0f} us | p99 {percentile_us(cold, 99):6.0f} us")
+    print(f"   Latency cached:   p50 {percentile_us(warm, 50):6.1f} us | p99 {percentile_us(warm, 99):6.1f} us")
+
+    for intent in sorted(set(labels)):
+        mask = np.array([l == intent for l in labels])
+        print(f"      {intent:<10} {correct[mask].mean():6.1%}")
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
@@ -0,0 +1,67 @@
+import os
+import time
+import asyncio
+import random
+import numpy as np
+
+# Offline: a simulated model behind a dummy key, and the local embedder for cache lookups
+os.environ["FIREWORKS_API_KEY"] = "benchmark"
+os.environ["EMBEDDING_BACKEND"] = "local"
+
+from backend.app.nemo_agent import NeMoAgent
+from backend.app.semantic_cache import semantic_cache
+
+LLM_SECONDS = 0.3
+
+# Groups of questions that deserve the same answer, and their movie
+QUESTIONS = [
+    ("Avengers: Infinity War", ["Who is Thanos?", "who is thanos", "Who is Thanos ?!", "who is thanos exactly"]),
+    ("Avengers: Infinity War", ["Who is Thanos's daughter?"]),
+    ("Avengers: Infinity War", ["Why does Thanos want the stones?", "why does thanos want the infinity stones",
+                                "why does Thanos want all the stones"]),
+    ("Avengers: Infinity War", ["Who killed Gamora?", "who killed gamora"]),
+    ("Avengers: Infinity War", ["Who killed Loki?"]),
+    ("Avengers: Infinity War", ["What is the Soul Stone?", "what is the soul stone exactly"]),
+    ("The Matrix", ["What is the Matrix?", "what is the matrix about", "What is the matrix"]),
+    ("The Matrix", ["Who is Morpheus?", "who is morpheus"]),
+    ("The Matrix", ["Who is Thanos?"]), # Same words, other movie: must not reuse the Infinity War answer
+]
+
+class SimulatedNeMo(NeMoAgent):
+    async def _stream_completion(self, messages):
+        await asyncio.sleep(LLM_SECONDS)
+        yield f"answer to: {messages[-1]['content']}"
+
+async def run_scenario(threshold: float, requests: int):
+    semantic_cache.invalidate()
+    semantic_cache.threshold = threshold
+    semantic_cache.stats = {k: 0.0 if isinstance(v, float) else 0 for k, v in semantic_cache.stats.items()}
+    agent = SimulatedNeMo()
+    rng = random.Random(5)
+    groups = [(movie, group) for movie, group in QUESTIONS]
+
+    latencies, wrong = [], 0
+    for _ in range(requests):
+        movie, group = rng.choice(groups)
+        query = rng.choice(group)
+        start = time.perf_counter()
+        answer = await agent.generate_response(query, scope=movie)
+        latencies.append(time.perf_counter() - start)
+        # An answer generated for a question from another group would be a false hit
+        if not any(answer == f"answer to: {q}" for q in group):
+            wrong += 1
+
+    metrics = semantic_cache.metrics()
+    ms = np.array(latencies) * 1000
+    print(f"   threshold {threshold:.2f}: hit rate {metrics['hit_rate']:6.1%} (exact {metrics['exact_hits']:>3}, "
+          f"semantic {metrics['semantic_hits']:>3}) | LLM calls {agent.completions:>2} | mean latency {ms.mean():6.2f} ms"
+          f" | saved {metrics['saved_ms'] / 1000:5.1f} s | wrong answers {wrong}")
+
+async def run_benchmark(requests: int = 400, thresholds=(1.01, 0.9, 0.85, 0.8, 0.7)):
+    print(f"🧠 Semantic Cache Benchmark ({requests} requests, simulated LLM {LLM_SECONDS * 1000:.0f} ms, local embedder)")
+    print("   (threshold > 1 = exact-match fast path only)")
+    for threshold in thresholds:
+        await run_scenario(threshold, requests)
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
@@ -0,0 +1,63 @@
+import sys
+import time
+import asyncio
+import numpy as np
+from dotenv import load_dotenv
+
+# Load Env
+load_dotenv("backend/.env")
+
+from backend.app.database import db
+from backend.app.shared_state import SharedState
+
+async def run_benchmark(changes: int = 50, reads: int = 100000):
+    """
+    Two SharedState instances stand in for two uvicorn workers: how long a
+    movie loaded by one takes to reach the other, and what reads cost.
+    """
+    print(f"🔗 Shared State Benchmark ({changes} movie loads across 2 workers)")
+    await db.connect(init_indexes=False)
+    if db.db is None:
+        print("   ❌ Connection Failed (start a local mongod or check MONGO_URI)")
+        return 1
+
+    collection = "app_state_benchmark"
+    await db.db[collection].drop()
+    await db.db[collection].create_index("updated_at")
+    writer = SharedState(collection, poll_ms=100, worker_id="bench-writer")
+    reader = SharedState(collection, poll_ms=100, worker_id="bench-reader")
+    arrived = {}
+    reader.subscribe("loaded_movie", lambda key, value: arrived.setdefault(value["movie"], time.perf_counter()))
+    writer.subscribe("loaded_movie", lambda key, value: None)
+    await writer.start()
+    await reader.start()
+    await asyncio.sleep(0.3) # Let the followers settle on change streams or polling
+
+    set_ms, lag_ms = [], []
+    for i in range(changes):
+        movie = f"Movie {i}"
+        start = time.perf_counter()
+        await writer.set("loaded_movie", {"movie": movie, "srt": "1\n00:00:01,000 --> 00:00:02,000\nHello\n" * 200})
+        set_ms.append((time.perf_counter() - start) * 1000)
+        while movie not in arrived:
+            await asyncio.sleep(0.001)
+        lag_ms.append((arrived[movie] - start) * 1000)
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        reader.get("loaded_movie")
+    get_us = (time.perf_counter() - start) / reads * 1e6
+
+    consistent = reader.get("loaded_movie") == writer.get("loaded_movie")
+    print(f"   follower mode: {reader.mode}")
+    print(f"   set p50 {np.median(set_ms):.2f} ms | visible in the other worker p50 {np.median(lag_ms):.1f} ms,"
+          f" p99 {np.percentile(lag_ms, 99):.1f} ms | get {get_us:.2f} µs | workers agree: {consistent}")
+
+    await writer.stop()
+    await reader.stop()
+    await db.db[collection].drop()
+    await db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_benchmark()))
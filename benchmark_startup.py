@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import subprocess
+import requests
+
+PORT = int(os.getenv("BENCHMARK_PORT", "8765"))
+BASE = f"http://127.0.0.1:{PORT}"
+
+def wait_for(method, path: str, timeout: float, **kwargs):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = requests.request(method, BASE + path, timeout=1, **kwargs)
+            if response.status_code == 200:
+                return response
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.02)
+    return None
+
+def run_benchmark(runs: int = 3, timeout: float = 60.0):
+    print("🚀 Cold Start Benchmark (uvicorn subprocess)")
+    for run in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(PORT), "--log-level", "warning"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            first = wait_for("POST", "/api/sync", timeout, json={"timestamp_seconds": 0})
+            first_ms = (time.perf_counter() - start) * 1000
+
+            warm_ms = None
+            while first and time.perf_counter() - start < timeout:
+                status = requests.get(BASE + "/api/ready", timeout=1).json()
+                if status["warmup_complete"]:
+                    warm_ms = (time.perf_counter() - start) * 1000
+                    break
+                time.sleep(0.05)
+
+            print(f"   Run {run + 1}: first /api/sync {first_ms:7.0f} ms"
+                  f" | warmup complete {f'{warm_ms:7.0f} ms' if warm_ms else 'timeout'}")
+            if first and warm_ms:
+                for name, step in status["steps"].items():
+                    print(f"      {name:<14} {step['state']:<7} {step.get('duration_ms', 0):8.1f} ms")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+if __name__ == "__main__":
+    run_benchmark()
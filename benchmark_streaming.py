@@ -0,0 +1,89 @@
+import os
+import json
+import time
+import asyncio
+import numpy as np
+import httpx
+import uvicorn
+
+# Offline: the LLM is simulated below with a fixed token rate
+os.environ.pop("FIREWORKS_API_KEY", None)
+
+from backend.app import main
+from backend.app.helpers.lazy import Lazy
+from backend.app.nemo_agent import NeMoAgent
+
+TOKENS = 60
+FIRST_TOKEN_S = 0.25
+PER_TOKEN_S = 0.01
+
+class SimulatedNeMo(NeMoAgent):
+    """
+    Streams TOKENS tokens after FIRST_TOKEN_S, like a hosted model would.
+    """
+    async def stream_response(self, user_query, context=None):
+        await asyncio.sleep(FIRST_TOKEN_S)
+        for i in range(TOKENS):
+            yield f"tok{i} "
+            await asyncio.sleep(PER_TOKEN_S)
+
+class BlockingNeMo(NeMoAgent):
+    """
+    The previous behaviour: a synchronous client call inside `async def`
+    holds the event loop for the whole completion.
+    """
+    async def stream_response(self, user_query, context=None):
+        time.sleep(FIRST_TOKEN_S + TOKENS * PER_TOKEN_S)
+        yield " ".join(f"tok{i}" for i in range(TOKENS))
+
+async def chat(client: httpx.AsyncClient, path: str) -> float:
+    start = time.perf_counter()
+    async with client.stream("POST", path, json={"query": "why did Thanos want the stones", "user_id": "bench"}) as response:
+        if path.endswith("/stream"):
+            async for line in response.aiter_lines():
+                if line and json.loads(line)["type"] == "token":
+                    return time.perf_counter() - start
+        await response.aread()
+    return time.perf_counter() - start
+
+async def sync_probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: list, interval: float = 0.02):
+    # Latency is measured from when the probe was due, so a stalled event loop counts against it
+    due = time.perf_counter()
+    while not stop.is_set():
+        await client.post("/api/sync", json={"timestamp_seconds": 12.0})
+        samples.append(time.perf_counter() - due)
+        due += interval
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+async def scenario(label: str, agent: NeMoAgent, path: str, concurrency: int = 8, port: int = 8766):
+    main.nemo = Lazy(lambda: agent)
+    # A real server: in-process ASGI transports buffer the whole response
+    server = uvicorn.Server(uvicorn.Config(main.app, port=port, log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+        await client.post("/api/sync", json={"timestamp_seconds": 0}) # warm routes
+        stop, sync_samples = asyncio.Event(), []
+        probe = asyncio.create_task(sync_probe(client, stop, sync_samples))
+        first = await asyncio.gather(*(chat(client, path) for _ in range(concurrency)))
+        stop.set()
+        await probe
+
+    server.should_exit = True
+    await serving
+
+    sync_ms = np.array(sync_samples) * 1000
+    print(f"   {label:<22} first output p50 {np.median(first) * 1000:7.0f} ms"
+          f" | /api/sync p50 {np.median(sync_ms):7.1f} ms  p99 {np.percentile(sync_ms, 99):7.1f} ms  ({len(sync_ms)} probes)")
+
+async def run_benchmark():
+    print(f"📡 Streaming Benchmark (8 concurrent chats, {TOKENS} tokens, first token after {FIRST_TOKEN_S * 1000:.0f} ms)")
+    main.router.instance # Train the intent classifier up front
+    await scenario("blocking /api/chat", BlockingNeMo(), "/api/chat")
+    await scenario("async /api/chat", SimulatedNeMo(), "/api/chat")
+    await scenario("async /api/chat/stream", SimulatedNeMo(), "/api/chat/stream")
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
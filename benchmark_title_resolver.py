@@ -0,0 +1,70 @@
+import time
+import random
+import numpy as np
+
+from backend.app.title_resolver import TitleResolver
+
+# (query as typed, expected TMDB id or None)
+QUERIES = [
+    ("load the matrix", 603), ("The Matrix", 603), ("the matirx", 603), ("Load The Matrix please", 603),
+    ("matrix 1999", 603), ("play the matrix reloaded", 604), ("matrix revolutions", 605),
+    ("Avengers: Infinity War", 299536), ("load Avengers: Infinity War", 299536), ("avengers infinty war", 299536),
+    ("infinity war", 299536), ("avengers 3", 299536), ("avengers endgame", 299534), ("end game", 299534),
+    ("the dark knight", 155), ("subtitles for the dark night", 155), ("dark knight rises", 49026),
+    ("batman begins", 272), ("the batman", 414906), ("interstelar", 157336), ("inception movie", 27205),
+    ("lord of the rings", 120), ("the two towers", 121), ("return of the king", 122),
+    ("harry potter 3", 673), ("harry potter and the sorcerers stone", 671), ("deathly hallows part 2", 12445),
+    ("star wars episode iv", 11), ("empire strikes back", 1891), ("terminator 2", 280), ("t2", 280),
+    ("spiderman homecoming", 315635), ("spider man no way home", 634649), ("guardians of the galaxy vol 2", 283995),
+    ("thor ragnarok", 284053), ("captain america civil war", 271110), ("blade runner 2049", 335984),
+    ("amelie", 194), ("leon the professional", 101), ("wall-e", 10681), ("se7en", 807), ("get out", 419430),
+    ("load get out", 419430), ("dune 2021", 438631), ("dune part two", 693134), ("1917", 530915),
+    ("2001 a space odyssey", 62), ("pulp fiction", 680), ("the godfather part ii", 240), ("shawshank", 278),
+    # Not movies in the dataset (or not movies at all): must not resolve
+    ("Neo The Matrix", None), ("Thor Avengers: Infinity War", None), ("iron man 4", None),
+    ("who is thanos", None), ("buy a gift card", None), ("what happened on vormir", None),
+]
+
+def legacy_key(movie_name: str) -> str:
+    # The previous fanart cache key (two hard-coded titles, raw name otherwise)
+    lower_name = movie_name.lower()
+    tmdb_id = "299536" if "infinity war" in lower_name else "603" if "matrix" in lower_name else None
+    return f"fanart_assets_{tmdb_id or movie_name}"
+
+def run_benchmark(rounds: int = 200):
+    print(f"🎞️ Title Resolver Benchmark ({len(QUERIES)} queries)")
+    resolver = TitleResolver()
+    start = time.perf_counter()
+    resolver.load()
+    print(f"   load: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    wrong = []
+    cold = []
+    for query, expected in QUERIES:
+        start = time.perf_counter()
+        match = resolver._resolve(query) # Bypasses the memo
+        cold.append((time.perf_counter() - start) * 1000)
+        if (match.tmdb_id if match else None) != expected:
+            wrong.append((query, expected, match))
+
+    queries = [q for q, _ in QUERIES] * rounds
+    random.Random(1).shuffle(queries)
+    start = time.perf_counter()
+    for query in queries:
+        resolver.resolve(query)
+    warm_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+    cold = np.array(cold)
+    print(f"   accuracy: {len(QUERIES) - len(wrong)}/{len(QUERIES)}"
+          f" | uncached p50 {np.median(cold):.3f} ms, p99 {np.percentile(cold, 99):.3f} ms | memoized {warm_us:.2f} µs")
+    for query, expected, match in wrong:
+        print(f"   ✗ {query!r}: expected {expected}, got {match}")
+
+    movies = [q for q, expected in QUERIES if expected]
+    legacy = {legacy_key(q) for q in movies}
+    canonical = {f"fanart_assets_{resolver.canonical_key(q)}" for q in movies}
+    print(f"   cache keys for {len(movies)} spellings of {len({e for _, e in QUERIES if e})} movies:"
+          f" legacy {len(legacy)} | canonical {len(canonical)}")
+
+if __name__ == "__main__":
+    run_benchmark()
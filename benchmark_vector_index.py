@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+import numpy as np
+
+from backend.app.vector_index import VectorIndex
+
+def clustered_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    """
+    Synthetic embeddings with topical structure, similar to scene chunks.
+    """
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    return centers[labels] + 3.0 * rng.standard_normal((n, dim)).astype(np.float32)
+
+def run_benchmark(n: int = 50000, dim: int = 768, n_queries: int = 200, k: int = 10):
+    print("🧭 Vector Index Benchmark")
+    rng = np.random.default_rng(42)
+    data = clustered_vectors(n + n_queries, dim, 200, rng)
+    corpus, queries = data[:n], data[n:]
+    ids = [f"chunk_{i}" for i in range(n)]
+    metas = [{"movie": f"movie_{i % 20}", "text": "", "start": i * 2.0, "end": i * 2.0 + 2.0} for i in range(n)]
+
+    exact = VectorIndex(exact_threshold=n + 1)
+    start = time.perf_counter()
+    exact.add(ids, corpus, metas)
+    print(f"   Build exact: {time.perf_counter() - start:.2f}s for {n} x {dim}")
+
+    start = time.perf_counter()
+    truth = [{r["id"] for r in exact.search(q, k)} for q in queries]
+    exact_qps = n_queries / (time.perf_counter() - start)
+    print(f"   [exact]        QPS {exact_qps:8.1f} | recall@{k} 1.0000")
+
+    ivf = VectorIndex(exact_threshold=1000)
+    start = time.perf_counter()
+    ivf.add(ids, corpus, metas)
+    print(f"   Build IVF:   {time.perf_counter() - start:.2f}s ({len(ivf.centroids)} lists)")
+
+    for nprobe in (4, 8, 16, 32):
+        ivf.nprobe = nprobe
+        start = time.perf_counter()
+        found = [{r["id"] for r in ivf.search(q, k)} for q in queries]
+        qps = n_queries / (time.perf_counter() - start)
+        recall = sum(len(t & f) for t, f in zip(truth, found)) / (n_queries * k)
+        print(f"   [ivf nprobe={nprobe:<2}] QPS {qps:8.1f} | recall@{k} {recall:.4f}")
+
+    start = time.perf_counter()
+    filtered = [ivf.search(q, k, movie="movie_3") for q in queries]
+    print(f"   [movie filter] QPS {n_queries / (time.perf_counter() - start):8.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.npz")
+        start = time.perf_counter()
+        ivf.save(path)
+        saved = time.perf_counter() - start
+        restored = VectorIndex()
+        start = time.perf_counter()
+        restored.load(path)
+        print(f"   Persist: save {saved:.2f}s / load {time.perf_counter() - start:.2f}s "
+              f"({os.path.getsize(path) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    run_benchmark()
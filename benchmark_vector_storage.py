@@ -0,0 +1,44 @@
+import time
+import bson
+import numpy as np
+
+from backend.app.embedding_backends import LocalHashingEmbeddingBackend
+from backend.app.vector_codec import encode_embedding, decode_matrix
+
+def build_corpus(n: int):
+    rng = np.random.default_rng(7)
+    words = ("neo trinity morpheus agent smith matrix red blue pill thanos thor stone "
+             "gauntlet snap head follow the white rabbit there is no spoon kung fu").split()
+    return [" ".join(rng.choice(words, size=12)) for _ in range(n)]
+
+def recall_at_k(exact: np.ndarray, approx: np.ndarray, queries: np.ndarray, k: int) -> float:
+    truth = np.argsort(-(queries @ exact.T), axis=1)[:, :k]
+    found = np.argsort(-(queries @ approx.T), axis=1)[:, :k]
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / (len(queries) * k)
+
+def run_benchmark(n_docs: int = 5000, n_queries: int = 200, k: int = 10):
+    print("📦 Vector Storage Benchmark")
+    backend = LocalHashingEmbeddingBackend()
+    vectors = backend.embed_array(build_corpus(n_docs)).astype(np.float32)
+    queries = backend.embed_array(build_corpus(n_queries + n_docs)[-n_queries:])
+
+    baseline = None
+    for storage in ("array", "float32", "int8"):
+        docs = [{"movie": "bench", "text": "", "start": 0.0, "end": 0.0, "embedding": encode_embedding(v, storage)}
+                for v in vectors]
+        encoded = [bson.encode(d) for d in docs]
+        size = sum(len(b) for b in encoded) / len(encoded)
+        baseline = baseline or size
+
+        start = time.perf_counter()
+        decoded_docs = [bson.decode(b) for b in encoded]
+        matrix = decode_matrix(d["embedding"] for d in decoded_docs)
+        elapsed = time.perf_counter() - start
+
+        recall = recall_at_k(vectors, matrix, queries, k)
+        print(f"   [{storage:<7}] {size:8.0f} B/doc ({baseline / size:4.1f}x smaller) | "
+              f"decode {elapsed * 1000:7.1f} ms for {n_docs} docs | recall@{k} {recall:.4f}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -1,42 +1,102 @@
 'use client';
 
 import React, { useState } from 'react';
-import { Message, ChatResponse } from '../types';
+import { Message, StreamEvent } from '../types';
 import ThesysRenderer from './ThesysRenderer';
 
+// One id per browser tab: the backend keeps conversation memory per user, and a new
+// query from the same user cancels that user's previous in-flight chat
+const USER_ID = typeof crypto !== 'undefined' && 'randomUUID' in crypto
+    ? `user_${crypto.randomUUID()}`
+    : `user_${Math.random().toString(36).slice(2)}`;
+
+let nextMessageId = 0;
+
 export default function ChatInterface() {
     const [query, setQuery] = useState('');
     const [messages, setMessages] = useState<Message[]>([]);
     const [loading, setLoading] = useState(false);
+    // True until the stream's final (or error) event: one question at a time
+    const [streaming, setStreaming] = useState(false);
 
     const handleSend = async () => {
-        if (!query.trim()) return;
+        if (!query.trim() || streaming) return;
 
         const userMsg: Message = { role: 'user', content: query };
         setMessages(prev => [...prev, userMsg]);
         setLoading(true);
+        setStreaming(true);
         setQuery('');
 
+        // Placeholder AI message, filled in as events arrive (replaced by the error if the stream fails).
+        // Updated by id, never as "the last message"
+        const aiMsgId = nextMessageId++;
+        let hasPlaceholder = false;
+        const updateAiMsg = (update: (msg: Message) => Message) =>
+            setMessages(prev => prev.map(msg => (msg.id === aiMsgId ? update(msg) : msg)));
+
         try {
-            const res = await fetch('http://localhost:8000/api/chat', {
+            const res = await fetch('http://localhost:8000/api/chat/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ query: userMsg.content, user_id: 'user_1' }),
+                body: JSON.stringify({ query: userMsg.content, user_id: USER_ID }),
             });
-            const data: ChatResponse = await res.json();
-
-            const aiMsg: Message = {
-                role: 'ai',
-                content: data.response,
-                data: data.data,
-                agent_used: data.agent_used
-            };
-            setMessages(prev => [...prev, aiMsg]);
+            if (!res.body) throw new Error('No response body');
+
+            setMessages(prev => [...prev, { id: aiMsgId, role: 'ai', content: '' }]);
+            hasPlaceholder = true;
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop() ?? '';
+
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const event: StreamEvent = JSON.parse(line);
+                    setLoading(false);
+
+                    if (event.type === 'token') {
+                        updateAiMsg(msg => ({ ...msg, content: msg.content + event.text }));
+                    } else if (event.type === 'ui') {
+                        // Upsert fragments by id: the movie card improves as sources arrive
+                        updateAiMsg(msg => {
+                            const schema = [...(msg.data?.ui_schema ?? [])];
+                            for (const node of event.ui_schema) {
+                                const idx = schema.findIndex(n => n.id === node.id);
+                                if (idx >= 0) schema[idx] = node; else schema.push(node);
+                            }
+                            return { ...msg, data: { ...msg.data, ui_schema: schema } };
+                        });
+                    } else if (event.type === 'final') {
+                        updateAiMsg(() => ({
+                            id: aiMsgId,
+                            role: 'ai',
+                            content: event.response,
+                            data: event.data,
+                            agent_used: event.agent_used
+                        }));
+                        setStreaming(false);
+                    }
+                }
+            }
         } catch (err) {
             console.error(err);
-            setMessages(prev => [...prev, { role: 'ai', content: "Sorry, I couldn't reach the server." }]);
+            const error = "Sorry, I couldn't reach the server.";
+            if (hasPlaceholder) {
+                // Keep whatever streamed before the failure
+                updateAiMsg(msg => ({ ...msg, content: msg.content ? `${msg.content}\n\n${error}` : error }));
+            } else {
+                setMessages(prev => [...prev, { role: 'ai', content: error }]);
+            }
         } finally {
             setLoading(false);
+            setStreaming(false);
         }
     };
 
@@ -50,7 +110,7 @@ export default function ChatInterface() {
 
             <div className="flex-1 overflow-y-auto space-y-4 mb-4 pr-2">
                 {messages.map((msg, idx) => (
-                    <div key={idx} className={`flex ${msg.role === 'user' ? 'justify-end' : 'justify-start'}`}>
+                    <div key={msg.id ?? `m${idx}`} className={`flex ${msg.role === 'user' ? 'justify-end' : 'justify-start'}`}>
                         <div className={`max-w-xl p-4 rounded-2xl ${msg.role === 'user'
                             ? 'bg-blue-600'
                             : 'bg-gray-800 border border-gray-700'
@@ -77,10 +137,12 @@ export default function ChatInterface() {
                     value={query}
                     onChange={(e) => setQuery(e.target.value)}
                     onKeyDown={(e) => e.key === 'Enter' && handleSend()}
+                    disabled={streaming}
                 />
                 <button
                     onClick={handleSend}
-                    className="bg-purple-600 hover:bg-purple-700 px-6 py-3 rounded-xl transition-colors font-semibold"
+                    disabled={streaming}
+                    className="bg-purple-600 hover:bg-purple-700 disabled:opacity-50 disabled:cursor-not-allowed px-6 py-3 rounded-xl transition-colors font-semibold"
                 >
                     Send
                 </button>
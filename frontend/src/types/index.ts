@@ -1,4 +1,5 @@
 export interface Message {
+  id?: number; // Set on streamed AI messages, which are updated in place
   role: 'user' | 'ai';
   content: string;
   data?: any;
@@ -10,3 +11,11 @@ export interface ChatResponse {
   data: any;
   agent_used: string;
 }
+
+// One NDJSON line from /api/chat/stream
+export type StreamEvent =
+  | { type: 'intent'; agent_used: string }
+  | { type: 'ttft'; ms: number }
+  | { type: 'token'; text: string }
+  | { type: 'ui'; source: string; status: string; ms: number; ui_schema: any[] }
+  | ({ type: 'final' } & ChatResponse);
@@ -0,0 +1,31 @@
+import asyncio
+import sys
+from dotenv import load_dotenv
+
+# Load Env
+load_dotenv("backend/.env")
+
+from backend.app.database import db
+from backend.app.cache_manager import cache
+
+async def verify_cache() -> int:
+    print("🗜️ Measuring api_cache storage per namespace...")
+    await db.connect(init_indexes=False)
+    if db.db is None:
+        print("   ❌ Connection Failed (start a local mongod or check MONGO_URI)")
+        return 1
+
+    sizes = await cache.namespace_sizes()
+    for ns, row in sorted(sizes.items()):
+        raw, stored = row["raw_bytes"], row["stored_bytes"]
+        # Legacy (v1) entries carry no sizes until they are rewritten
+        ratio = f"{stored / raw:4.0%} of raw" if raw else "n/a"
+        print(f"   {ns:<16} {row['entries']:6d} entries | raw {raw / 1024:9.1f} KB | stored {stored / 1024:9.1f} KB ({ratio})")
+    if not sizes:
+        print("   (api_cache is empty)")
+
+    await db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(verify_cache()))
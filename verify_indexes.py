@@ -0,0 +1,30 @@
+import asyncio
+import sys
+from dotenv import load_dotenv
+
+# Load Env
+load_dotenv("backend/.env")
+
+from backend.app.database import db
+from backend.app.index_manager import index_manager
+
+async def verify_indexes() -> int:
+    print("🗂️ Verifying MongoDB indexes against registered query shapes...")
+    await db.connect() # Reconciles the declared indexes on connect
+    if db.db is None:
+        print("   ❌ Connection Failed (start a local mongod or check MONGO_URI)")
+        return 1
+
+    failures = 0
+    for result in await index_manager.check():
+        ok = result["status"] == "ok"
+        failures += 0 if ok else 1
+        print(f"   {'✅' if ok else '❌'} {result['collection']:<15} {str(result['filter']):<58} "
+              f"{' > '.join(result['stages']) or result['status']:<28} ({result['used_by']})")
+
+    await db.close()
+    print(f"\n{'✅ No collection scans.' if not failures else f'❌ {failures} query shape(s) need attention.'}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(verify_indexes()))
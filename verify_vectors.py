@@ -15,7 +15,7 @@ async def verify_intelligence():
     
     # 1. Test Embedding
     vec_agent = VectorEmbeddingAgent()
-    print(f"   [VectorAgent] Using Key: {'YES' if vec_agent.api_key else 'NO'}")
+    print(f"   [VectorAgent] Using Backend: {vec_agent.backend.model}")
     
     vec = await vec_agent.generate_embedding("Thanos is the villain.")
     if vec: